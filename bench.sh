@@ -0,0 +1,8 @@
+# move to script parent directory
+cd "$(dirname "$0")"
+
+# set PYTHONPATH
+export PYTHONPATH=${PWD}
+
+# run benchmarks, passing on options such as --quick, --output & --baseline
+python benchmarks/run.py "$@"
@@ -0,0 +1,315 @@
+import collections
+import functools
+import io
+import itertools
+import os
+
+import numpy as np
+from PIL import Image
+
+from openchroma.colorspace import RGB_to_CMYK, CMYK_to_RGB, clear_color_cache
+from openchroma.imageops import (
+    open_image,
+    save_image,
+    split_channels,
+    combine_channels,
+    crop_image,
+    crop_images,
+    sliding_window,
+)
+
+# height & width of benchmarked images
+SIZES = {
+    'VGA': (480, 640),
+    'HD': (720, 1280),
+    'FHD': (1080, 1920),
+    '12MP': (3000, 4000),
+    '50MP': (5792, 8688),
+}
+QUICK_SIZES = ('VGA', 'HD')
+
+# data types of benchmarked images
+DTYPES = ('uint8', 'float64')
+
+# sliding window shapes & operations
+WINDOWS = (3, 15, 63)
+QUICK_WINDOWS = (3, 15)
+OPS = {
+    'mean': np.mean,
+    'max': np.max,
+    'median': np.median,
+    'std': np.std,
+}
+
+# window shapes & operations of block pooling, with strides equal to windows
+POOL_WINDOWS = (2, 8)
+POOL_OPS = ('mean', 'max')
+
+# number of boxes & outputs of batched crops
+CROP_BOXES = 1000
+CROP_MODES = ('views', 'mean')
+
+# largest number of pixel visits of operations that sort each window
+MAX_SORT_WORK = 2**28
+
+# image whose content is scaled to each benchmarked size
+SOURCE_IMAGE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'docs',
+    'img',
+    'popcat.png',
+)
+
+Case = collections.namedtuple('Case', ['name', 'params', 'pixels', 'setup'])
+
+
+@functools.lru_cache(maxsize=None)
+def _photo(size):
+    '''
+    Scale source image to given size, so that benchmarked images hold
+    photographic content rather than noise.
+
+    Parameters
+    ----------
+    size : str
+        Name of size in ``SIZES``.
+
+    Returns
+    -------
+    img : numpy.ndarray
+        Read-only 3D image array of data type ``numpy.uint8`` in RGB space.
+    '''
+
+    height, width = SIZES[size]
+    with Image.open(SOURCE_IMAGE) as im:
+        im = im.convert('RGB').resize((width, height), Image.BILINEAR)
+        img = np.array(im)
+
+    img.flags.writeable = False
+
+    return img
+
+
+def _image(size, dtype):
+    '''
+    Get benchmarked image of given size & data type.
+
+    Parameters
+    ----------
+    size : str
+        Name of size in ``SIZES``.
+
+    dtype : str
+        Name of data type.
+
+    Returns
+    -------
+    img : numpy.ndarray
+        3D image array in RGB space.
+    '''
+
+    return _photo(size).astype(dtype)
+
+
+def _encoded(size):
+    '''
+    Encode benchmarked image of given size as PNG file.
+
+    Parameters
+    ----------
+    size : str
+        Name of size in ``SIZES``.
+
+    Returns
+    -------
+    data : bytes
+        Encoded image file.
+    '''
+
+    f = io.BytesIO()
+    Image.fromarray(_photo(size)).save(f, format='PNG')
+
+    return f.getvalue()
+
+
+def _open_image_case(size, dtype):
+    data = _encoded(size)
+    dtype = None if dtype == 'uint8' else dtype
+
+    return lambda: open_image(io.BytesIO(data), dtype=dtype)
+
+
+def _save_image_case(size, dtype):
+    img = _image(size, dtype)
+
+    return lambda: save_image(img, io.BytesIO(), format='PNG')
+
+
+def _RGB_to_CMYK_case(size, dtype):
+    img = _image(size, dtype)
+
+    def convert():
+        # time conversions of new images, rather than cached colours
+        clear_color_cache()
+        return RGB_to_CMYK(img)
+
+    return convert
+
+
+def _CMYK_to_RGB_case(size, dtype):
+    cmyk = RGB_to_CMYK(_image(size, dtype))
+
+    return lambda: CMYK_to_RGB(cmyk)
+
+
+def _split_channels_case(size, dtype):
+    img = _image(size, dtype)
+
+    return lambda: split_channels(img)
+
+
+def _combine_channels_case(size, dtype):
+    # separate channels, so that they have to be copied
+    channels = [c.copy() for c in split_channels(_image(size, dtype))]
+
+    return lambda: combine_channels(*channels)
+
+
+def _crop_image_case(size, dtype):
+    img = _image(size, dtype)
+    height, width = SIZES[size]
+    top_left = (height // 4, width // 4)
+
+    return lambda: crop_image(
+        img,
+        top_left,
+        height_width=(height // 2, width // 2),
+    )
+
+
+def _crop_images_case(size, dtype, mode):
+    img = _image(size, dtype)
+    height, width = SIZES[size]
+
+    # boxes of up to an eighth of the image, like detector outputs
+    rng = np.random.default_rng(0)
+    top_left = rng.integers(0, (height, width), size=(CROP_BOXES, 2))
+    height_width = rng.integers(1, (height // 8, width // 8), (CROP_BOXES, 2))
+    boxes = np.concatenate((top_left, height_width), axis=1)
+
+    return lambda: crop_images(img, boxes, mode=mode)
+
+
+def _sliding_window_case(size, dtype, window, op):
+    channel = np.ascontiguousarray(_image(size, dtype)[..., 0])
+
+    return lambda: sliding_window(
+        channel,
+        (window, window),
+        op=OPS[op],
+        dtype=np.float64,
+    )
+
+
+def _block_pool_case(size, dtype, window, op):
+    channel = np.ascontiguousarray(_image(size, dtype)[..., 0])
+
+    return lambda: sliding_window(
+        channel,
+        (window, window),
+        op=OPS[op],
+        dtype=np.float64,
+        stride=window,
+    )
+
+
+# set-up functions of benchmarked functions, returning the call to be timed
+_SETUPS = {
+    'open_image': _open_image_case,
+    'save_image': _save_image_case,
+    'RGB_to_CMYK': _RGB_to_CMYK_case,
+    'CMYK_to_RGB': _CMYK_to_RGB_case,
+    'split_channels': _split_channels_case,
+    'combine_channels': _combine_channels_case,
+    'crop_image': _crop_image_case,
+    'crop_images': _crop_images_case,
+    'sliding_window': _sliding_window_case,
+    'block_pool': _block_pool_case,
+}
+
+
+def _is_feasible(name, params):
+    '''
+    Check if case finishes in reasonable time.
+
+    Parameters
+    ----------
+    name : str
+        Name of benchmarked function.
+
+    params : dict
+        Parameters of case.
+
+    Returns
+    -------
+    feasible : bool
+        Indicates whether or not case is run.
+    '''
+
+    # sliding windows are sorted for medians of non-8-bit images
+    if name == 'sliding_window' and params['op'] == 'median':
+        if params['dtype'] != 'uint8':
+            height, width = SIZES[params['size']]
+            work = height * width * params['window'] ** 2
+
+            return work <= MAX_SORT_WORK
+
+    return True
+
+
+def get_cases(quick=False):
+    '''
+    Get benchmark cases.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Indicates whether or not to only include small images & windows.
+
+    Returns
+    -------
+    cases : list
+        ``Case`` object of each case, whose ``setup`` function prepares the
+        inputs & returns the call to be timed.
+    '''
+
+    sizes = QUICK_SIZES if quick else tuple(SIZES)
+    windows = QUICK_WINDOWS if quick else WINDOWS
+
+    cases = []
+    for name, setup in _SETUPS.items():
+        matrix = {'size': sizes, 'dtype': DTYPES}
+        if name == 'sliding_window':
+            matrix.update(window=windows, op=tuple(OPS))
+        elif name == 'block_pool':
+            matrix.update(window=POOL_WINDOWS, op=POOL_OPS)
+        elif name == 'crop_images':
+            matrix.update(mode=CROP_MODES)
+
+        for values in itertools.product(*matrix.values()):
+            params = dict(zip(matrix, values))
+            if not _is_feasible(name, params):
+                continue
+
+            label = ','.join('%s=%s' % item for item in params.items())
+            height, width = SIZES[params['size']]
+            cases.append(
+                Case(
+                    name='%s[%s]' % (name, label),
+                    params=dict(params, function=name),
+                    pixels=height * width,
+                    setup=functools.partial(setup, **params),
+                )
+            )
+
+    return cases
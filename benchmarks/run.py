@@ -0,0 +1,269 @@
+import argparse
+import datetime
+import fnmatch
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+import PIL
+
+from cases import get_cases
+
+# default ratios to baseline above which results count as regressions
+TIME_THRESHOLD = 1.25
+MEMORY_THRESHOLD = 1.10
+
+
+def _measure(case, repeat=5, memory=True):
+    '''
+    Time case & measure its peak memory.
+
+    Parameters
+    ----------
+    case : ``Case`` object
+        Benchmark case.
+
+    repeat : int, optional
+        Number of timing runs. Fast calls are looped within each run, so that
+        each run takes at least 0.2 seconds.
+
+    memory : bool, optional
+        Indicates whether or not to measure peak memory.
+
+    Returns
+    -------
+    result : dict
+        Parameters, timings, throughput & peak memory of case.
+    '''
+
+    func = case.setup()
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+
+    # trace allocations separately, since tracing slows calls down
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    seconds = min(times)
+
+    return {
+        'name': case.name,
+        'params': case.params,
+        'megapixels': case.pixels / 1e6,
+        'seconds': seconds,
+        'median_seconds': float(np.median(times)),
+        'megapixels_per_second': case.pixels / 1e6 / seconds,
+        'peak_memory': peak_memory,
+    }
+
+
+def _compare(results, baseline, time_threshold, memory_threshold):
+    '''
+    Compare results to baseline results.
+
+    Parameters
+    ----------
+    results : list
+        Results of this run.
+
+    baseline : list
+        Results of baseline run.
+
+    time_threshold : float
+        Ratio of time to baseline time above which a case regressed.
+
+    memory_threshold : float
+        Ratio of peak memory to baseline peak memory above which a case
+        regressed.
+
+    Returns
+    -------
+    regressions : list
+        Description of each regression.
+    '''
+
+    baseline = {result['name']: result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline.get(result['name'])
+        if base is None:
+            continue
+
+        ratios = [
+            ('time', result['seconds'] / base['seconds'], time_threshold)
+        ]
+        if result['peak_memory'] is not None and base['peak_memory']:
+            ratio = result['peak_memory'] / base['peak_memory']
+            ratios.append(('memory', ratio, memory_threshold))
+
+        for kind, ratio, threshold in ratios:
+            if ratio > threshold:
+                regressions.append(
+                    '%s: %s %.2fx baseline (threshold %.2fx)'
+                    % (result['name'], kind, ratio, threshold)
+                )
+
+    return regressions
+
+
+def _build_parser():
+    '''
+    Build parser of command-line arguments.
+
+    Returns
+    -------
+    parser : ``argparse.ArgumentParser`` object
+        Command-line argument parser.
+    '''
+
+    parser = argparse.ArgumentParser(
+        description='Benchmark OpenChroma functions.',
+    )
+    parser.add_argument(
+        '--quick',
+        action='store_true',
+        help='only benchmark small images & windows',
+    )
+    parser.add_argument(
+        '-k',
+        '--filter',
+        default='*',
+        help='glob pattern of case names to run (default: all)',
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='number of timing runs per case (default: 5)',
+    )
+    parser.add_argument(
+        '--no-memory',
+        action='store_true',
+        help='skip measuring peak memory',
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        default=None,
+        help='JSON file to save results to',
+    )
+    parser.add_argument(
+        '-b',
+        '--baseline',
+        default=None,
+        help='JSON file of baseline results to compare against',
+    )
+    parser.add_argument(
+        '--time-threshold',
+        type=float,
+        default=TIME_THRESHOLD,
+        help='time ratio to baseline counted as regression (default: %.2f)'
+        % TIME_THRESHOLD,
+    )
+    parser.add_argument(
+        '--memory-threshold',
+        type=float,
+        default=MEMORY_THRESHOLD,
+        help='peak memory ratio to baseline counted as regression '
+        '(default: %.2f)' % MEMORY_THRESHOLD,
+    )
+
+    return parser
+
+
+def main(argv=None):
+    '''
+    Run benchmarks.
+
+    Parameters
+    ----------
+    argv : list, optional
+        Command-line arguments. By default, ``sys.argv`` is used.
+
+    Returns
+    -------
+    status : int
+        Exit status, which is ``1`` if any case regressed, otherwise ``0``.
+    '''
+
+    args = _build_parser().parse_args(argv)
+
+    cases = [
+        case
+        for case in get_cases(quick=args.quick)
+        if fnmatch.fnmatchcase(case.name, args.filter)
+    ]
+
+    results = []
+    for i, case in enumerate(cases, start=1):
+        result = _measure(case, repeat=args.repeat, memory=not args.no_memory)
+        results.append(result)
+
+        memory = '-'
+        if result['peak_memory'] is not None:
+            memory = '%.1f MB' % (result['peak_memory'] / 2**20)
+        print(
+            '[%d/%d] %s: %.3f ms, %.1f MP/s, %s'
+            % (
+                i,
+                len(cases),
+                case.name,
+                result['seconds'] * 1e3,
+                result['megapixels_per_second'],
+                memory,
+            )
+        )
+
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'quick': args.quick,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline is None:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+
+    regressions = _compare(
+        results,
+        baseline,
+        args.time_threshold,
+        args.memory_threshold,
+    )
+    for regression in regressions:
+        print('regression: ' + regression)
+
+    print(
+        '%d regressions in %d cases compared to baseline'
+        % (len(regressions), len(results))
+    )
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
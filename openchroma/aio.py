@@ -0,0 +1,271 @@
+import asyncio
+import inspect
+import io
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import imageops
+
+# maximum number of images decoded or encoded at once
+MAX_CONCURRENCY = min(32, (os.cpu_count() or 1) + 4)
+
+# executor shared by all event loops & concurrency limit of each event loop
+_executor = None
+_executor_lock = threading.Lock()
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def set_max_concurrency(limit):
+    '''
+    Set maximum number of images decoded or encoded at once.
+
+    Parameters
+    ----------
+    limit : int
+        Maximum number of images, which is also the number of threads images
+        are decoded & encoded in.
+    '''
+
+    global MAX_CONCURRENCY, _executor
+
+    if limit < 1:
+        raise ValueError('`limit` must be a positive integer')
+
+    with _executor_lock:
+        MAX_CONCURRENCY = limit
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+        _semaphores.clear()
+
+
+def _get_executor():
+    '''
+    Get executor shared by all event loops, creating it if needed.
+
+    Returns
+    -------
+    executor : ``concurrent.futures.ThreadPoolExecutor`` object
+        Executor with ``MAX_CONCURRENCY`` threads.
+    '''
+
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_CONCURRENCY,
+                thread_name_prefix='openchroma-aio',
+            )
+
+        return _executor
+
+
+def _get_semaphore():
+    '''
+    Get concurrency limit of running event loop, creating it if needed.
+
+    Returns
+    -------
+    semaphore : ``asyncio.Semaphore`` object
+        Semaphore allowing ``MAX_CONCURRENCY`` images at once.
+    '''
+
+    loop = asyncio.get_running_loop()
+    with _executor_lock:
+        if loop not in _semaphores:
+            _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        return _semaphores[loop]
+
+
+async def _run(func, *args, **kwargs):
+    '''
+    Run function in shared executor, within concurrency limit.
+
+    Parameters
+    ----------
+    func : callable function
+        Function to run.
+
+    Returns
+    -------
+    result : object
+        Return value of function.
+    '''
+
+    async with _get_semaphore():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_executor(),
+            lambda: func(*args, **kwargs),
+        )
+
+
+async def _read_source(src):
+    '''
+    Read image source without blocking event loop.
+
+    Parameters
+    ----------
+    src : str, ``pathlib.Path`` object, file object, bytes-like object,
+    async stream or async iterable
+        Image source.
+
+    Returns
+    -------
+    source : str, ``pathlib.Path`` object or file object
+        Source that can be read by Pillow. Bytes & async sources are read
+        into memory.
+    '''
+
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return io.BytesIO(src)
+
+    read = getattr(src, 'read', None)
+    if read is not None and inspect.iscoroutinefunction(read):
+        return io.BytesIO(await read())
+
+    if hasattr(src, '__aiter__'):
+        chunks = [chunk async for chunk in src]
+        return io.BytesIO(b''.join(chunks))
+
+    return src
+
+
+async def open_image(src, dtype=np.float64, layout='HWC'):
+    '''
+    Open image from given source without blocking event loop.
+
+    Images are decoded in a shared pool of threads, and at most
+    ``MAX_CONCURRENCY`` images are decoded or encoded at once per event loop.
+
+    Parameters
+    ----------
+    src : str, ``pathlib.Path`` object, file object, bytes-like object,
+    async stream or async iterable
+        Image source. Async streams are objects with a coroutine ``read``
+        method, such as ``asyncio.StreamReader`` objects, and async iterables
+        yield chunks of bytes. Bytes & async sources are read into memory
+        before decoding.
+
+    dtype : type, optional
+        Data type of image array. If ``None``, the decoded data type is kept.
+
+    layout : str, optional
+        Layout of image array, ``'HWC'`` for interleaved (height, width,
+        channel) or ``'CHW'`` for planar (channel, height, width) layout.
+
+    Returns
+    -------
+    img : numpy.ndarray
+        3D image array in RGB space.
+    '''
+
+    source = await _read_source(src)
+
+    return await _run(
+        imageops.open_image,
+        source,
+        dtype=dtype,
+        layout=layout,
+    )
+
+
+def _encode_image(img, format, layout='HWC'):
+    '''
+    Encode image into bytes.
+
+    Parameters
+    ----------
+    img : array-like
+        3D image array in RGB space.
+
+    format : str
+        Image file format.
+
+    layout : str, optional
+        Layout of image array, ``'HWC'`` for interleaved (height, width,
+        channel) or ``'CHW'`` for planar (channel, height, width) layout.
+
+    Returns
+    -------
+    data : bytes
+        Encoded image file.
+    '''
+
+    f = io.BytesIO()
+    imageops.save_image(img, f, format=format, layout=layout)
+
+    return f.getvalue()
+
+
+async def save_image(img, dst=None, format=None, layout='HWC'):
+    '''
+    Save image to given destination without blocking event loop.
+
+    Images are encoded in a shared pool of threads, and at most
+    ``MAX_CONCURRENCY`` images are decoded or encoded at once per event loop.
+
+    Parameters
+    ----------
+    img : array-like
+        3D image array in RGB space.
+
+    dst : str, ``pathlib.Path`` object, file object or async stream, optional
+        Image destination. Async streams are objects with a ``write`` method
+        that returns an awaitable, or that have a coroutine ``drain`` method,
+        such as ``asyncio.StreamWriter`` objects. If not given, the encoded
+        image is returned.
+
+    format : str, optional
+        Image file format. Required unless ``dst`` is a path with a file
+        extension.
+
+    layout : str, optional
+        Layout of image array, ``'HWC'`` for interleaved (height, width,
+        channel) or ``'CHW'`` for planar (channel, height, width) layout.
+
+    Returns
+    -------
+    data : bytes or None
+        Encoded image file, if ``dst`` is not given.
+    '''
+
+    write = getattr(dst, 'write', None)
+    drain = getattr(dst, 'drain', None)
+    is_async = write is not None and (
+        inspect.iscoroutinefunction(write)
+        or (drain is not None and inspect.iscoroutinefunction(drain))
+    )
+
+    if dst is not None and not is_async:
+        await _run(
+            imageops.save_image,
+            img,
+            dst,
+            format=format,
+            layout=layout,
+        )
+        return None
+
+    if format is None:
+        raise ValueError('`format` must be specified unless `dst` is a path')
+
+    data = await _run(_encode_image, img, format, layout=layout)
+    if dst is None:
+        return data
+
+    result = write(data)
+    if inspect.isawaitable(result):
+        await result
+
+    if drain is not None:
+        await drain()
+
+    return None
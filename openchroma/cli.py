@@ -0,0 +1,476 @@
+import argparse
+import functools
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .constants import RGB_RANGE, RGB16_RANGE
+from .imageops import open_image, save_image, sliding_window
+from .streaming import stream_RGB_to_CMYK
+
+# extensions of image files found in directories
+IMAGE_EXTENSIONS = (
+    '.bmp',
+    '.jpeg',
+    '.jpg',
+    '.npy',
+    '.png',
+    '.ppm',
+    '.tif',
+    '.tiff',
+    '.webp',
+)
+
+# operations of filter command
+FILTER_OPS = {
+    'max': np.max,
+    'mean': np.mean,
+    'median': np.median,
+    'min': np.min,
+    'sum': np.sum,
+}
+
+
+def _glob_root(pattern):
+    '''
+    Get leading directories of glob pattern that hold no wildcards.
+
+    Parameters
+    ----------
+    pattern : str
+        Glob pattern.
+
+    Returns
+    -------
+    root : str
+        Directory that all paths matching pattern lie in.
+    '''
+
+    root = os.path.dirname(pattern)
+    while glob.has_magic(root):
+        root = os.path.dirname(root)
+
+    return root or '.'
+
+
+def _find_sources(patterns):
+    '''
+    Find image files in given paths.
+
+    Parameters
+    ----------
+    patterns : list
+        Paths of image files or directories, or glob patterns. Directories
+        are searched recursively for files with extensions in
+        ``IMAGE_EXTENSIONS``.
+
+    Returns
+    -------
+    sources : list
+        Path of each image file, together with its path relative to the
+        output directory. This is its path relative to the directory, or to
+        the leading directories of the glob pattern without wildcards, it
+        was found in.
+    '''
+
+    sources = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                        path = os.path.join(root, name)
+                        sources.append((path, os.path.relpath(path, pattern)))
+        elif os.path.isfile(pattern):
+            sources.append((pattern, os.path.basename(pattern)))
+        else:
+            root = _glob_root(pattern)
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    sources.append((path, os.path.relpath(path, root)))
+
+    return sources
+
+
+def _is_up_to_date(src, dst):
+    '''
+    Check if output file is newer than its source file.
+
+    Parameters
+    ----------
+    src : str
+        Path to source file.
+
+    dst : str
+        Path to output file.
+
+    Returns
+    -------
+    up_to_date : bool
+        Indicates whether or not output file exists and was modified after
+        source file.
+    '''
+
+    try:
+        return os.path.getmtime(dst) >= os.path.getmtime(src)
+    except OSError:
+        return False
+
+
+def _convert_file(src, dst, precision=2):
+    '''
+    Convert image file from RGB space to CMYK space.
+
+    Parameters
+    ----------
+    src : str
+        Path to source file.
+
+    dst : str
+        Path to output file.
+
+    precision : int, optional
+        Number of decimal places to round values to.
+    '''
+
+    stream_RGB_to_CMYK(src, dst, precision=precision)
+
+
+def _filter_file(src, dst, window, op='mean', edges=False):
+    '''
+    Perform sliding window operation on each channel of image file.
+
+    Parameters
+    ----------
+    src : str
+        Path to source file. Files with extension ``.npy`` hold 3D image
+        arrays.
+
+    dst : str
+        Path to output file. Files with extension ``.npy`` hold 3D arrays of
+        filtered values.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    op : str, optional
+        Name of operation in ``FILTER_OPS``.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+    '''
+
+    if os.path.splitext(src)[1].lower() == '.npy':
+        img = np.load(src, mmap_mode='r')
+    else:
+        img = open_image(src, dtype=None)
+
+    channels = [
+        sliding_window(
+            img[..., i],
+            window,
+            op=FILTER_OPS[op],
+            dtype=np.float64,
+            edges=edges,
+        )
+        for i in range(img.shape[-1])
+    ]
+    filtered = np.round(np.stack(channels, axis=-1))
+
+    # keep 16-bit values of 16-bit images, which are saved with 8 bits
+    if img.dtype == np.uint16:
+        filtered = np.clip(filtered, *RGB16_RANGE).astype(np.uint16)
+    else:
+        filtered = np.clip(filtered, *RGB_RANGE)
+
+    if os.path.splitext(dst)[1].lower() == '.npy':
+        np.save(dst, filtered)
+    else:
+        save_image(filtered, dst)
+
+
+def _run_task(task, src, dst):
+    '''
+    Run task on file, catching errors.
+
+    The task writes to a temporary file next to the output file, which only
+    replaces the output file once the task succeeds, so that failed or
+    interrupted jobs never leave an output file that looks up to date.
+
+    Parameters
+    ----------
+    task : callable function
+        Task taking paths to source & output files.
+
+    src : str
+        Path to source file.
+
+    dst : str
+        Path to output file.
+
+    Returns
+    -------
+    error : str or None
+        Error message, if task failed.
+    '''
+
+    # keep extension, which selects output format
+    head, tail = os.path.split(dst)
+    root, extension = os.path.splitext(tail)
+    tmp = os.path.join(head, '.%s.%d.tmp%s' % (root, os.getpid(), extension))
+
+    try:
+        os.makedirs(head or '.', exist_ok=True)
+        task(src, tmp)
+        os.replace(tmp, dst)
+    except Exception as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+        return '%s: %s' % (type(e).__name__, e)
+
+    return None
+
+
+def run_batch(task, jobs, workers=None, force=False, log=None):
+    '''
+    Run task on batch of files in a pool of worker processes.
+
+    Parameters
+    ----------
+    task : callable function
+        Task taking paths to source & output files. Unless worker processes
+        are forked, it must be picklable.
+
+    jobs : list
+        Paths to source & output file of each job.
+
+    workers : int, optional
+        Number of worker processes. If ``1``, jobs are run in the calling
+        process. By default, one worker process is used per CPU.
+
+    force : bool, optional
+        Indicates whether or not to run jobs whose output file is up to date.
+
+    log : file object, optional
+        Text file to report progress to. By default, progress is reported to
+        ``sys.stderr``.
+
+    Returns
+    -------
+    failed : list
+        Paths to source files of failed jobs.
+    '''
+
+    if workers is not None and workers < 1:
+        raise ValueError('`workers` must be a positive integer')
+
+    if log is None:
+        log = sys.stderr
+
+    # skip jobs whose output file is newer than their source file
+    pending = [
+        (src, dst)
+        for src, dst in jobs
+        if force or not _is_up_to_date(src, dst)
+    ]
+    skipped = len(jobs) - len(pending)
+    failed = []
+    start = time.perf_counter()
+
+    def report(done, src, dst, error):
+        if error is None:
+            print(
+                '[%d/%d] %s -> %s' % (done, len(pending), src, dst), file=log
+            )
+        else:
+            failed.append(src)
+            print(
+                '[%d/%d] %s failed: %s' % (done, len(pending), src, error),
+                file=log,
+            )
+
+    if workers == 1:
+        for done, (src, dst) in enumerate(pending, start=1):
+            report(done, src, dst, _run_task(task, src, dst))
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_run_task, task, src, dst): (src, dst)
+                for src, dst in pending
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                # worker processes that die, such as when killed for lack of
+                # memory, fail their own & all pending jobs
+                try:
+                    error = future.result()
+                except Exception as e:
+                    error = '%s: %s' % (type(e).__name__, e)
+
+                report(done, *futures[future], error)
+
+    # report throughput
+    elapsed = time.perf_counter() - start
+    processed = len(pending) - len(failed)
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    message = '%d processed, %d skipped, %d failed ' % (
+        processed,
+        skipped,
+        len(failed),
+    )
+    message += 'in %.2f s (%.2f images/s)' % (elapsed, rate)
+    print(message, file=log)
+
+    return failed
+
+
+def _build_parser():
+    '''
+    Build parser of command-line arguments.
+
+    Returns
+    -------
+    parser : ``argparse.ArgumentParser`` object
+        Command-line argument parser.
+    '''
+
+    parser = argparse.ArgumentParser(
+        prog='openchroma',
+        description='Convert or filter batches of images.',
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        'sources',
+        nargs='+',
+        help='image files, directories or glob patterns',
+    )
+    common.add_argument(
+        '-o',
+        '--output',
+        required=True,
+        help='output directory',
+    )
+    common.add_argument(
+        '-j',
+        '--workers',
+        type=int,
+        default=None,
+        help='number of worker processes (default: number of CPUs)',
+    )
+    common.add_argument(
+        '-f',
+        '--force',
+        action='store_true',
+        help='overwrite output files that are up to date',
+    )
+
+    convert = subparsers.add_parser(
+        'convert',
+        parents=[common],
+        help='convert images from RGB space to CMYK space',
+    )
+    convert.add_argument(
+        '--format',
+        choices=('tif', 'npy'),
+        default='tif',
+        help='output file format (default: tif)',
+    )
+    convert.add_argument(
+        '--precision',
+        type=int,
+        default=2,
+        help='number of decimal places of CMYK values (default: 2)',
+    )
+
+    filter_ = subparsers.add_parser(
+        'filter',
+        parents=[common],
+        help='perform sliding window operation on each channel of images',
+    )
+    filter_.add_argument(
+        '-w',
+        '--window',
+        type=int,
+        nargs=2,
+        required=True,
+        metavar=('HEIGHT', 'WIDTH'),
+        help='shape of window',
+    )
+    filter_.add_argument(
+        '--op',
+        choices=sorted(FILTER_OPS),
+        default='mean',
+        help='operation to perform on each window (default: mean)',
+    )
+    filter_.add_argument(
+        '--edges',
+        action='store_true',
+        help='cover edges of images using smaller windows',
+    )
+    filter_.add_argument(
+        '--format',
+        default=None,
+        help='output file extension (default: extension of source file)',
+    )
+
+    return parser
+
+
+def main(argv=None):
+    '''
+    Run command-line interface.
+
+    Parameters
+    ----------
+    argv : list, optional
+        Command-line arguments. By default, ``sys.argv`` is used.
+
+    Returns
+    -------
+    status : int
+        Exit status, which is ``1`` if any file failed, otherwise ``0``.
+    '''
+
+    args = _build_parser().parse_args(argv)
+
+    if args.command == 'convert':
+        task = functools.partial(_convert_file, precision=args.precision)
+    else:
+        task = functools.partial(
+            _filter_file,
+            window=tuple(args.window),
+            op=args.op,
+            edges=args.edges,
+        )
+
+    # map sources to output files
+    jobs = []
+    for src, relpath in _find_sources(args.sources):
+        root, extension = os.path.splitext(relpath)
+        if args.format is not None:
+            extension = '.' + args.format
+        jobs.append((src, os.path.join(args.output, root + extension)))
+
+    if not jobs:
+        print('no image files found', file=sys.stderr)
+        return 1
+
+    # refuse to write several source files to the same output file
+    sources = {}
+    for src, dst in jobs:
+        if dst in sources:
+            message = '%s and %s both map to %s' % (sources[dst], src, dst)
+            print(message, file=sys.stderr)
+            return 1
+
+        sources[dst] = src
+
+    failed = run_batch(task, jobs, workers=args.workers, force=args.force)
+
+    return 1 if failed else 0
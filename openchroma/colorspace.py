@@ -1,130 +1,1444 @@
+import threading
+from collections import deque
+
 import numpy as np
 
-from .utils import require_array_like, require_axis_size
-from .constants import RGB_SHAPE, RGB_RANGE, CMYK_SHAPE, CMYK_RANGE
+from .utils import _scratch_array, validate_array, validate_out
+from .parallel import _thread_map
+from .profiling import profiled, record_path
+from .constants import (
+    RGB_SHAPE,
+    RGB_RANGE,
+    RGB16_RANGE,
+    CMYK_SHAPE,
+    CMYK_RANGE,
+    HSV_SHAPE,
+    HSV_RANGE,
+    YCBCR_SHAPE,
+    YCBCR_RANGE,
+    GRAY_SHAPE,
+    GRAY_RANGE,
+    LAB_SHAPE,
+    LAB_RANGE,
+)
+
+# maximum number of colours held in cache of converted 8-bit colours
+COLOR_CACHE_SIZE = 2**16
+# minimum number of 8-bit pixels converted through colour cache
+COLOR_CACHE_MIN_PIXELS = 2**10
+# minimum number of pixels to find unique colours with lookup table
+COLOR_TABLE_MIN_PIXELS = 2**16
+
+# cached colours of each precision & data type of values, as sorted packed
+# keys, CMYK values & last use of each colour
+_color_caches = {}
+_color_cache_lock = threading.Lock()
+_color_cache_tick = 0
+
+# number of pixels converted at once along conversion paths
+CONVERT_BLOCK_SIZE = 2**13
+# approximate number of pixels of each chunk converted from RGB to CMYK space
+# & back, whose temporaries fit in the cache of a core
+CONVERT_CHUNK_SIZE = 2**14
+
+# luma weights of RGB channels, as in ITU-R BT.601
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114])
+# rows of matrix from RGB space to chroma channels of YCbCr space
+_CHROMA_WEIGHTS = np.array(
+    [
+        [-0.168736, -0.331264, 0.5],
+        [0.5, -0.418688, -0.081312],
+    ]
+)
+# matrix from YCbCr space, without offsets, to RGB space
+_YCBCR_INVERSE = np.array(
+    [
+        [1.0, 0.0, 1.402],
+        [1.0, -0.344136, -0.714136],
+        [1.0, 1.772, 0.0],
+    ]
+)
+# matrix from linear sRGB values to CIE XYZ space, under D65 illuminant
+_XYZ_MATRIX = np.array(
+    [
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ]
+)
+_XYZ_INVERSE = np.linalg.inv(_XYZ_MATRIX)
+# CIE XYZ values of white point
+_XYZ_WHITE = _XYZ_MATRIX.sum(axis=1)
+# breakpoint of CIE Lab companding function
+_LAB_EPSILON = 6 / 29
+
+
+def _channels_last_pixels(result, **kwargs):
+    return result.size // result.shape[-1]
+
+
+def _float_dtype(dtype):
+    '''
+    Validate data type of converted values & get data type they are computed
+    in.
+
+    Parameters
+    ----------
+    dtype : type
+        Data type of converted values, either ``numpy.float64``,
+        ``numpy.float32`` or ``numpy.float16``.
+
+    Returns
+    -------
+    dtype : numpy.dtype
+        Data type of converted values.
+
+    compute_dtype : numpy.dtype
+        Data type values are computed in. Half precision values are only
+        stored, and computed in single precision.
+    '''
+
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float16, np.float32, np.float64):
+        message = '`dtype` must be numpy.float16, numpy.float32 or '
+        message += 'numpy.float64'
+        raise ValueError(message)
+
+    if dtype == np.float16:
+        return dtype, np.dtype(np.float32)
+
+    return dtype, dtype
+
+
+def _clip(arr, value_range, name, dtype=np.float64):
+    '''
+    Truncate values of array to range, without converting integer arrays to
+    floating point.
+
+    Parameters
+    ----------
+    arr : array-like
+        Input array.
+
+    value_range : tuple
+        Minimum & maximum values.
+
+    name : str
+        Name of scratch buffer non-integer arrays are truncated into.
+
+    dtype : type, optional
+        Floating point data type non-integer arrays are converted to.
+
+    Returns
+    -------
+    clipped : numpy.ndarray
+        Truncated array. Integer arrays keep their data type, and are not
+        copied if their data type cannot hold values out of range. Other
+        arrays are converted to ``dtype`` in a scratch buffer.
+    '''
+
+    arr = np.asarray(arr)
+    if arr.dtype.kind not in 'iu':
+        clipped = _scratch_array(name, arr.shape, dtype)
+        if arr.dtype != clipped.dtype:
+            np.copyto(clipped, arr, casting='unsafe')
+            arr = clipped
+
+        return np.clip(arr, *value_range, out=clipped)
+
+    info = np.iinfo(arr.dtype)
+    if value_range[0] <= info.min and info.max <= value_range[1]:
+        return arr
+
+    return np.clip(arr, *value_range)
+
+
+def _chunk_rows(shape):
+    '''
+    Split leading axis of array into chunks of about ``CONVERT_CHUNK_SIZE``
+    pixels.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of array, without channel axis.
+
+    Returns
+    -------
+    chunks : list
+        Index of each chunk, in order.
+    '''
+
+    if len(shape) == 0:
+        return [Ellipsis]
+
+    row_size = max(int(np.prod(shape[1:], dtype=np.int64)), 1)
+    step = max(CONVERT_CHUNK_SIZE // row_size, 1)
+
+    return [slice(start, start + step) for start in range(0, shape[0], step)]
+
+
+def _check_workers(workers):
+    '''
+    Validate number of threads & record threaded code path.
+
+    Parameters
+    ----------
+    workers : int or None
+        Number of threads.
+    '''
+
+    if workers is not None and workers < 1:
+        raise ValueError('`workers` must be a positive integer')
+
+    if workers is not None and workers > 1:
+        record_path('threads')
 
 
-def _RGB_to_CMYK(rgb, precision=2):
+def _RGB_to_CMYK_block(rgb, maximum=RGB_RANGE[1], dtype=None, out=None):
     '''
-    Convert array from RGB space to CMYK space values.
+    Convert block of truncated RGB values on the last axis to unrounded CMYK
+    values.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        Input array in RGB space, with values between 0 and ``maximum``.
+
+    maximum : int, optional
+        Maximum RGB value.
+
+    dtype : type, optional
+        Floating point data type values are computed in. By default, values
+        are computed in the data type of ``rgb``.
+
+    out : numpy.ndarray, optional
+        Array of data type ``dtype`` to store CMYK values in.
+
+    Returns
+    -------
+    cmyk : numpy.ndarray
+        Output array in CMYK space.
+    '''
+
+    if dtype is None:
+        dtype = rgb.dtype
+
+    # compute K channel from brightest RGB channel, comparing channels
+    # pairwise rather than reducing short channel axis
+    shape = rgb.shape[:-1] + (1,)
+    k = _scratch_array('RGB_to_CMYK.k', shape, dtype)
+    np.maximum(rgb[..., :1], rgb[..., 1:2], out=k)
+    np.maximum(k, rgb[..., 2:], out=k)
+    np.divide(k, maximum, out=k)
+    np.subtract(1, k, out=k)
+    # guard against division by zero for pure black, whose CMY values are
+    # zero, by raising denominators to the smallest positive value, which no
+    # other denominator is below
+    denominator = _scratch_array('RGB_to_CMYK.denominator', shape, dtype)
+    np.subtract(1, k, out=denominator)
+    np.maximum(denominator, np.finfo(dtype).tiny, out=denominator)
+
+    cmyk = out
+    if cmyk is None:
+        cmyk = np.empty(rgb.shape[:-1] + CMYK_SHAPE, dtype=dtype)
+    cmy = cmyk[..., :3]
+    np.divide(rgb, maximum, out=cmy, dtype=dtype)
+    np.subtract(1, cmy, out=cmy)
+    np.subtract(cmy, k, out=cmy)
+    np.divide(cmy, denominator, out=cmy)
+    np.multiply(cmy, 100, out=cmy)
+    np.multiply(k, 100, out=cmyk[..., 3:])
+
+    return cmyk
+
+
+def _CMYK_to_RGB_block(cmyk, dtype=None, out=None):
+    '''
+    Convert block of truncated CMYK values on the last axis to unrounded RGB
+    values.
+
+    Parameters
+    ----------
+    cmyk : numpy.ndarray
+        Input array in CMYK space, with values between 0 and 100.
+
+    dtype : type, optional
+        Floating point data type values are computed in. By default, values
+        are computed in the data type of ``cmyk``.
+
+    out : numpy.ndarray, optional
+        Array of data type ``dtype`` to store RGB values in.
+
+    Returns
+    -------
+    rgb : numpy.ndarray
+        Output array in RGB space.
+    '''
+
+    if dtype is None:
+        dtype = cmyk.dtype
+
+    rgb = out
+    if rgb is None:
+        rgb = np.empty(cmyk.shape[:-1] + RGB_SHAPE, dtype=dtype)
+
+    np.divide(cmyk[..., :3], 100, out=rgb, dtype=dtype)
+    np.subtract(1, rgb, out=rgb)
+    white = _scratch_array('CMYK_to_RGB.white', cmyk.shape[:-1] + (1,), dtype)
+    np.divide(cmyk[..., 3:], 100, out=white, dtype=dtype)
+    np.subtract(1, white, out=white)
+    np.multiply(rgb, white, out=rgb)
+    np.multiply(rgb, 255, out=rgb)
+
+    return rgb
+
+
+def _RGB_to_CMYK_chunk(rgb, out, precision, compute_dtype, bit_depth=8):
+    '''
+    Convert chunk of array from RGB space to CMYK space values on the last
+    axis.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        Input array in RGB space.
+
+    out : numpy.ndarray
+        Array to store CMYK values in.
+
+    precision : int
+        Number of decimal places to round values to.
+
+    compute_dtype : numpy.dtype
+        Data type values are computed in.
+
+    bit_depth : int, optional
+        Number of bits of RGB values, either 8 or 16.
+    '''
+
+    # truncate values between 0 and largest value of bit depth
+    value_range = RGB16_RANGE if bit_depth == 16 else RGB_RANGE
+    rgb = _clip(rgb, value_range, 'RGB_to_CMYK.rgb', dtype=compute_dtype)
+    maximum = value_range[1]
+
+    # convert to CMYK space, in output array unless it is of other data type
+    cmyk = out
+    if out.dtype != compute_dtype:
+        cmyk = _scratch_array('RGB_to_CMYK.cmyk', out.shape, compute_dtype)
+
+    _RGB_to_CMYK_block(rgb, maximum=maximum, dtype=compute_dtype, out=cmyk)
+
+    # round values and truncate negative values to 0
+    np.round(cmyk, precision, out=cmyk)
+    np.maximum(cmyk, 0, out=cmyk)
+
+    if cmyk is not out:
+        out[...] = cmyk
+
+
+def _RGB_to_CMYK(
+    rgb,
+    precision=2,
+    cache=True,
+    dtype=np.float64,
+    out=None,
+    workers=None,
+    bit_depth=8,
+):
+    '''
+    Convert array from RGB space to CMYK space values on the last axis, using
+    whole-array operations on chunks of array.
 
     Parameters
     ----------
     rgb : array-like
-        1D input array in RGB space.
+        Input array in RGB space, of any leading shape.
 
     precision : int, optional
         Number of decimal places to round values to.
 
+    cache : bool, optional
+        Indicates whether or not to convert arrays of data type
+        ``numpy.uint8`` through the colour cache.
+
+    dtype : type, optional
+        Data type of CMYK values, either ``numpy.float64``, ``numpy.float32``
+        or ``numpy.float16``.
+
+    out : numpy.ndarray, optional
+        Array of data type ``dtype`` to store CMYK values in.
+
+    workers : int, optional
+        Number of threads converting chunks of array.
+
+    bit_depth : int, optional
+        Number of bits of RGB values, 8 for values between 0 and 255, or 16
+        for values between 0 and 65535.
+
+    Returns
+    -------
+    cmyk : numpy.ndarray
+        Output array in CMYK space.
+    '''
+
+    if bit_depth not in (8, 16):
+        raise ValueError('`bit_depth` must be 8 or 16')
+
+    dtype, compute_dtype = _float_dtype(dtype)
+    rgb = np.asarray(rgb)
+    if (
+        cache
+        and bit_depth == 8
+        and rgb.dtype == np.uint8
+        and rgb.size >= COLOR_CACHE_MIN_PIXELS * RGB_SHAPE[-1]
+    ):
+        record_path('color_cache')
+        return _cached_RGB_to_CMYK(
+            rgb,
+            precision=precision,
+            dtype=dtype,
+            out=out,
+            workers=workers,
+        )
+
+    record_path('whole_array')
+
+    if out is None:
+        out = np.empty(rgb.shape[:-1] + CMYK_SHAPE, dtype=dtype)
+
+    # convert chunks small enough for their temporaries to stay in cache
+    _thread_map(
+        lambda rows: _RGB_to_CMYK_chunk(
+            rgb[rows],
+            out[rows],
+            precision,
+            compute_dtype,
+            bit_depth=bit_depth,
+        ),
+        _chunk_rows(rgb.shape[:-1]),
+        workers=workers,
+    )
+
+    return out
+
+
+def _pack_colors(rgb, out=None):
+    '''
+    Pack 8-bit RGB values on the last axis into 24-bit keys.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        Input array in RGB space, of data type ``numpy.uint8``.
+
+    out : numpy.ndarray, optional
+        Integer array of at least 32 bits to store keys in.
+
+    Returns
+    -------
+    keys : numpy.ndarray
+        Array of keys, of data type ``numpy.uint32`` unless stored in
+        ``out``.
+    '''
+
+    if out is None:
+        keys = rgb[..., 0].astype(np.uint32)
+    else:
+        keys = out
+        np.copyto(keys, rgb[..., 0])
+
+    keys <<= 8
+    keys |= rgb[..., 1]
+    keys <<= 8
+    keys |= rgb[..., 2]
+
+    return keys
+
+
+def _unpack_colors(keys):
+    '''
+    Unpack 24-bit keys into 8-bit RGB values on the last axis.
+
+    Parameters
+    ----------
+    keys : numpy.ndarray
+        Array of keys packed by ``_pack_colors``.
+
+    Returns
+    -------
+    rgb : numpy.ndarray
+        Array in RGB space, of data type ``numpy.uint8``.
+    '''
+
+    return np.stack((keys >> 16, keys >> 8, keys), axis=-1).astype(np.uint8)
+
+
+def _unique_colors(keys, workers=None):
+    '''
+    Find unique colours of array of packed keys.
+
+    Parameters
+    ----------
+    keys : numpy.ndarray
+        Array of keys packed by ``_pack_colors``.
+
+    workers : int, optional
+        Number of threads processing chunks of keys.
+
+    Returns
+    -------
+    unique : numpy.ndarray
+        Sorted unique keys, of data type ``numpy.uint32``.
+
+    inverse : numpy.ndarray
+        Index of each key in ``unique``, of the shape of ``keys`` & data type
+        ``numpy.intp`` so that indexing with it does not convert it.
+    '''
+
+    if keys.size < COLOR_TABLE_MIN_PIXELS:
+        unique, inverse = np.unique(keys, return_inverse=True)
+        return unique.astype(np.uint32), inverse.reshape(keys.shape)
+
+    # mark colours present in lookup table over all 24-bit keys, in linear
+    # time instead of sorting keys
+    chunks = _chunk_rows(keys.shape)
+    present = np.zeros(1 << 24, dtype=bool)
+
+    def mark(rows):
+        present[keys[rows]] = True
+
+    _thread_map(mark, chunks, workers=workers)
+    unique = np.flatnonzero(present).astype(np.uint32)
+
+    index = np.empty(1 << 24, dtype=np.int32)
+    index[unique] = np.arange(unique.size, dtype=np.int32)
+    positions = _scratch_array('unique_colors.positions', keys.shape, np.int32)
+    inverse = _scratch_array('unique_colors.inverse', keys.shape, np.intp)
+
+    def find(rows):
+        np.take(index, keys[rows], out=positions[rows], mode='clip')
+        np.copyto(inverse[rows], positions[rows])
+
+    _thread_map(find, chunks, workers=workers)
+
+    return unique, inverse
+
+
+def _cache_lookup(unique, precision, dtype=np.float64):
+    '''
+    Look up converted colours in colour cache, marking them as used.
+
+    Parameters
+    ----------
+    unique : numpy.ndarray
+        Sorted unique keys packed by ``_pack_colors``.
+
+    precision : int
+        Number of decimal places values are rounded to.
+
+    dtype : type, optional
+        Data type values are computed in.
+
     Returns
     -------
     cmyk : numpy.ndarray
-        1D output array in CMYK space.
+        2D array of CMYK values of cached colours.
+
+    hit : numpy.ndarray
+        Boolean array indicating which colours are cached.
+    '''
+
+    global _color_cache_tick
+
+    cache_key = (precision, np.dtype(dtype))
+    cmyk = np.empty(unique.shape + CMYK_SHAPE, dtype=dtype)
+    hit = np.zeros(unique.shape, dtype=bool)
+
+    with _color_cache_lock:
+        _color_cache_tick += 1
+        if cache_key not in _color_caches:
+            return cmyk, hit
+
+        keys, values, used = _color_caches[cache_key]
+
+        pos = np.minimum(np.searchsorted(keys, unique), keys.size - 1)
+        hit = keys[pos] == unique
+        pos = pos[hit]
+
+        cmyk[hit] = values[pos]
+        used[pos] = _color_cache_tick
+
+    return cmyk, hit
+
+
+def _cache_insert(unique, cmyk, precision):
     '''
+    Insert converted colours into colour cache, evicting least recently used
+    colours beyond ``COLOR_CACHE_SIZE`` colours.
 
-    # truncate values between 0 and 255
-    rgb = np.array(rgb, dtype=np.float64)
-    for i in range(RGB_SHAPE[0]):
-        rgb[i] = max(rgb[i], RGB_RANGE[0])
-        rgb[i] = min(rgb[i], RGB_RANGE[1])
+    Parameters
+    ----------
+    unique : numpy.ndarray
+        Sorted unique keys packed by ``_pack_colors``.
+
+    cmyk : numpy.ndarray
+        2D array of CMYK values of colours, cached by their data type.
 
-    # convert to CMYK space
-    k = 1 - (np.max(rgb) / 255)
-    cmyk = np.zeros(CMYK_SHAPE, dtype=np.float64)
-    for i in range(CMYK_SHAPE[0]):
-        if i < 3:
-            val = ((1 - (rgb[i] / 255) - k) / (1 - k)) * 100
+    precision : int
+        Number of decimal places values are rounded to.
+    '''
+
+    cache_key = (precision, cmyk.dtype)
+    with _color_cache_lock:
+        if cache_key in _color_caches:
+            keys, values, used = _color_caches[cache_key]
         else:
-            val = k * 100
+            keys = np.empty(0, dtype=np.uint32)
+            values = np.empty((0,) + CMYK_SHAPE, dtype=cmyk.dtype)
+            used = np.empty(0, dtype=np.int64)
 
-        cmyk[i] = max(round(val, precision), 0)
+        # skip colours inserted by other threads since lookup
+        if keys.size > 0:
+            pos = np.minimum(np.searchsorted(keys, unique), keys.size - 1)
+            new = keys[pos] != unique
+            unique, cmyk = unique[new], cmyk[new]
 
-    return cmyk
+        unique = unique[:COLOR_CACHE_SIZE]
+        cmyk = cmyk[:COLOR_CACHE_SIZE]
+
+        # evict least recently used colours
+        excess = keys.size + unique.size - COLOR_CACHE_SIZE
+        if excess > 0:
+            keep = np.sort(np.argsort(used, kind='stable')[excess:])
+            keys, values, used = keys[keep], values[keep], used[keep]
+
+        # merge colours, keeping keys sorted
+        keys = np.concatenate((keys, unique))
+        order = np.argsort(keys, kind='stable')
+        values = np.concatenate((values, cmyk))[order]
+        used = np.concatenate(
+            (used, np.full(unique.size, _color_cache_tick, dtype=np.int64))
+        )[order]
+        _color_caches[cache_key] = (keys[order], values, used)
+
+
+def _cached_RGB_to_CMYK(
+    rgb,
+    precision=2,
+    dtype=np.float64,
+    out=None,
+    workers=None,
+):
+    '''
+    Convert 8-bit array from RGB space to CMYK space values on the last axis,
+    converting each unique colour once.
+
+    Colours are packed into 24-bit keys, and converted colours are kept in a
+    cache shared across calls, so that only colours not seen recently are
+    converted. Arrays in which most pixels have unique colours are converted
+    directly.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        Input array in RGB space, of data type ``numpy.uint8``.
+
+    precision : int, optional
+        Number of decimal places to round values to.
+
+    dtype : type, optional
+        Data type of CMYK values.
+
+    out : numpy.ndarray, optional
+        Array of data type ``dtype`` to store CMYK values in.
+
+    workers : int, optional
+        Number of threads processing chunks of array.
+
+    Returns
+    -------
+    cmyk : numpy.ndarray
+        Output array in CMYK space.
+    '''
+
+    dtype, compute_dtype = _float_dtype(dtype)
+    chunks = _chunk_rows(rgb.shape[:-1])
+    keys = _scratch_array('pack_colors.keys', rgb.shape[:-1], np.intp)
+    _thread_map(
+        lambda rows: _pack_colors(rgb[rows], out=keys[rows]),
+        chunks,
+        workers=workers,
+    )
+
+    # convert arrays of mostly unique colours directly, judging by a sample
+    sample = keys.ravel()[:: max(keys.size // COLOR_TABLE_MIN_PIXELS, 1)]
+    if 4 * np.unique(sample).size > 3 * sample.size:
+        record_path('mostly_unique')
+        return _RGB_to_CMYK(
+            rgb,
+            precision=precision,
+            cache=False,
+            dtype=dtype,
+            out=out,
+            workers=workers,
+        )
+
+    unique, inverse = _unique_colors(keys, workers=workers)
+
+    # convert colours missing from cache
+    colors, hit = _cache_lookup(unique, precision, dtype=compute_dtype)
+    miss = ~hit
+    if miss.any():
+        converted = _RGB_to_CMYK(
+            _unpack_colors(unique[miss]),
+            precision=precision,
+            cache=False,
+            dtype=compute_dtype,
+        )
+        colors[miss] = converted
+        _cache_insert(unique[miss], converted, precision)
+
+    # scatter colours back to pixels, in data type of CMYK values
+    colors = colors.astype(dtype, copy=False)
+    if out is None:
+        out = np.empty(rgb.shape[:-1] + CMYK_SHAPE, dtype=dtype)
+
+    _thread_map(
+        lambda rows: np.take(
+            colors,
+            inverse[rows],
+            axis=0,
+            out=out[rows],
+            mode='clip',
+        ),
+        chunks,
+        workers=workers,
+    )
+
+    return out
+
+
+def clear_color_cache():
+    '''
+    Clear cache of colours converted from 8-bit RGB space to CMYK space.
+    '''
 
+    with _color_cache_lock:
+        _color_caches.clear()
 
-def RGB_to_CMYK(rgb, precision=2):
+
+@profiled(pixels=_channels_last_pixels)
+def RGB_to_CMYK(
+    rgb,
+    precision=2,
+    cache=True,
+    dtype=np.float64,
+    out=None,
+    workers=None,
+    bit_depth=8,
+):
     '''
     Convert array from RGB space to CMYK space values on the last axis.
 
     Parameters
     ----------
     rgb : array-like
-        Input array in RGB space.
+        Input array in RGB space. Integer arrays are not converted to floating
+        point before conversion.
 
     precision : int, optional
         Number of decimal places to round values to.
 
+    cache : bool, optional
+        Indicates whether or not to convert each unique colour of arrays of
+        data type ``numpy.uint8`` once. Converted colours are kept in a cache
+        of up to ``COLOR_CACHE_SIZE`` least recently used colours shared
+        across calls, which can be cleared with ``clear_color_cache``. The
+        output is identical either way.
+
+    dtype : type, optional
+        Data type of CMYK values, either ``numpy.float64``, ``numpy.float32``
+        or ``numpy.float16``. Single precision values differ from double
+        precision values by at most ``10**-precision``, as values may be
+        rounded the other way, plus one unit in the last place of single
+        precision values up to 100, about ``7.6e-6``. Half precision values
+        are computed in single precision and only stored in half precision,
+        which holds CMYK values within 0.032 of single precision values and so
+        within 0.042 of double precision values at the default precision.
+
+    out : numpy.ndarray, optional
+        Array to store CMYK values in, instead of allocating a new array, of
+        shape ``rgb.shape[:-1] + (4,)`` and data type ``dtype``. Temporaries
+        are kept in scratch buffers of the calling thread, so that repeated
+        conversions of same-sized arrays allocate no large arrays.
+
+    workers : int, optional
+        Number of threads converting the array. The leading axes are split
+        into chunks of about ``CONVERT_CHUNK_SIZE`` pixels, whose temporaries
+        fit in the cache of a core, and chunks are converted on a thread pool
+        shared across calls. The output is identical to the output of a
+        single thread. By default, chunks are converted in the calling
+        thread.
+
+    bit_depth : int, optional
+        Number of bits of RGB values, 8 for values between 0 and 255, or 16
+        for values between 0 and 65535, as in arrays of data type
+        ``numpy.uint16`` opened from 16-bit files. Values are truncated to
+        the range of the bit depth, whatever their data type, so that 16-bit
+        values are only scaled when asked for.
+
     Returns
     -------
     cmyk : numpy.ndarray
-        Output array in CMYK space.
+        Output array in CMYK space, which is ``out`` if given.
     '''
 
-    # check if input is array-like
-    require_array_like(rgb, var_name='rgb')
-    # check if last axis is 3-dimensional
-    require_axis_size(rgb, RGB_SHAPE[-1], -1, var_name='rgb')
+    # check if input is array-like & last axis is 3-dimensional
+    rgb = validate_array(rgb, axis_sizes={-1: RGB_SHAPE[-1]}, var_name='rgb')
+    if out is not None:
+        validate_out(out, rgb.shape[:-1] + CMYK_SHAPE, dtype=dtype)
+
+    _check_workers(workers)
 
     # convert to CMYK along last axis
-    return np.apply_along_axis(_RGB_to_CMYK, -1, rgb, precision=precision)
+    return _RGB_to_CMYK(
+        rgb,
+        precision=precision,
+        cache=cache,
+        dtype=dtype,
+        out=out,
+        workers=workers,
+        bit_depth=bit_depth,
+    )
+
+
+def _CMYK_to_RGB_chunk(cmyk, out, precision, compute_dtype):
+    '''
+    Convert chunk of array from CMYK space to RGB space values on the last
+    axis.
+
+    Parameters
+    ----------
+    cmyk : numpy.ndarray
+        Input array in CMYK space.
+
+    out : numpy.ndarray
+        Array to store RGB values in.
 
+    precision : int
+        Number of decimal places to round values to.
 
-def _CMYK_to_RGB(cmyk, precision=2):
+    compute_dtype : numpy.dtype
+        Data type values are computed in.
     '''
-    Convert array from CMYK space to RGB space values.
+
+    # truncate values between 0 and 100
+    cmyk = _clip(cmyk, CMYK_RANGE, 'CMYK_to_RGB.cmyk', dtype=compute_dtype)
+
+    # convert to RGB space, in output array unless it is of other data type
+    rgb = out
+    if out.dtype != compute_dtype:
+        rgb = _scratch_array('CMYK_to_RGB.rgb', out.shape, compute_dtype)
+
+    _CMYK_to_RGB_block(cmyk, dtype=compute_dtype, out=rgb)
+
+    # round values and truncate negative values to 0
+    np.round(rgb, precision, out=rgb)
+    np.maximum(rgb, 0, out=rgb)
+
+    if rgb is not out:
+        out[...] = rgb
+
+
+def _CMYK_to_RGB(cmyk, precision=2, dtype=np.float64, out=None, workers=None):
+    '''
+    Convert array from CMYK space to RGB space values on the last axis, using
+    whole-array operations on chunks of array.
 
     Parameters
     ----------
     cmyk : array-like
-        1D input array in CMYK space.
+        Input array in CMYK space, of any leading shape.
 
     precision : int, optional
         Number of decimal places to round values to.
 
+    dtype : type, optional
+        Data type of RGB values, either ``numpy.float64``, ``numpy.float32``
+        or ``numpy.float16``.
+
+    out : numpy.ndarray, optional
+        Array of data type ``dtype`` to store RGB values in.
+
+    workers : int, optional
+        Number of threads converting chunks of array.
+
     Returns
     -------
     rgb : numpy.ndarray
-        1D output array in RGB space.
+        Output array in RGB space.
     '''
 
-    # truncate values between 0 and 100
-    cmyk = np.array(cmyk, dtype=np.float64)
-    for i in range(CMYK_SHAPE[0]):
-        cmyk[i] = max(cmyk[i], CMYK_RANGE[0])
-        cmyk[i] = min(cmyk[i], CMYK_RANGE[1])
-
-    # convert to RGB space
-    rgb = np.zeros(RGB_SHAPE, dtype=np.float64)
-    k = cmyk[3]
-    for i in range(RGB_SHAPE[0]):
-        val = (1 - (cmyk[i] / 100)) * (1 - (k / 100)) * 255
-        rgb[i] = max(round(val, precision), 0)
+    dtype, compute_dtype = _float_dtype(dtype)
+    cmyk = np.asarray(cmyk)
+    if out is None:
+        out = np.empty(cmyk.shape[:-1] + RGB_SHAPE, dtype=dtype)
 
-    return rgb
+    # convert chunks small enough for their temporaries to stay in cache
+    _thread_map(
+        lambda rows: _CMYK_to_RGB_chunk(
+            cmyk[rows],
+            out[rows],
+            precision,
+            compute_dtype,
+        ),
+        _chunk_rows(cmyk.shape[:-1]),
+        workers=workers,
+    )
 
+    return out
 
-def CMYK_to_RGB(cmyk, precision=2):
+
+@profiled(pixels=_channels_last_pixels)
+def CMYK_to_RGB(cmyk, precision=2, dtype=np.float64, out=None, workers=None):
     '''
     Convert array from CMYK space to RGB space values on the last axis.
 
     Parameters
     ----------
     cmyk : array-like
-        Input array in RGB space.
+        Input array in CMYK space. Integer arrays are not converted to
+        floating point before conversion.
 
     precision : int, optional
         Number of decimal places to round values to.
 
+    dtype : type, optional
+        Data type of RGB values, either ``numpy.float64``, ``numpy.float32``
+        or ``numpy.float16``. Single precision values differ from double
+        precision values by at most ``10**-precision``, as values may be
+        rounded the other way, plus one unit in the last place of single
+        precision values up to 255, about ``1.5e-5``. Half precision values
+        are computed in single precision and only stored in half precision,
+        which holds RGB values within 0.063 of single precision values and so
+        within 0.073 of double precision values at the default precision.
+
+    out : numpy.ndarray, optional
+        Array to store RGB values in, instead of allocating a new array, of
+        shape ``cmyk.shape[:-1] + (3,)`` and data type ``dtype``, as in
+        ``RGB_to_CMYK``.
+
+    workers : int, optional
+        Number of threads converting the array, as in ``RGB_to_CMYK``.
+
     Returns
     -------
     rgb : numpy.ndarray
-        Output array in rgb space.
+        Output array in rgb space, which is ``out`` if given.
     '''
 
-    # check if input is array-like
-    require_array_like(cmyk, var_name='cmyk')
-    # check if last axis is 3-dimensional
-    require_axis_size(cmyk, CMYK_SHAPE[-1], -1, var_name='cmyk')
+    # check if input is array-like & last axis is 4-dimensional
+    cmyk = validate_array(
+        cmyk,
+        axis_sizes={-1: CMYK_SHAPE[-1]},
+        var_name='cmyk',
+    )
+    if out is not None:
+        validate_out(out, cmyk.shape[:-1] + RGB_SHAPE, dtype=dtype)
+
+    _check_workers(workers)
 
     # convert to RGB along last axis
-    return np.apply_along_axis(_CMYK_to_RGB, -1, cmyk, precision=precision)
+    return _CMYK_to_RGB(
+        cmyk,
+        precision=precision,
+        dtype=dtype,
+        out=out,
+        workers=workers,
+    )
+
+
+def _RGB_to_HSV_block(rgb):
+    '''
+    Convert block of truncated RGB values on the last axis to unrounded HSV
+    values.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        Input array in RGB space.
+
+    Returns
+    -------
+    hsv : numpy.ndarray
+        Output array in HSV space, with hue in degrees and saturation & value
+        in percent.
+    '''
+
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maximum = np.max(rgb, axis=-1)
+    delta = maximum - np.min(rgb, axis=-1)
+    nonzero = delta != 0
+    # guard against division by zero for grays
+    delta = np.where(nonzero, delta, 1)
+
+    # compute hue from sector of brightest channel
+    hue = np.where(
+        maximum == r,
+        ((g - b) / delta) % 6,
+        np.where(maximum == g, (b - r) / delta + 2, (r - g) / delta + 4),
+    )
+
+    hsv = np.empty(rgb.shape[:-1] + HSV_SHAPE, dtype=rgb.dtype)
+    hsv[..., 0] = np.where(nonzero, hue * 60, 0)
+    hsv[..., 1] = np.where(nonzero, delta * 100 / np.maximum(maximum, 1), 0)
+    np.multiply(maximum, 100 / RGB_RANGE[1], out=hsv[..., 2])
+
+    return hsv
+
+
+def _HSV_to_RGB_block(hsv):
+    '''
+    Convert block of truncated HSV values on the last axis to unrounded RGB
+    values.
+
+    Parameters
+    ----------
+    hsv : numpy.ndarray
+        Input array in HSV space.
+
+    Returns
+    -------
+    rgb : numpy.ndarray
+        Output array in RGB space.
+    '''
+
+    hue = hsv[..., :1] / 60
+    saturation = hsv[..., 1:2] / 100
+    value = hsv[..., 2:] * (RGB_RANGE[1] / 100)
+
+    # position of red, green & blue channels relative to hue
+    k = (np.array([5, 3, 1], dtype=hue.dtype) + hue) % 6
+    weight = np.clip(np.minimum(k, 4 - k), 0, 1)
+
+    return value - value * saturation * weight
+
+
+def _RGB_to_YCbCr_block(rgb):
+    '''
+    Convert block of truncated RGB values on the last axis to unrounded
+    full-range YCbCr values, as in JPEG files.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        Input array in RGB space.
+
+    Returns
+    -------
+    ycbcr : numpy.ndarray
+        Output array in YCbCr space.
+    '''
+
+    ycbcr = np.empty(rgb.shape[:-1] + YCBCR_SHAPE, dtype=rgb.dtype)
+    np.matmul(rgb, _LUMA_WEIGHTS.astype(rgb.dtype), out=ycbcr[..., 0])
+    np.matmul(rgb, _CHROMA_WEIGHTS.T.astype(rgb.dtype), out=ycbcr[..., 1:])
+    ycbcr[..., 1:] += 128
+
+    return ycbcr
+
+
+def _YCbCr_to_RGB_block(ycbcr):
+    '''
+    Convert block of truncated full-range YCbCr values on the last axis to
+    unrounded RGB values.
+
+    Parameters
+    ----------
+    ycbcr : numpy.ndarray
+        Input array in YCbCr space.
+
+    Returns
+    -------
+    rgb : numpy.ndarray
+        Output array in RGB space.
+    '''
+
+    ycbcr = ycbcr - np.array([0, 128, 128], dtype=ycbcr.dtype)
+
+    return ycbcr @ _YCBCR_INVERSE.T.astype(ycbcr.dtype)
+
+
+def _RGB_to_GRAY_block(rgb):
+    '''
+    Convert block of truncated RGB values on the last axis to unrounded
+    grayscale values.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        Input array in RGB space.
+
+    Returns
+    -------
+    gray : numpy.ndarray
+        Output array in grayscale space, holding luma of RGB values.
+    '''
+
+    return rgb @ _LUMA_WEIGHTS[:, np.newaxis].astype(rgb.dtype)
+
+
+def _GRAY_to_RGB_block(gray):
+    '''
+    Convert block of truncated grayscale values on the last axis to RGB
+    values.
+
+    Parameters
+    ----------
+    gray : numpy.ndarray
+        Input array in grayscale space.
+
+    Returns
+    -------
+    rgb : numpy.ndarray
+        Output array in RGB space.
+    '''
+
+    return np.repeat(gray, RGB_SHAPE[-1], axis=-1)
+
+
+def _YCbCr_to_GRAY_block(ycbcr):
+    '''
+    Convert block of truncated YCbCr values on the last axis to grayscale
+    values.
+
+    Parameters
+    ----------
+    ycbcr : numpy.ndarray
+        Input array in YCbCr space.
+
+    Returns
+    -------
+    gray : numpy.ndarray
+        Output array in grayscale space, holding luma channel.
+    '''
+
+    return ycbcr[..., :1].copy()
+
+
+def _RGB_to_LAB_block(rgb):
+    '''
+    Convert block of truncated sRGB values on the last axis to unrounded CIE
+    L*a*b* values, under D65 illuminant.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        Input array in RGB space.
+
+    Returns
+    -------
+    lab : numpy.ndarray
+        Output array in CIE L*a*b* space.
+    '''
+
+    # linearize sRGB values
+    linear = rgb / RGB_RANGE[1]
+    low = linear <= 0.04045
+    linear = np.where(
+        low,
+        linear / 12.92,
+        ((linear + 0.055) / 1.055) ** 2.4,
+    )
+
+    # convert to CIE XYZ space relative to white point & compand
+    matrix = (_XYZ_MATRIX / _XYZ_WHITE[:, np.newaxis]).T
+    xyz = linear @ matrix.astype(rgb.dtype)
+    f = np.where(
+        xyz > _LAB_EPSILON**3,
+        np.cbrt(xyz),
+        xyz / (3 * _LAB_EPSILON**2) + 4 / 29,
+    )
+
+    lab = np.empty(rgb.shape[:-1] + LAB_SHAPE, dtype=rgb.dtype)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+
+    return lab
+
+
+def _LAB_to_RGB_block(lab):
+    '''
+    Convert block of truncated CIE L*a*b* values on the last axis to
+    unrounded sRGB values, under D65 illuminant.
+
+    Parameters
+    ----------
+    lab : numpy.ndarray
+        Input array in CIE L*a*b* space.
+
+    Returns
+    -------
+    rgb : numpy.ndarray
+        Output array in RGB space. Colours out of sRGB gamut are not
+        truncated.
+    '''
+
+    f = np.empty(lab.shape, dtype=lab.dtype)
+    f[..., 1] = (lab[..., 0] + 16) / 116
+    f[..., 0] = f[..., 1] + lab[..., 1] / 500
+    f[..., 2] = f[..., 1] - lab[..., 2] / 200
+
+    # invert companding & convert to linear sRGB values
+    xyz = np.where(
+        f > _LAB_EPSILON,
+        f**3,
+        3 * _LAB_EPSILON**2 * (f - 4 / 29),
+    )
+    linear = xyz @ (_XYZ_INVERSE * _XYZ_WHITE).T.astype(lab.dtype)
+
+    # apply sRGB gamma
+    linear = np.maximum(linear, 0)
+    rgb = np.where(
+        linear <= 0.0031308,
+        linear * 12.92,
+        1.055 * linear ** (1 / 2.4) - 0.055,
+    )
+
+    return rgb * RGB_RANGE[1]
+
+
+# value range of each channel of registered colour spaces
+COLOR_SPACES = {
+    'RGB': (RGB_RANGE,) * RGB_SHAPE[-1],
+    'CMYK': (CMYK_RANGE,) * CMYK_SHAPE[-1],
+    'HSV': HSV_RANGE,
+    'YCbCr': (YCBCR_RANGE,) * YCBCR_SHAPE[-1],
+    'GRAY': (GRAY_RANGE,) * GRAY_SHAPE[-1],
+    'LAB': LAB_RANGE,
+}
+
+# block kernels converting between registered colour spaces
+_CONVERSIONS = {
+    ('RGB', 'CMYK'): _RGB_to_CMYK_block,
+    ('CMYK', 'RGB'): _CMYK_to_RGB_block,
+    ('RGB', 'HSV'): _RGB_to_HSV_block,
+    ('HSV', 'RGB'): _HSV_to_RGB_block,
+    ('RGB', 'YCbCr'): _RGB_to_YCbCr_block,
+    ('YCbCr', 'RGB'): _YCbCr_to_RGB_block,
+    ('RGB', 'GRAY'): _RGB_to_GRAY_block,
+    ('GRAY', 'RGB'): _GRAY_to_RGB_block,
+    ('YCbCr', 'GRAY'): _YCbCr_to_GRAY_block,
+    ('RGB', 'LAB'): _RGB_to_LAB_block,
+    ('LAB', 'RGB'): _LAB_to_RGB_block,
+}
+
+
+def register_color_space(name, value_ranges):
+    '''
+    Register colour space in conversion graph.
+
+    Parameters
+    ----------
+    name : str
+        Name of colour space.
+
+    value_ranges : array-like
+        Minimum & maximum value of each channel, to which values are truncated
+        before conversion from the colour space and after conversion to it.
+    '''
+
+    value_ranges = tuple(tuple(value_range) for value_range in value_ranges)
+    if len(value_ranges) == 0 or any(len(r) != 2 for r in value_ranges):
+        message = '`value_ranges` must hold minimum & maximum value '
+        message += 'of each channel'
+        raise ValueError(message)
+
+    COLOR_SPACES[name] = value_ranges
+
+
+def register_conversion(src, dst, kernel):
+    '''
+    Register conversion between colour spaces in conversion graph.
+
+    Parameters
+    ----------
+    src : str
+        Name of registered colour space to convert from.
+
+    dst : str
+        Name of registered colour space to convert to.
+
+    kernel : callable function
+        Function converting 2D ``numpy.float64`` array of truncated values of
+        pixels in ``src`` space to unrounded values in ``dst`` space.
+    '''
+
+    for name in (src, dst):
+        _require_color_space(name)
+
+    _CONVERSIONS[(src, dst)] = kernel
+
+
+def _require_color_space(name):
+    '''
+    Check if colour space is registered.
+
+    Parameters
+    ----------
+    name : str
+        Name of colour space.
+
+    Raises
+    ------
+    ValueError
+        If colour space is not registered.
+    '''
+
+    if name not in COLOR_SPACES:
+        message = f'Unknown colour space `{name}`, '
+        message += 'expected one of ' + ', '.join(COLOR_SPACES)
+        raise ValueError(message)
+
+
+def conversion_path(src, dst):
+    '''
+    Find shortest path of conversions between colour spaces.
+
+    Parameters
+    ----------
+    src : str
+        Name of registered colour space to convert from.
+
+    dst : str
+        Name of registered colour space to convert to.
+
+    Returns
+    -------
+    path : list
+        Names of colour spaces along path, starting with ``src`` and ending
+        with ``dst``.
+    '''
+
+    _require_color_space(src)
+    _require_color_space(dst)
+
+    # breadth-first search over conversions
+    previous = {src: None}
+    queue = deque([src])
+    while queue:
+        space = queue.popleft()
+        if space == dst:
+            break
+
+        for a, b in _CONVERSIONS:
+            if a == space and b not in previous:
+                previous[b] = space
+                queue.append(b)
+
+    if dst not in previous:
+        raise ValueError(f'No conversion path from `{src}` to `{dst}`')
+
+    path = [dst]
+    while previous[path[-1]] is not None:
+        path.append(previous[path[-1]])
+
+    return path[::-1]
+
+
+@profiled(pixels=_channels_last_pixels)
+def convert(img, src, dst, precision=2, dtype=np.float64, out=None):
+    '''
+    Convert array between colour spaces along shortest path of conversions.
+
+    The array is converted in blocks of ``CONVERT_BLOCK_SIZE`` pixels, each
+    block passing through all conversions of the path before the next, so
+    that no intermediate arrays of the size of the input are created. Values
+    are truncated to the value range of each colour space before conversion,
+    and only rounded once converted to ``dst`` space.
+
+    Parameters
+    ----------
+    img : array-like
+        Input array in ``src`` space, with channels on the last axis.
+
+    src : str
+        Name of colour space to convert from, in ``COLOR_SPACES``. Built-in
+        colour spaces are ``'RGB'``, ``'CMYK'``, ``'HSV'`` (hue in degrees,
+        saturation & value in percent), ``'YCbCr'`` (full-range, as in JPEG
+        files), ``'GRAY'`` (single channel of luma values) and ``'LAB'`` (CIE
+        L*a*b* under D65 illuminant).
+
+    dst : str
+        Name of colour space to convert to, in ``COLOR_SPACES``.
+
+    precision : int, optional
+        Number of decimal places to round values to.
+
+    dtype : type, optional
+        Data type of converted values, either ``numpy.float64``,
+        ``numpy.float32`` or ``numpy.float16``. Values are computed in single
+        precision for both of the latter, differing from double precision
+        values by at most ``10**-precision`` plus one unit in the last place
+        of single precision values, and half precision values are
+        only stored, with a relative error of at most ``2**-11``.
+
+    out : numpy.ndarray, optional
+        Array to store converted values in, instead of allocating a new
+        array, of shape ``img.shape[:-1]`` followed by the number of channels
+        of ``dst`` space, and data type ``dtype``.
+
+    Returns
+    -------
+    converted : numpy.ndarray
+        Output array in ``dst`` space, which is ``out`` if given.
+    '''
+
+    dtype, compute_dtype = _float_dtype(dtype)
+    path = conversion_path(src, dst)
+    record_path('->'.join(path))
+    kernels = [_CONVERSIONS[hop] for hop in zip(path[:-1], path[1:])]
+    bounds = [
+        np.array(COLOR_SPACES[space], dtype=compute_dtype).T for space in path
+    ]
+
+    # check if input is array-like & last axis holds channels of source space
+    img = validate_array(
+        img,
+        axis_sizes={-1: len(COLOR_SPACES[src])},
+        var_name='img',
+    )
+    shape = img.shape[:-1] + (len(COLOR_SPACES[dst]),)
+    if out is not None:
+        validate_out(out, shape, dtype=dtype)
+
+    # convert into output array, unless it cannot be viewed as a list of
+    # pixels
+    converted = out
+    if out is None or not out.flags.c_contiguous:
+        converted = np.empty(shape, dtype=dtype)
+
+    pixels = img.reshape(-1, img.shape[-1])
+    converted_pixels = converted.reshape(-1, shape[-1])
+
+    for start in range(0, pixels.shape[0], CONVERT_BLOCK_SIZE):
+        block = pixels[start : start + CONVERT_BLOCK_SIZE]
+        block = block.astype(compute_dtype)
+        # pass block through each conversion, truncating values before each
+        for kernel, (low, high) in zip(kernels, bounds):
+            block = kernel(np.clip(block, low, high, out=block))
+
+        # truncate & round values in data type they were computed in
+        np.clip(block, *bounds[-1], out=block)
+        np.round(block, precision, out=block)
+        # replace negative zeros
+        block += 0.0
+        converted_pixels[start : start + CONVERT_BLOCK_SIZE] = block
+
+    if out is not None and converted is not out:
+        out[...] = converted
+        return out
+
+    return converted
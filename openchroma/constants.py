@@ -2,3 +2,12 @@ RGB_SHAPE = (3,)
 RGB_RANGE = (0, 255)
 CMYK_SHAPE = (4,)
 CMYK_RANGE = (0, 100)
+RGB16_RANGE = (0, 65535)
+HSV_SHAPE = (3,)
+HSV_RANGE = ((0, 360), (0, 100), (0, 100))
+YCBCR_SHAPE = (3,)
+YCBCR_RANGE = (0, 255)
+GRAY_SHAPE = (1,)
+GRAY_RANGE = (0, 255)
+LAB_SHAPE = (3,)
+LAB_RANGE = ((0, 100), (-128, 127), (-128, 127))
@@ -0,0 +1,2695 @@
+import functools
+import math
+
+import numpy as np
+
+from .utils import _scratch_array, require_array_like, require_shape
+from .profiling import record_path
+
+# approximate number of bytes of windowed data reduced at once
+REDUCE_CHUNK_SIZE = 2**25
+# number of output rows sharing one integral image
+SUM_BLOCK_ROWS = 128
+# minimum number of values in window for ranking with running histograms
+RANK_MIN_WINDOW_SIZE = 32
+
+
+def _window_span(size, dilation=1):
+    '''
+    Compute number of elements of an axis spanned by a window.
+
+    Parameters
+    ----------
+    size : int
+        Size of window along axis.
+
+    dilation : int, optional
+        Spacing between elements of window along axis.
+
+    Returns
+    -------
+    span : int
+        Distance from the first element to past the last element of window.
+    '''
+
+    return (size - 1) * dilation + 1
+
+
+def _window_offsets(length, size, edges=False, stride=1, dilation=1):
+    '''
+    Compute offsets of sliding windows along an axis.
+
+    Parameters
+    ----------
+    length : int
+        Length of axis.
+
+    size : int
+        Size of window along axis.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of axis using smaller window.
+
+    stride : int, optional
+        Step between offsets of consecutive windows.
+
+    dilation : int, optional
+        Spacing between elements of window.
+
+    Returns
+    -------
+    offsets : range
+        Offset of the first element of each window. If ``edges`` is ``True``,
+        offsets may lie before the start of the axis.
+    '''
+
+    span = _window_span(size, dilation)
+    if edges:
+        return range(-span + 1, length, stride)
+
+    return range(0, length - span + 1, stride)
+
+
+def _dilation_phases(offsets, dilation):
+    '''
+    Split dilated windows along an axis by the phase of their offsets modulo
+    the dilation. The windows of each phase only cover elements of that
+    phase, so they are undilated windows over every ``dilation``-th element
+    of the axis.
+
+    Parameters
+    ----------
+    offsets : range
+        Offsets of windows along axis.
+
+    dilation : int
+        Spacing between elements of window.
+
+    Returns
+    -------
+    phases : list
+        Tuple of the phase, the slice of windows of that phase & their
+        offsets along the axis subsampled from the phase, for each phase
+        holding any window.
+    '''
+
+    # phases of offsets repeat after every period of windows
+    divisor = math.gcd(offsets.step, dilation)
+    period = dilation // divisor
+    step = offsets.step // divisor
+
+    phases = []
+    for first in range(min(period, len(offsets))):
+        selected = offsets[first::period]
+        phase = selected[0] % dilation
+        start = (selected[0] - phase) // dilation
+        phases.append(
+            (
+                phase,
+                slice(first, None, period),
+                range(start, start + len(selected) * step, step),
+            )
+        )
+
+    return phases
+
+
+def _clip_windows(offsets, size, length):
+    '''
+    Clip windows to the bounds of an axis.
+
+    Parameters
+    ----------
+    offsets : array-like
+        Offset of the first element of each window.
+
+    size : int
+        Size of window along axis.
+
+    length : int
+        Length of axis.
+
+    Returns
+    -------
+    start : numpy.ndarray
+        Index of the first element of each clipped window.
+
+    stop : numpy.ndarray
+        Index past the last element of each clipped window.
+    '''
+
+    offsets = np.asarray(offsets, dtype=np.intp)
+    start = np.clip(offsets, 0, length)
+    stop = np.clip(offsets + size, 0, length)
+
+    return start, stop
+
+
+def _disjoint_reduce(arr, start, stop, ufunc, axis=0, dtype=None):
+    '''
+    Reduce disjoint windows along an axis of array, visiting each element
+    covered by windows once.
+
+    Parameters
+    ----------
+    arr : numpy.ndarray
+        Array to be reduced.
+
+    start : numpy.ndarray
+        Index of the first element of each window, in increasing order.
+
+    stop : numpy.ndarray
+        Index past the last element of each window, no larger than the start
+        of the next window. Windows must not be empty.
+
+    ufunc : numpy.ufunc
+        Ufunc to reduce with, such as ``np.add`` or ``np.maximum``.
+
+    axis : int, optional
+        Axis to reduce along.
+
+    dtype : type, optional
+        Data type to reduce in.
+
+    Returns
+    -------
+    reduced : numpy.ndarray
+        Array of reduced windows along the given axis.
+    '''
+
+    if dtype is None:
+        dtype = arr.dtype
+
+    # reduce along innermost axis of memory between consecutive starts &
+    # stops, dropping a final stop past the end of the axis, and keep
+    # reductions starting at starts
+    if abs(arr.strides[axis]) == min(abs(stride) for stride in arr.strides):
+        indices = np.stack((start, stop), axis=-1).ravel()
+        if indices[-1] == arr.shape[axis]:
+            indices = indices[:-1]
+
+        reduced = ufunc.reduceat(arr, indices, axis=axis, dtype=dtype)
+
+        return reduced[(slice(None),) * axis + (slice(None, None, 2),)]
+
+    # reduce along outer axes one element of all windows at a time, which
+    # streams through contiguous runs of memory
+    counts = stop - start
+    shape = (-1,) + (1,) * (arr.ndim - axis - 1)
+    reduced = np.take(arr, start, axis=axis).astype(dtype, copy=False)
+    for k in range(1, int(counts.max())):
+        inside = (counts > k).reshape(shape)
+        ufunc(
+            reduced,
+            np.take(arr, start + k, axis=axis, mode='clip'),
+            out=reduced,
+            where=inside,
+        )
+
+    return reduced
+
+
+def _accumulator_dtype(dtype, acc_dtype=None):
+    '''
+    Get data type used to accumulate sums of values of given data type.
+
+    Parameters
+    ----------
+    dtype : numpy.dtype
+        Data type of values.
+
+    acc_dtype : type, optional
+        Requested data type of accumulator.
+
+    Returns
+    -------
+    acc_dtype : numpy.dtype
+        Data type of accumulator. Unless requested otherwise, integers are
+        accumulated exactly in 64-bit integers, everything else in at least
+        double precision.
+    '''
+
+    if acc_dtype is not None:
+        return np.dtype(acc_dtype)
+
+    dtype = np.dtype(dtype)
+    if dtype == np.uint64:
+        return np.dtype(np.uint64)
+
+    if np.issubdtype(dtype, np.integer) or np.issubdtype(dtype, np.bool_):
+        return np.dtype(np.int64)
+
+    return np.result_type(dtype, np.float64)
+
+
+def _check_accumulator(dtype, acc_dtype, count):
+    '''
+    Validate data type requested to accumulate sums of values.
+
+    Parameters
+    ----------
+    dtype : numpy.dtype
+        Data type of values.
+
+    acc_dtype : numpy.dtype
+        Requested data type of accumulator.
+
+    count : int
+        Number of values summed together.
+    '''
+
+    if np.issubdtype(acc_dtype, np.floating):
+        return
+
+    if not np.issubdtype(acc_dtype, np.integer):
+        raise ValueError('`acc_dtype` must be an integer or floating type')
+
+    if np.issubdtype(dtype, np.bool_):
+        low, high = 0, 1
+    elif np.issubdtype(dtype, np.integer):
+        low, high = int(np.iinfo(dtype).min), int(np.iinfo(dtype).max)
+    else:
+        message = '`acc_dtype` must be a floating type '
+        message += 'for non-integer images'
+        raise ValueError(message)
+
+    # check if sums of all values are representable, even at their extremes
+    info = np.iinfo(acc_dtype)
+    if low * count < info.min or high * count > info.max:
+        raise ValueError('sums of `img` may overflow `acc_dtype`')
+
+
+def _window_count(img):
+    '''
+    Get number of values each pixel of image contributes to a window.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    Returns
+    -------
+    count : int
+        Product of sizes of axes beyond the first two.
+    '''
+
+    return int(np.prod(img.shape[2:], dtype=np.int64))
+
+
+def integral_image(img, acc_dtype=None):
+    '''
+    Compute integral image (summed-area table) of image.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array. Values on axes beyond the first two are
+        summed together.
+
+    acc_dtype : type, optional
+        Data type of sums. Integer types must hold the sum of the whole image
+        for any values of its data type, so ``numpy.int32`` is exact for 8-bit
+        images of up to about 8.4 million values. ``numpy.float32`` halves
+        memory traffic, at an absolute error of sums of about ``2**-24``
+        times the sum of the whole image. By default, integers are summed
+        exactly in 64-bit integers and everything else in at least double
+        precision.
+
+    Returns
+    -------
+    sat : numpy.ndarray
+        2D array of shape ``(h + 1, w + 1)``, where ``sat[i][j]`` is the sum
+        of ``img[:i, :j]``.
+    '''
+
+    # check if input is array-like
+    require_array_like(img, var_name='img')
+
+    return _integral_image(np.asarray(img), acc_dtype=acc_dtype)
+
+
+def _integral_image(img, acc_dtype=None, scratch=False):
+    '''
+    Compute integral image (summed-area table) of image array.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    acc_dtype : type, optional
+        Data type of sums.
+
+    scratch : bool, optional
+        Indicates whether or not to compute integral image in scratch buffer
+        of current thread.
+
+    Returns
+    -------
+    sat : numpy.ndarray
+        2D array of shape ``(h + 1, w + 1)``.
+    '''
+
+    h, w = img.shape[:2]
+    if acc_dtype is not None:
+        acc_dtype = np.dtype(acc_dtype)
+        _check_accumulator(img.dtype, acc_dtype, h * w * _window_count(img))
+
+    acc_dtype = _accumulator_dtype(img.dtype, acc_dtype)
+
+    # sum values of each pixel by adding channel planes, which is faster
+    # than reducing a short innermost axis
+    if img.ndim > 2:
+        if scratch:
+            pixel_sums = _scratch_array(
+                'integral_image.pixels', (h, w), acc_dtype
+            )
+        else:
+            pixel_sums = np.empty((h, w), dtype=acc_dtype)
+
+        pixel_sums[...] = 0
+        planes = img.reshape(h, w, -1)
+        for k in range(planes.shape[-1]):
+            np.add(pixel_sums, planes[..., k], out=pixel_sums, dtype=acc_dtype)
+
+        img = pixel_sums
+
+    # accumulate sums along both axes, leaving first row & column as zeros
+    if scratch:
+        sat = _scratch_array('integral_image.sat', (h + 1, w + 1), acc_dtype)
+        sat[0] = 0
+        sat[1:, 0] = 0
+    else:
+        sat = np.zeros((h + 1, w + 1), dtype=acc_dtype)
+
+    # accumulate rows one at a time, since cumulative sums along the outer
+    # axis stride through memory
+    sums = sat[1:, 1:]
+    for i in range(h):
+        np.add(sat[i, 1:], img[i], out=sums[i], dtype=acc_dtype)
+
+    np.cumsum(sums, axis=1, dtype=acc_dtype, out=sums)
+
+    return sat
+
+
+def _window_sums(sat, rows, cols, name='window_sums'):
+    '''
+    Compute sums of windows from integral image.
+
+    Parameters
+    ----------
+    sat : numpy.ndarray
+        Integral image, as returned by ``integral_image``.
+
+    rows : tuple
+        Start & stop arrays of window rows.
+
+    cols : tuple
+        Start & stop arrays of window columns.
+
+    name : str, optional
+        Prefix of names of scratch buffers, so that window sums of several
+        integral images can be kept at once.
+
+    Returns
+    -------
+    sums : numpy.ndarray
+        2D array of window sums, in scratch buffer of current thread.
+    '''
+
+    # gather rows & columns into scratch buffers, subtracting in place
+    shape = (len(rows[0]), sat.shape[1])
+    row_sums = _scratch_array(name + '.row_sums', shape, sat.dtype)
+    lower = _scratch_array(name + '.lower', shape, sat.dtype)
+    np.take(sat, rows[1], axis=0, out=row_sums, mode='clip')
+    np.take(sat, rows[0], axis=0, out=lower, mode='clip')
+    np.subtract(row_sums, lower, out=row_sums)
+
+    shape = (len(rows[0]), len(cols[0]))
+    sums = _scratch_array(name + '.sums', shape, sat.dtype)
+    lower = _scratch_array(name + '.lower', shape, sat.dtype)
+    np.take(row_sums, cols[1], axis=1, out=sums, mode='clip')
+    np.take(row_sums, cols[0], axis=1, out=lower, mode='clip')
+    np.subtract(sums, lower, out=sums)
+
+    return sums
+
+
+def _blocked_sums(img, rows, cols, window, acc_dtype=None, square_dtype=None):
+    '''
+    Compute sums of windows from integral images of blocks of rows.
+
+    Windows are processed in blocks of ``SUM_BLOCK_ROWS`` output rows, each
+    using an integral image of only the image rows it covers. This bounds
+    the magnitude of accumulated sums, and makes results independent of how
+    the output rows are split, as long as splits are aligned to blocks.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    acc_dtype : type, optional
+        Data type of integral images.
+
+    square_dtype : numpy.dtype, optional
+        Data type of sums of squares, as returned by ``_square_accumulator``.
+        If not given, squares are not summed.
+
+    Yields
+    ------
+    block : slice
+        Output rows of block.
+
+    row_counts : numpy.ndarray
+        Number of image rows covered by each window row of block.
+
+    sums : numpy.ndarray
+        2D array of window sums of block, in scratch buffer of current
+        thread, which is reused by the next block.
+
+    central_sums : tuple or None
+        Window sums of deviations & squared deviations of block, as returned
+        by ``_central_sums``, if ``square_dtype`` is given.
+    '''
+
+    h, w = img.shape[:2]
+    n, m = window
+
+    # sum disjoint windows directly, only visiting pixels they cover
+    if rows.step >= n and cols.step >= m and len(cols) > 0:
+        record_path('disjoint_sums')
+        yield from _disjoint_sums(
+            img, rows, cols, window, acc_dtype, square_dtype
+        )
+        return
+
+    cols = _clip_windows(cols, m, w)
+
+    for i in range(0, len(rows), SUM_BLOCK_ROWS):
+        block = slice(i, i + SUM_BLOCK_ROWS)
+        start, stop = _clip_windows(rows[block], n, h)
+        top = start[0]
+        block_rows = (start - top, stop - top)
+        sat = _integral_image(
+            img[top : stop[-1]],
+            acc_dtype=acc_dtype,
+            scratch=True,
+        )
+        sums = _window_sums(sat, block_rows, cols)
+
+        central_sums = None
+        if square_dtype is not None:
+
+            def window_sums(arr, dtype, name):
+                # integer squares are accumulated in their own data type
+                if not np.issubdtype(dtype, np.floating):
+                    dtype = None
+
+                sat = _integral_image(arr, acc_dtype=dtype, scratch=True)
+
+                return _window_sums(sat, block_rows, cols, name=name)
+
+            central_sums = _central_sums(
+                img[top : stop[-1]],
+                square_dtype,
+                window_sums,
+            )
+
+        yield block, stop - start, sums, central_sums
+
+
+def _disjoint_sums(img, rows, cols, window, acc_dtype=None, square_dtype=None):
+    '''
+    Compute sums of disjoint windows by summing rows of windows, then
+    columns, in blocks of ``SUM_BLOCK_ROWS`` output rows.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows, at least ``n`` apart.
+
+    cols : range
+        Offsets of window columns, at least ``m`` apart.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    acc_dtype : type, optional
+        Data type of sums.
+
+    square_dtype : numpy.dtype, optional
+        Data type of sums of squares. If not given, squares are not summed.
+
+    Yields
+    ------
+    block : slice
+        Output rows of block.
+
+    row_counts : numpy.ndarray
+        Number of image rows covered by each window row of block.
+
+    sums : numpy.ndarray
+        2D array of window sums of block.
+
+    central_sums : tuple or None
+        Window sums of deviations & squared deviations of block, as returned
+        by ``_central_sums``, if ``square_dtype`` is given.
+    '''
+
+    h, w = img.shape[:2]
+    n, m = window
+    if acc_dtype is not None:
+        acc_dtype = np.dtype(acc_dtype)
+        _check_accumulator(img.dtype, acc_dtype, h * w * _window_count(img))
+
+    acc_dtype = _accumulator_dtype(img.dtype, acc_dtype)
+    cols = _clip_windows(cols, m, w)
+
+    for i in range(0, len(rows), SUM_BLOCK_ROWS):
+        block = slice(i, i + SUM_BLOCK_ROWS)
+        start, stop = _clip_windows(rows[block], n, h)
+        top = start[0]
+        block_rows = (start - top, stop - top)
+        sums = _disjoint_window_sums(
+            img[top : stop[-1]],
+            block_rows,
+            cols,
+            acc_dtype,
+        )
+
+        central_sums = None
+        if square_dtype is not None:
+            central_sums = _central_sums(
+                img[top : stop[-1]],
+                square_dtype,
+                lambda arr, dtype, name: _disjoint_window_sums(
+                    arr, block_rows, cols, dtype
+                ),
+            )
+
+        yield block, stop - start, sums, central_sums
+
+
+def _disjoint_window_sums(arr, rows, cols, acc_dtype):
+    '''
+    Compute sums of disjoint windows by summing rows of windows, then
+    columns.
+
+    Parameters
+    ----------
+    arr : numpy.ndarray
+        2D (or higher) array.
+
+    rows : tuple
+        Start & stop arrays of window rows.
+
+    cols : tuple
+        Start & stop arrays of window columns.
+
+    acc_dtype : numpy.dtype
+        Data type of sums.
+
+    Returns
+    -------
+    sums : numpy.ndarray
+        2D array of window sums.
+    '''
+
+    sums = _disjoint_reduce(arr, rows[0], rows[1], np.add, dtype=acc_dtype)
+
+    # sum values of each pixel
+    if sums.ndim > 2:
+        sums = sums.reshape(sums.shape[:2] + (-1,)).sum(
+            axis=-1,
+            dtype=acc_dtype,
+        )
+
+    return _disjoint_reduce(
+        sums,
+        cols[0],
+        cols[1],
+        np.add,
+        axis=1,
+        dtype=acc_dtype,
+    )
+
+
+def _sum_dtype(img, names, acc_dtype=None):
+    '''
+    Get data type in which values of image array are summed to compute
+    statistics of windows.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    names : list
+        Name of each statistic, one of ``'sum'``, ``'mean'``, ``'var'`` or
+        ``'std'``.
+
+    acc_dtype : type, optional
+        Requested data type of integral images.
+
+    Returns
+    -------
+    sum_dtype : numpy.dtype
+        Smallest integer data type holding values of floating point images
+        holding only integers, whose squares are then summed exactly for
+        variances & standard deviations, or data type of image otherwise.
+    '''
+
+    if (
+        acc_dtype is not None
+        or not any(name in ('var', 'std') for name in names)
+        or not np.issubdtype(img.dtype, np.floating)
+        or img.size == 0
+    ):
+        return img.dtype
+
+    low, high = np.min(img), np.max(img)
+    if not (np.isfinite(low) and np.isfinite(high)):
+        return img.dtype
+
+    if not np.array_equal(img, np.trunc(img)):
+        return img.dtype
+
+    # negative values need a signed type that also holds the largest value
+    low, high = int(low), int(high)
+    dtype = np.min_scalar_type(high)
+    if low < 0:
+        dtype = np.result_type(
+            np.min_scalar_type(low), np.min_scalar_type(-high - 1)
+        )
+
+    if not np.issubdtype(dtype, np.integer):
+        return img.dtype
+
+    return dtype
+
+
+def _square_accumulator(dtype, window, block, acc_dtype=None):
+    '''
+    Get data type used to accumulate squares of values of given data type.
+
+    Parameters
+    ----------
+    dtype : numpy.dtype
+        Data type of values.
+
+    window : int
+        Number of values of each window, counting channels.
+
+    block : int
+        Largest number of values of blocks of image rows whose squares are
+        summed together, counting channels.
+
+    acc_dtype : type, optional
+        Requested data type of accumulator of sums.
+
+    Returns
+    -------
+    square_dtype : numpy.dtype
+        Data type of accumulator of squares. Squares of integers are summed
+        exactly in 64-bit integers, unless they may overflow them or a
+        floating type is requested, and everything else in the requested
+        floating type or at least double precision.
+    '''
+
+    dtype = np.dtype(dtype)
+    if acc_dtype is not None and np.issubdtype(acc_dtype, np.floating):
+        return np.dtype(acc_dtype)
+
+    if np.issubdtype(dtype, np.bool_):
+        high = 1
+    elif np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        high = max(-int(info.min), int(info.max))
+    else:
+        return np.result_type(dtype, np.float64)
+
+    # check if integral images of squares of blocks & products of window
+    # sums are representable, even at their extremes
+    if max(block, window**2) * high**2 > np.iinfo(np.int64).max:
+        return np.dtype(np.float64)
+
+    return np.dtype(np.int64)
+
+
+def _central_sums(img, dtype, window_sums):
+    '''
+    Compute window sums of deviations of values from their mean & of their
+    squares.
+
+    Floating point values are shifted by their mean before squaring, so that
+    sums of squares do not cancel catastrophically for values far from zero.
+    Integer values are not shifted, since their squares are summed exactly.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    dtype : numpy.dtype
+        Data type of sums, as returned by ``_square_accumulator``.
+
+    window_sums : callable function
+        Function computing window sums of an array, taking the array, the
+        data type of sums & a name of scratch buffers.
+
+    Returns
+    -------
+    deviation_sums : numpy.ndarray or None
+        2D array of window sums of deviations, or ``None`` if values are not
+        shifted, so that window sums of values are used instead.
+
+    square_sums : numpy.ndarray
+        2D array of window sums of squared deviations.
+    '''
+
+    squares = _scratch_array('central_sums.squares', img.shape, dtype)
+    if np.issubdtype(dtype, np.integer):
+        np.multiply(img, img, out=squares, dtype=dtype)
+
+        return None, window_sums(squares, dtype, 'window_sums.squares')
+
+    deviations = _scratch_array('central_sums.deviations', img.shape, dtype)
+    np.subtract(
+        img,
+        np.mean(img, dtype=np.float64),
+        out=deviations,
+        dtype=np.result_type(img.dtype, np.float64),
+    )
+    np.multiply(deviations, deviations, out=squares)
+
+    return (
+        window_sums(deviations, dtype, 'window_sums.deviations'),
+        window_sums(squares, dtype, 'window_sums.squares'),
+    )
+
+
+def _sliding_sum(img, rows, cols, window, out=None, acc_dtype=None):
+    '''
+    Compute sum of each window using integral images.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    out : numpy.ndarray, optional
+        Array to store window sums in.
+
+    acc_dtype : type, optional
+        Data type of integral images.
+
+    Returns
+    -------
+    sums : numpy.ndarray
+        2D array of window sums.
+    '''
+
+    if out is None:
+        out = np.zeros(
+            (len(rows), len(cols)),
+            dtype=_accumulator_dtype(img.dtype, acc_dtype),
+        )
+
+    _sliding_moments(img, rows, cols, window, [('sum', out)], acc_dtype)
+
+    return out
+
+
+def _sliding_mean(img, rows, cols, window, out=None, acc_dtype=None):
+    '''
+    Compute mean of each window using integral images.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    out : numpy.ndarray, optional
+        Array to store window means in.
+
+    acc_dtype : type, optional
+        Data type of integral images.
+
+    Returns
+    -------
+    means : numpy.ndarray
+        2D array of window means.
+    '''
+
+    if out is None:
+        out = np.zeros((len(rows), len(cols)), dtype=np.float64)
+
+    _sliding_moments(img, rows, cols, window, [('mean', out)], acc_dtype)
+
+    return out
+
+
+def _sliding_var(img, rows, cols, window, out=None, acc_dtype=None):
+    '''
+    Compute variance of each window using integral images of values & their
+    squares.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    out : numpy.ndarray, optional
+        Array to store window variances in.
+
+    acc_dtype : type, optional
+        Data type of integral images.
+
+    Returns
+    -------
+    variances : numpy.ndarray
+        2D array of window variances.
+    '''
+
+    if out is None:
+        out = np.zeros((len(rows), len(cols)), dtype=np.float64)
+
+    _sliding_moments(img, rows, cols, window, [('var', out)], acc_dtype)
+
+    return out
+
+
+def _sliding_std(img, rows, cols, window, out=None, acc_dtype=None):
+    '''
+    Compute standard deviation of each window using integral images of
+    values & their squares.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    out : numpy.ndarray, optional
+        Array to store window standard deviations in.
+
+    acc_dtype : type, optional
+        Data type of integral images.
+
+    Returns
+    -------
+    stds : numpy.ndarray
+        2D array of window standard deviations.
+    '''
+
+    if out is None:
+        out = np.zeros((len(rows), len(cols)), dtype=np.float64)
+
+    _sliding_moments(img, rows, cols, window, [('std', out)], acc_dtype)
+
+    return out
+
+
+def _sums_finite(img):
+    '''
+    Check if image array holds only finite values, whose window sums can be
+    computed from integral images.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    Returns
+    -------
+    finite : bool
+        Indicates whether or not image holds no NaN or infinite values,
+        which integral images carry into all later window sums of their
+        block.
+    '''
+
+    if img.dtype.kind not in 'fc':
+        return True
+
+    return bool(np.isfinite(img).all())
+
+
+def _sliding_moments(
+    img,
+    rows,
+    cols,
+    window,
+    outs,
+    acc_dtype=None,
+    finite=None,
+    sum_dtype=None,
+):
+    '''
+    Compute statistics of each window from window sums, sharing integral
+    images between statistics.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    outs : list
+        Name of statistic, one of ``'sum'``, ``'mean'``, ``'var'`` or
+        ``'std'``, and array to store it in, for each statistic.
+
+    acc_dtype : type, optional
+        Data type of integral images.
+
+    finite : bool, optional
+        Indicates whether or not image holds only finite values, as returned
+        by ``_sums_finite``. By default, the image is checked.
+
+    sum_dtype : numpy.dtype, optional
+        Data type in which values of image are summed, as returned by
+        ``_sum_dtype``. By default, it is chosen for the image.
+    '''
+
+    if finite is None:
+        finite = _sums_finite(img)
+
+    # reduce windows of images holding NaN or infinite values one batch at
+    # a time, so that these values only reach windows covering them
+    if not finite:
+        record_path('sliding_reduce')
+        for name, out in outs:
+            _sliding_reduce(img, rows, cols, window, _STATISTICS[name], out)
+
+        return
+
+    # sum floating point integers as integers, so that their squares are
+    # summed exactly & constant windows have zero variance
+    if sum_dtype is None:
+        sum_dtype = _sum_dtype(img, [name for name, _ in outs], acc_dtype)
+
+    img = img.astype(sum_dtype, copy=False)
+
+    w = img.shape[1]
+    n, m = window
+    col_start, col_stop = _clip_windows(cols, m, w)
+    col_counts = (col_stop - col_start) * _window_count(img)
+
+    # sum squares only for variances & standard deviations
+    square_dtype = None
+    if any(name in ('var', 'std') for name, _ in outs):
+        count = _window_count(img)
+        square_dtype = _square_accumulator(
+            img.dtype,
+            n * m * count,
+            ((SUM_BLOCK_ROWS - 1) * rows.step + n) * w * count,
+            acc_dtype=acc_dtype,
+        )
+
+    for block, row_counts, sums, central_sums in _blocked_sums(
+        img,
+        rows,
+        cols,
+        window,
+        acc_dtype=acc_dtype,
+        square_dtype=square_dtype,
+    ):
+        counts = np.outer(row_counts, col_counts)
+        stats = {'sum': sums}
+        for name, out in outs:
+            if name not in stats:
+                stats[name] = _window_statistic(
+                    name, counts, sums, central_sums, stats
+                )
+
+            out[block] = stats[name]
+
+
+def _window_statistic(name, counts, sums, central_sums, stats):
+    '''
+    Compute statistic of windows of block from their sums, dividing each
+    window by its own clipped area.
+
+    Parameters
+    ----------
+    name : str
+        Name of statistic, one of ``'mean'``, ``'var'`` or ``'std'``.
+
+    counts : numpy.ndarray
+        2D array of number of values of each window.
+
+    sums : numpy.ndarray
+        2D array of window sums.
+
+    central_sums : tuple or None
+        Window sums of deviations & squared deviations, as returned by
+        ``_central_sums``.
+
+    stats : dict
+        Statistics of block computed so far, by name, which are reused.
+
+    Returns
+    -------
+    stat : numpy.ndarray
+        2D array of statistic, in scratch buffer of current thread.
+    '''
+
+    shape = sums.shape
+    if name == 'mean':
+        means = _scratch_array(
+            'sliding_mean.means',
+            shape,
+            np.result_type(sums.dtype, np.float64),
+        )
+        np.divide(sums, counts, out=means)
+
+        return means
+
+    if name == 'std':
+        if 'var' not in stats:
+            stats['var'] = _window_statistic(
+                'var', counts, sums, central_sums, stats
+            )
+
+        return np.sqrt(
+            stats['var'],
+            out=_scratch_array('sliding_std.stds', shape, np.float64),
+        )
+
+    deviation_sums, square_sums = central_sums
+    variances = _scratch_array('sliding_var.variances', shape, np.float64)
+
+    # variance of integers is (n * sum(x**2) - sum(x)**2) / n**2, whose
+    # numerator is exact in 64-bit integers
+    if deviation_sums is None:
+        numerators = _scratch_array('sliding_var.numerators', shape, np.int64)
+        np.multiply(sums, sums, out=numerators, dtype=np.int64)
+        np.subtract(counts * square_sums, numerators, out=numerators)
+        np.divide(numerators, counts * counts, out=variances)
+
+        return variances
+
+    # variance of deviations from shift is mean(d**2) - mean(d)**2, where
+    # deviations are small enough not to cancel
+    means = _scratch_array('sliding_var.means', shape, np.float64)
+    np.divide(deviation_sums, counts, out=means)
+    np.divide(square_sums, counts, out=variances)
+    np.subtract(variances, means * means, out=variances)
+
+    # clip negative variances of nearly constant windows left by rounding
+    return np.maximum(variances, 0, out=variances)
+
+
+def _interior(offsets, size, length):
+    '''
+    Find windows that lie entirely inside an axis.
+
+    Parameters
+    ----------
+    offsets : range
+        Offsets of windows along axis, in increasing order.
+
+    size : int
+        Size of window along axis.
+
+    length : int
+        Length of axis.
+
+    Returns
+    -------
+    first : int
+        Index of the first window inside the axis.
+
+    last : int
+        Index past the last window inside the axis.
+    '''
+
+    offsets = np.asarray(offsets, dtype=np.intp)
+    first = int(np.searchsorted(offsets, 0, side='left'))
+    last = int(np.searchsorted(offsets, length - size, side='right'))
+
+    return first, max(first, last)
+
+
+def _as_slice(offsets):
+    '''
+    Convert range into equivalent slice.
+
+    Parameters
+    ----------
+    offsets : range
+        Non-negative range.
+
+    Returns
+    -------
+    offsets_slice : slice
+        Slice selecting the elements of ``offsets``.
+    '''
+
+    if len(offsets) == 0:
+        return slice(0, 0)
+
+    return slice(offsets[0], offsets[-1] + 1, offsets.step)
+
+
+def _batched_reduce(img, rows, cols, window, op, out, chunk_size=None):
+    '''
+    Perform reduction on full-sized windows using a windowed view of image,
+    one chunk of output rows at a time.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows, all lying inside the image.
+
+    cols : range
+        Offsets of window columns, all lying inside the image.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    op : callable function
+        Reduction accepting an ``axis`` argument.
+
+    out : numpy.ndarray
+        2D array to store reduced windows in.
+
+    chunk_size : int, optional
+        Approximate number of bytes of windowed data to reduce at once.
+    '''
+
+    if len(rows) == 0 or len(cols) == 0:
+        return
+
+    if chunk_size is None:
+        chunk_size = REDUCE_CHUNK_SIZE
+
+    # create zero-copy view of all windows, with window axes last
+    view = np.lib.stride_tricks.sliding_window_view(
+        img,
+        tuple(window),
+        axis=(0, 1),
+    )
+    view = view[_as_slice(rows), _as_slice(cols)]
+    axis = tuple(range(2, view.ndim))
+
+    # reduce chunks of output rows small enough to bound peak memory
+    row_size = view[0].size * view.itemsize
+    chunk_rows = max(1, chunk_size // max(row_size, 1))
+    for i in range(0, len(rows), chunk_rows):
+        out[i : i + chunk_rows] = op(view[i : i + chunk_rows], axis=axis)
+
+
+def _sliding_reduce(img, rows, cols, window, op, out=None, chunk_size=None):
+    '''
+    Perform reduction on each window, reducing windows of the same shape in
+    batches over windowed views of image.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    op : callable function
+        Reduction accepting an ``axis`` argument.
+
+    out : numpy.ndarray, optional
+        Array to store reduced windows in.
+
+    chunk_size : int, optional
+        Approximate number of bytes of windowed data to reduce at once.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of reduced windows.
+    '''
+
+    h, w = img.shape[:2]
+    n, m = window
+
+    if out is None:
+        out = np.zeros((len(rows), len(cols)), dtype=np.float64)
+
+    row_start, row_stop = _clip_windows(rows, n, h)
+    col_start, col_stop = _clip_windows(cols, m, w)
+    row_first, row_last = _interior(rows, n, h)
+    col_first, col_last = _interior(cols, m, w)
+    inner_rows = rows[row_first:row_last]
+    inner_cols = cols[col_first:col_last]
+    outer_rows = [*range(row_first), *range(row_last, len(rows))]
+    outer_cols = [*range(col_first), *range(col_last, len(cols))]
+
+    # reduce full-sized windows
+    _batched_reduce(
+        img,
+        inner_rows,
+        inner_cols,
+        window,
+        op,
+        out[row_first:row_last, col_first:col_last],
+        chunk_size=chunk_size,
+    )
+
+    # reduce windows clipped by top & bottom edges, one row at a time
+    for p in outer_rows:
+        _batched_reduce(
+            img[row_start[p] : row_stop[p]],
+            range(1),
+            inner_cols,
+            (row_stop[p] - row_start[p], m),
+            op,
+            out[p : p + 1, col_first:col_last],
+            chunk_size=chunk_size,
+        )
+
+    # reduce windows clipped by left & right edges, one column at a time
+    for q in outer_cols:
+        _batched_reduce(
+            img[:, col_start[q] : col_stop[q]],
+            inner_rows,
+            range(1),
+            (n, col_stop[q] - col_start[q]),
+            op,
+            out[row_first:row_last, q : q + 1],
+            chunk_size=chunk_size,
+        )
+
+    # reduce windows clipped by corners
+    for p in outer_rows:
+        for q in outer_cols:
+            out[p][q] = op(
+                img[
+                    row_start[p] : row_stop[p],
+                    col_start[q] : col_stop[q],
+                ]
+            )
+
+    return out
+
+
+_REDUCTIONS = {
+    np.all,
+    np.amax,
+    np.amin,
+    np.any,
+    np.count_nonzero,
+    np.max,
+    np.mean,
+    np.median,
+    np.min,
+    np.nanmax,
+    np.nanmean,
+    np.nanmedian,
+    np.nanmin,
+    np.nanpercentile,
+    np.nanprod,
+    np.nanquantile,
+    np.nanstd,
+    np.nansum,
+    np.nanvar,
+    np.percentile,
+    np.prod,
+    np.ptp,
+    np.quantile,
+    np.std,
+    np.sum,
+    np.var,
+}
+
+
+def _is_reduction(op):
+    '''
+    Check if operation is a known NumPy reduction accepting an ``axis``
+    argument, optionally wrapped in ``functools.partial``.
+
+    Parameters
+    ----------
+    op : callable function
+        Operation to be tested.
+
+    Returns
+    -------
+    reduction : bool
+        Indicates whether given operation is a known reduction.
+    '''
+
+    if isinstance(op, functools.partial):
+        if 'axis' in op.keywords:
+            return False
+
+        op = op.func
+
+    try:
+        return op in _REDUCTIONS
+    except TypeError:
+        # unhashable callable
+        return False
+
+
+def _extreme_identity(dtype, ufunc):
+    '''
+    Get identity value of ``np.maximum`` or ``np.minimum`` for data type.
+
+    Parameters
+    ----------
+    dtype : numpy.dtype
+        Data type of values.
+
+    ufunc : numpy.ufunc
+        Either ``np.maximum`` or ``np.minimum``.
+
+    Returns
+    -------
+    identity : scalar or None
+        Value that leaves other values unchanged under ``ufunc``, or ``None``
+        if data type has no such value.
+    '''
+
+    lowest = ufunc is np.maximum
+    if np.issubdtype(dtype, np.bool_):
+        return not lowest
+
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return info.min if lowest else info.max
+
+    if np.issubdtype(dtype, np.floating):
+        return -np.inf if lowest else np.inf
+
+    return None
+
+
+def _running_reduce(arr, size, ufunc):
+    '''
+    Reduce each run of consecutive values on the first axis of array, in
+    constant time per value using the van Herk/Gil-Werman algorithm.
+
+    Parameters
+    ----------
+    arr : numpy.ndarray
+        Array to be reduced along its first axis.
+
+    size : int
+        Number of consecutive values in each run.
+
+    ufunc : numpy.ufunc
+        Associative & idempotent ufunc to reduce with, such as
+        ``np.maximum`` or ``np.minimum``.
+
+    Returns
+    -------
+    reduced : numpy.ndarray
+        Array of reduced runs, with ``len(arr) - size + 1`` elements along
+        the first axis.
+    '''
+
+    length = arr.shape[0]
+    count = length - size + 1
+
+    # split axis into blocks of run size, padding last block
+    blocks = -(-length // size)
+    padded = np.empty((blocks * size,) + arr.shape[1:], dtype=arr.dtype)
+    padded[:length] = arr
+    padded[length:] = arr[-1]
+    padded = padded.reshape((blocks, size) + arr.shape[1:])
+
+    # accumulate forwards & backwards within each block
+    prefix = ufunc.accumulate(padded, axis=1).reshape((-1,) + arr.shape[1:])
+    suffix = ufunc.accumulate(padded[:, ::-1], axis=1)[:, ::-1]
+    suffix = suffix.reshape((-1,) + arr.shape[1:])
+
+    # each run is covered by the suffix of one block & prefix of the next
+    reduced = ufunc(suffix[:count], prefix[size - 1 : size - 1 + count])
+
+    return reduced
+
+
+def _running_extreme(arr, offsets, size, ufunc, identity):
+    '''
+    Reduce windows along the first axis of array, padding windows that
+    extend past the edges with identity value.
+
+    Parameters
+    ----------
+    arr : numpy.ndarray
+        Array to be reduced along its first axis.
+
+    offsets : range
+        Offsets of windows along axis.
+
+    size : int
+        Size of window along axis.
+
+    ufunc : numpy.ufunc
+        Either ``np.maximum`` or ``np.minimum``.
+
+    identity : scalar
+        Identity value of ``ufunc``.
+
+    Returns
+    -------
+    reduced : numpy.ndarray
+        Array of reduced windows along the first axis.
+    '''
+
+    length = arr.shape[0]
+    first = offsets[0]
+    last = offsets[-1] + size
+
+    # reduce disjoint windows directly, only visiting values they cover
+    if offsets.step >= size:
+        start, stop = _clip_windows(offsets, size, length)
+        return _disjoint_reduce(arr, start, stop, ufunc)
+
+    # take span of array covered by windows and pad it past the edges
+    span = arr[max(first, 0) : min(last, length)]
+    before = max(-first, 0)
+    after = max(last - length, 0)
+    if before > 0 or after > 0:
+        padded = np.empty(
+            (before + len(span) + after,) + arr.shape[1:],
+            dtype=arr.dtype,
+        )
+        padded[:before] = identity
+        padded[before : before + len(span)] = span
+        padded[before + len(span) :] = identity
+        span = padded
+
+    reduced = _running_reduce(span, size, ufunc)
+
+    return reduced[:: offsets.step]
+
+
+def _sliding_extreme(img, rows, cols, window, ufunc, out=None):
+    '''
+    Compute maximum or minimum of each window using separable running
+    reductions, in constant time per window regardless of window size.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    ufunc : numpy.ufunc
+        Either ``np.maximum`` or ``np.minimum``.
+
+    out : numpy.ndarray, optional
+        Array to store reduced windows in.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of reduced windows.
+    '''
+
+    h, w = img.shape[:2]
+    n, m = window
+    op = np.max if ufunc is np.maximum else np.min
+
+    identity = _extreme_identity(img.dtype, ufunc)
+    if identity is None:
+        record_path('sliding_reduce')
+        return _sliding_reduce(img, rows, cols, window, op, out=out)
+
+    if out is None:
+        out = np.zeros((len(rows), len(cols)), dtype=img.dtype)
+
+    if len(rows) == 0 or len(cols) == 0:
+        return out
+
+    # reduce values of each pixel
+    if img.ndim > 2:
+        img = ufunc.reduce(img.reshape(h, w, -1), axis=-1)
+
+    # reduce along columns, then along rows
+    reduced = _running_extreme(img, rows, n, ufunc, identity)
+    reduced = _running_extreme(reduced.T, cols, m, ufunc, identity)
+    out[...] = reduced.T
+
+    return out
+
+
+def _sliding_max(img, rows, cols, window, out=None):
+    '''
+    Compute maximum of each window using separable running maximum.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    out : numpy.ndarray, optional
+        Array to store window maximums in.
+
+    Returns
+    -------
+    maximums : numpy.ndarray
+        2D array of window maximums.
+    '''
+
+    return _sliding_extreme(img, rows, cols, window, np.maximum, out=out)
+
+
+def _sliding_min(img, rows, cols, window, out=None):
+    '''
+    Compute minimum of each window using separable running minimum.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    out : numpy.ndarray, optional
+        Array to store window minimums in.
+
+    Returns
+    -------
+    minimums : numpy.ndarray
+        2D array of window minimums.
+    '''
+
+    return _sliding_extreme(img, rows, cols, window, np.minimum, out=out)
+
+
+def _window_positions(offsets, size, length):
+    '''
+    List positions covered by windows along an axis.
+
+    Parameters
+    ----------
+    offsets : range
+        Offsets of windows along axis.
+
+    size : int
+        Size of window along axis.
+
+    length : int
+        Length of axis.
+
+    Returns
+    -------
+    windows : numpy.ndarray
+        Index of window for each covered position.
+
+    positions : numpy.ndarray
+        Index along axis of each covered position.
+    '''
+
+    positions = np.add.outer(np.asarray(offsets, dtype=np.intp), range(size))
+    inside = (positions >= 0) & (positions < length)
+    windows = np.nonzero(inside)[0]
+
+    return windows, positions[inside]
+
+
+def _sliding_rank(img, rows, cols, window, ranks, out=None):
+    '''
+    Find ranked values of each window of 8-bit image using running
+    histograms, without sorting windows.
+
+    As in Huang's algorithm, the histogram of each window is updated
+    incrementally as the window slides down, by adding the image row
+    entering it & removing the image row leaving it. All windows on a row
+    are updated at once, so the cost per pixel does not depend on window
+    height and only grows slowly with window width. Ranks are first located
+    among 16 coarse bins, then among the 16 fine bins of the chosen coarse
+    bin.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array of data type ``numpy.uint8``.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    ranks : callable function
+        Function computing output values, given the number of values in each
+        window and a function returning the values of each window at given
+        0-based ranks.
+
+    out : numpy.ndarray, optional
+        Array to store ranked values in.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of ranked values.
+    '''
+
+    h, w = img.shape[:2]
+    n, m = window
+    if out is None:
+        out = np.zeros((len(rows), len(cols)), dtype=np.float64)
+
+    if len(rows) == 0 or len(cols) == 0:
+        return out
+
+    img = img.reshape(h, w, -1)
+    channels = img.shape[-1]
+    row_start, row_stop = _clip_windows(rows, n, h)
+    col_start, col_stop = _clip_windows(cols, m, w)
+    col_counts = (col_stop - col_start) * channels
+
+    # pair every window with the image columns it covers
+    windows, positions = _window_positions(cols, m, w)
+    fine_windows = (windows * 256)[:, np.newaxis]
+    coarse_windows = (windows * 16)[:, np.newaxis]
+    count_dtype = np.min_scalar_type(n * m * channels)
+    ones = np.ones(len(windows) * channels, dtype=count_dtype)
+
+    def update(ufunc, start, stop):
+        for row in img[start:stop]:
+            values = row[positions]
+            ufunc.at(fine, (fine_windows + values).ravel(), ones)
+            ufunc.at(coarse, (coarse_windows + (values >> 4)).ravel(), ones)
+
+    fine = np.zeros(len(cols) * 256, dtype=count_dtype)
+    coarse = np.zeros(len(cols) * 16, dtype=count_dtype)
+    coarse_offsets = np.arange(len(cols), dtype=np.intp) * 16
+    fine_offsets = (coarse_offsets * 16)[:, np.newaxis] + np.arange(16)
+    current = (0, 0)
+    for p in range(len(rows)):
+        start, stop = row_start[p], row_stop[p]
+
+        # remove rows leaving windows & add rows entering windows
+        update(np.subtract, current[0], min(current[1], start))
+        update(np.subtract, max(current[0], stop), current[1])
+        update(np.add, start, min(stop, current[0]))
+        update(np.add, max(start, current[1]), stop)
+        current = (start, stop)
+
+        # cumulative coarse counts increase across all windows on this row,
+        # so the coarse bins holding given ranks can be searched for all
+        # windows at once
+        cum_coarse = np.cumsum(coarse, dtype=np.int64)
+        bases = cum_coarse[coarse_offsets] - coarse[coarse_offsets]
+
+        def values(k):
+            target = bases + k
+            indices = np.searchsorted(cum_coarse, target, side='right')
+            residual = target - (cum_coarse[indices] - coarse[indices])
+            blocks = (indices - coarse_offsets)[:, np.newaxis]
+
+            # locate rank within the fine bins of the chosen coarse bin
+            cum_fine = np.cumsum(
+                fine[fine_offsets + blocks * 16],
+                axis=1,
+                dtype=np.int64,
+            )
+            offset = np.sum(cum_fine <= residual[:, np.newaxis], axis=1)
+
+            return blocks[:, 0] * 16 + offset
+
+        out[p] = ranks(col_counts * (stop - start), values)
+
+    return out
+
+
+def _median_ranks(counts, values):
+    '''
+    Compute medians from the sorted values of windows.
+
+    Parameters
+    ----------
+    counts : numpy.ndarray
+        Number of values in each window.
+
+    values : callable function
+        Function returning values of each window at given 0-based ranks.
+
+    Returns
+    -------
+    medians : numpy.ndarray
+        Median of each window, computed like ``np.median``.
+    '''
+
+    lower = values((counts - 1) // 2)
+    upper = values(counts // 2)
+
+    return (lower + upper) / 2
+
+
+def _quantile_ranks(counts, values, q):
+    '''
+    Compute quantiles from the sorted values of windows, using linear
+    interpolation like ``np.quantile``.
+
+    Parameters
+    ----------
+    counts : numpy.ndarray
+        Number of values in each window.
+
+    values : callable function
+        Function returning values of each window at given 0-based ranks.
+
+    q : float
+        Quantile to compute, between 0 and 1.
+
+    Returns
+    -------
+    quantiles : numpy.ndarray
+        Quantile of each window.
+    '''
+
+    # find neighbouring ranks of fractional rank
+    virtual = (counts - 1) * np.float64(q)
+    previous = np.floor(virtual)
+    gamma = virtual - previous
+    previous = np.clip(previous, 0, counts - 1).astype(np.intp)
+    following = np.minimum(previous + 1, counts - 1)
+
+    # interpolate between neighbouring values
+    lower = values(previous)
+    upper = values(following)
+    diff = upper - lower
+    quantiles = lower + diff * gamma
+    np.subtract(upper, diff * (1 - gamma), out=quantiles, where=gamma >= 0.5)
+
+    return quantiles
+
+
+def _use_histograms(img, window):
+    '''
+    Check if ranked values of windows should be found using running
+    histograms rather than by partitioning each window.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    Returns
+    -------
+    use_histograms : bool
+        Indicates whether image is 8-bit and windows are large enough for
+        running histograms to be faster.
+    '''
+
+    n, m = window
+    size = n * m * _window_count(img)
+
+    return img.dtype == np.uint8 and size >= RANK_MIN_WINDOW_SIZE
+
+
+def _sliding_median(img, rows, cols, window, out=None):
+    '''
+    Compute median of each window, using running histograms for 8-bit
+    images.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    out : numpy.ndarray, optional
+        Array to store window medians in.
+
+    Returns
+    -------
+    medians : numpy.ndarray
+        2D array of window medians.
+    '''
+
+    if not _use_histograms(img, window):
+        record_path('sliding_reduce')
+        return _sliding_reduce(img, rows, cols, window, np.median, out=out)
+
+    record_path('sliding_rank')
+    return _sliding_rank(img, rows, cols, window, _median_ranks, out=out)
+
+
+def _sliding_quantile(img, rows, cols, window, q, out=None):
+    '''
+    Compute quantile of each window, using running histograms for 8-bit
+    images.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    q : float
+        Quantile to compute, between 0 and 1.
+
+    out : numpy.ndarray, optional
+        Array to store window quantiles in.
+
+    Returns
+    -------
+    quantiles : numpy.ndarray
+        2D array of window quantiles.
+    '''
+
+    if not _use_histograms(img, window):
+        record_path('sliding_reduce')
+        op = functools.partial(np.quantile, q=q)
+        return _sliding_reduce(img, rows, cols, window, op, out=out)
+
+    record_path('sliding_rank')
+    ranks = functools.partial(_quantile_ranks, q=q)
+
+    return _sliding_rank(img, rows, cols, window, ranks, out=out)
+
+
+_KERNELS = {
+    np.sum: _sliding_sum,
+    np.mean: _sliding_mean,
+    np.max: _sliding_max,
+    np.amax: _sliding_max,
+    np.min: _sliding_min,
+    np.amin: _sliding_min,
+    np.median: _sliding_median,
+    np.var: _sliding_var,
+    np.std: _sliding_std,
+}
+
+# reductions computing statistics of windows one batch at a time
+_STATISTICS = {
+    'sum': np.sum,
+    'mean': np.mean,
+    'var': np.var,
+    'std': np.std,
+}
+
+# statistics computed by kernels from window sums
+_MOMENTS = {
+    _sliding_sum: 'sum',
+    _sliding_mean: 'mean',
+    _sliding_var: 'var',
+    _sliding_std: 'std',
+}
+
+# quantile functions and scale of their ``q`` argument
+_QUANTILES = {
+    np.percentile: 100,
+    np.quantile: 1,
+}
+
+
+def _get_kernel(op):
+    '''
+    Get dedicated sliding window kernel for operation.
+
+    Parameters
+    ----------
+    op : callable function
+        Operation to perform on each window.
+
+    Returns
+    -------
+    kernel : callable function or None
+        Kernel computing ``op`` over all windows at once, or ``None`` if
+        ``op`` has no dedicated kernel.
+    '''
+
+    # quantile functions with fixed scalar quantile
+    if (
+        isinstance(op, functools.partial)
+        and not op.args
+        and list(op.keywords) == ['q']
+        and np.ndim(op.keywords['q']) == 0
+        and op.func in _QUANTILES
+    ):
+        q = np.true_divide(op.keywords['q'], _QUANTILES[op.func])
+        return functools.partial(_sliding_quantile, q=q)
+
+    try:
+        return _KERNELS.get(op)
+    except TypeError:
+        # unhashable callable
+        return None
+
+
+def _sliding_window(
+    img,
+    rows,
+    cols,
+    window,
+    op,
+    out,
+    vectorized=None,
+):
+    '''
+    Perform operation on sliding windows at given offsets, using dedicated
+    kernel or batched reduction if available.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    op : callable function
+        Operation to perform on each window.
+
+    out : numpy.ndarray
+        2D array to store results in.
+
+    vectorized : bool, optional
+        Indicates whether or not ``op`` accepts an ``axis`` argument. If not
+        given, this is only assumed for known NumPy reductions.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of results.
+    '''
+
+    # use dedicated kernel if available
+    kernel = _get_kernel(op)
+    if kernel is not None:
+        record_path(getattr(kernel, 'func', kernel).__name__.lstrip('_'))
+        return kernel(img, rows, cols, window, out=out)
+
+    # reduce batches of windows if operation accepts axis argument
+    if vectorized is None:
+        vectorized = _is_reduction(op)
+
+    if vectorized:
+        record_path('sliding_reduce')
+        return _sliding_reduce(img, rows, cols, window, op, out=out)
+
+    record_path('per_window')
+
+    h, w = img.shape[:2]
+    n, m = window
+
+    # perform operation on image and store in output array
+    for p, i in enumerate(rows):
+        for q, j in enumerate(cols):
+            window_range = (
+                (max(i, 0), min(i + n, h)),
+                (max(j, 0), min(j + m, w)),
+            )
+
+            out[p][q] = op(
+                img[
+                    window_range[0][0] : window_range[0][1],
+                    window_range[1][0] : window_range[1][1],
+                ]
+            )
+
+    return out
+
+
+def _sliding_windows(
+    img,
+    rows,
+    cols,
+    window,
+    ops,
+    outs,
+    vectorized=None,
+    acc_dtype=None,
+    dilation=(1, 1),
+    finite=None,
+    sum_dtype=None,
+):
+    '''
+    Perform several operations on sliding windows at given offsets in a
+    single call, computing sums & means from the same integral images.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    ops : list
+        Operations to perform on each window.
+
+    outs : list
+        2D array to store results of each operation in.
+
+    vectorized : bool, optional
+        Indicates whether or not operations accept an ``axis`` argument.
+
+    acc_dtype : type, optional
+        Data type of integral images of kernels computing sums & means.
+
+    dilation : tuple, optional
+        Spacing between rows & columns of window.
+
+    finite : bool, optional
+        Indicates whether or not image holds only finite values, as returned
+        by ``_sums_finite``. By default, the image is checked if any
+        operation is computed from window sums.
+
+    sum_dtype : numpy.dtype, optional
+        Data type in which values of image are summed, as returned by
+        ``_sum_dtype``. By default, it is chosen for the image if any
+        operation is computed from window sums.
+
+    Returns
+    -------
+    outs : list
+        2D array of results of each operation.
+    '''
+
+    # check image once, so that all phases of dilated windows take the
+    # same path
+    names = [_MOMENTS[k] for k in map(_get_kernel, ops) if k in _MOMENTS]
+    if names and finite is None:
+        finite = _sums_finite(img)
+
+    if names and sum_dtype is None:
+        sum_dtype = _sum_dtype(img, names, acc_dtype)
+
+    # split dilated windows into undilated windows over subsampled images,
+    # one for each phase of rows & columns, so that kernels only visit
+    # pixels covered by windows
+    if tuple(dilation) != (1, 1):
+        record_path('dilated')
+        for p, row_slice, phase_rows in _dilation_phases(rows, dilation[0]):
+            for q, col_slice, phase_cols in _dilation_phases(
+                cols, dilation[1]
+            ):
+                _sliding_windows(
+                    img[p :: dilation[0], q :: dilation[1]],
+                    phase_rows,
+                    phase_cols,
+                    window,
+                    ops,
+                    [out[row_slice, col_slice] for out in outs],
+                    vectorized=vectorized,
+                    acc_dtype=acc_dtype,
+                    finite=finite,
+                    sum_dtype=sum_dtype,
+                )
+
+        return outs
+
+    # compute statistics of window sums together, from shared integral
+    # images, and remaining operations one at a time
+    moments = []
+    for op, out in zip(ops, outs):
+        kernel = _get_kernel(op)
+        if kernel in _MOMENTS:
+            record_path(kernel.__name__.lstrip('_'))
+            moments.append((_MOMENTS[kernel], out))
+        else:
+            _sliding_window(
+                img,
+                rows,
+                cols,
+                window,
+                op,
+                out,
+                vectorized=vectorized,
+            )
+
+    if moments:
+        _sliding_moments(
+            img,
+            rows,
+            cols,
+            window,
+            moments,
+            acc_dtype=acc_dtype,
+            finite=finite,
+            sum_dtype=sum_dtype,
+        )
+
+    return outs
+
+
+def _check_steps(steps, var_name):
+    '''
+    Validate steps of sliding window along both axes.
+
+    Parameters
+    ----------
+    steps : int or array-like
+        Positive integer, or 2-element array of positive integers.
+
+    var_name : str
+        Name of the variable to be tested, used to construct exception
+        message.
+
+    Returns
+    -------
+    steps : tuple
+        Step along rows & columns.
+    '''
+
+    if np.ndim(steps) == 0:
+        steps = (steps, steps)
+
+    # check if steps are array-like and of shape (2,)
+    require_array_like(steps, var_name=var_name)
+    require_shape(steps, (2,), var_name=var_name)
+
+    steps = np.asarray(steps)
+    if not np.issubdtype(steps.dtype, np.integer) or np.any(steps < 1):
+        raise ValueError(f'`{var_name}` must hold positive integers')
+
+    return int(steps[0]), int(steps[1])
+
+
+def _check_window(img, window):
+    '''
+    Validate image & window and convert image into array.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    Returns
+    -------
+    img : numpy.ndarray
+        Image array.
+    '''
+
+    # check if input is array-like
+    require_array_like(img, var_name='img')
+    # check if window is array-like and of shape (2,)
+    require_array_like(window, var_name='window')
+    require_shape(window, (2,), var_name='window')
+
+    return np.asarray(img)
+
+
+def sliding_sum(img, window, edges=False, acc_dtype=None):
+    '''
+    Compute sum over sliding window using integral image, in constant time
+    per window regardless of window size.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+
+    acc_dtype : type, optional
+        Data type of integral images, as in ``integral_image``. Integral
+        images span blocks of ``SUM_BLOCK_ROWS + n - 1`` image rows.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of window sums, shaped like the output of ``sliding_window``.
+    '''
+
+    img = _check_window(img, window)
+    h, w = img.shape[:2]
+    n, m = window
+
+    return _sliding_sum(
+        img,
+        _window_offsets(h, n, edges=edges),
+        _window_offsets(w, m, edges=edges),
+        window,
+        acc_dtype=acc_dtype,
+    )
+
+
+def sliding_mean(img, window, edges=False, acc_dtype=None):
+    '''
+    Compute mean over sliding window using integral image, in constant time
+    per window regardless of window size. Windows clipped by the edges of the
+    image are averaged over their clipped area.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+
+    acc_dtype : type, optional
+        Data type of integral images, as in ``sliding_sum``.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of window means, shaped like the output of
+        ``sliding_window``.
+    '''
+
+    img = _check_window(img, window)
+    h, w = img.shape[:2]
+    n, m = window
+
+    return _sliding_mean(
+        img,
+        _window_offsets(h, n, edges=edges),
+        _window_offsets(w, m, edges=edges),
+        window,
+        acc_dtype=acc_dtype,
+    )
+
+
+def sliding_var(img, window, edges=False, acc_dtype=None):
+    '''
+    Compute variance over sliding window using integral images of values &
+    their squares, in constant time per window regardless of window size.
+    Windows clipped by the edges of the image are taken over their clipped
+    area.
+
+    Integral images span blocks of ``SUM_BLOCK_ROWS + n - 1`` image rows.
+    Squares of integers are summed exactly in 64-bit integers, so that
+    variances of integer images are only rounded once. Floating point
+    images holding only integers, such as images returned by
+    ``open_image``, are summed as integers as well. Other floating point
+    values are shifted by the mean of each block before squaring, so that
+    variances of values far from zero keep their precision. Their variances
+    are then accurate to about ``2**-52`` times the sum of squared
+    deviations of a block, so windows of a single value may have tiny
+    positive variances.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+
+    acc_dtype : type, optional
+        Data type of integral images, as in ``sliding_sum``. A floating type
+        also sums squares in that type, even for integer images.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of window variances, shaped like the output of
+        ``sliding_window``.
+    '''
+
+    img = _check_window(img, window)
+    h, w = img.shape[:2]
+    n, m = window
+
+    return _sliding_var(
+        img,
+        _window_offsets(h, n, edges=edges),
+        _window_offsets(w, m, edges=edges),
+        window,
+        acc_dtype=acc_dtype,
+    )
+
+
+def sliding_std(img, window, edges=False, acc_dtype=None):
+    '''
+    Compute standard deviation over sliding window, as the square root of
+    ``sliding_var``.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+
+    acc_dtype : type, optional
+        Data type of integral images, as in ``sliding_var``.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of window standard deviations, shaped like the output of
+        ``sliding_window``.
+    '''
+
+    img = _check_window(img, window)
+    h, w = img.shape[:2]
+    n, m = window
+
+    return _sliding_std(
+        img,
+        _window_offsets(h, n, edges=edges),
+        _window_offsets(w, m, edges=edges),
+        window,
+        acc_dtype=acc_dtype,
+    )
+
+
+def sliding_reduce(
+    img,
+    window,
+    op,
+    dtype=np.float64,
+    edges=False,
+    chunk_size=None,
+):
+    '''
+    Perform reduction over sliding window by calling it once on batches of
+    windows, using zero-copy windowed views of the image.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    op : callable function
+        Reduction to perform on each window. It must accept an ``axis``
+        argument and reduce over all given axes, like ``np.std`` or
+        ``np.ptp``.
+
+    dtype : type, optional
+        Data type of output array.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+
+    chunk_size : int, optional
+        Approximate number of bytes of windowed data to reduce at once,
+        bounding peak memory. Defaults to ``REDUCE_CHUNK_SIZE``.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of reduced windows, shaped like the output of
+        ``sliding_window``.
+    '''
+
+    img = _check_window(img, window)
+    h, w = img.shape[:2]
+    n, m = window
+    rows = _window_offsets(h, n, edges=edges)
+    cols = _window_offsets(w, m, edges=edges)
+
+    return _sliding_reduce(
+        img,
+        rows,
+        cols,
+        window,
+        op,
+        out=np.zeros((len(rows), len(cols)), dtype=dtype),
+        chunk_size=chunk_size,
+    )
+
+
+def sliding_max(img, window, edges=False):
+    '''
+    Compute maximum over sliding window (dilation) using separable running
+    maximums, in constant time per pixel regardless of window size.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of window maximums, of the same data type as ``img`` and
+        shaped like the output of ``sliding_window``.
+    '''
+
+    img = _check_window(img, window)
+    h, w = img.shape[:2]
+    n, m = window
+
+    return _sliding_max(
+        img,
+        _window_offsets(h, n, edges=edges),
+        _window_offsets(w, m, edges=edges),
+        window,
+    )
+
+
+def sliding_min(img, window, edges=False):
+    '''
+    Compute minimum over sliding window (erosion) using separable running
+    minimums, in constant time per pixel regardless of window size.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of window minimums, of the same data type as ``img`` and
+        shaped like the output of ``sliding_window``.
+    '''
+
+    img = _check_window(img, window)
+    h, w = img.shape[:2]
+    n, m = window
+
+    return _sliding_min(
+        img,
+        _window_offsets(h, n, edges=edges),
+        _window_offsets(w, m, edges=edges),
+        window,
+    )
+
+
+def sliding_median(img, window, edges=False):
+    '''
+    Compute median over sliding window. For images of data type
+    ``numpy.uint8``, running 256-bin histograms are used, so that the cost
+    per pixel does not depend on window height and grows slowly with window
+    width.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of window medians, shaped like the output of
+        ``sliding_window``.
+    '''
+
+    img = _check_window(img, window)
+    h, w = img.shape[:2]
+    n, m = window
+
+    return _sliding_median(
+        img,
+        _window_offsets(h, n, edges=edges),
+        _window_offsets(w, m, edges=edges),
+        window,
+    )
+
+
+def sliding_percentile(img, window, q, edges=False):
+    '''
+    Compute percentile over sliding window, using linear interpolation like
+    ``np.percentile``. For images of data type ``numpy.uint8``, running
+    256-bin histograms are used, so that the cost per pixel does not depend
+    on window height and grows slowly with window width.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    q : float
+        Percentile to compute, between 0 and 100.
+
+    edges : bool, optional
+        Indicates whether or not to cover edges of image using smaller window.
+
+    Returns
+    -------
+    output_img : numpy.ndarray
+        2D array of window percentiles, shaped like the output of
+        ``sliding_window``.
+    '''
+
+    img = _check_window(img, window)
+    h, w = img.shape[:2]
+    n, m = window
+
+    if not 0 <= q <= 100:
+        raise ValueError('`q` must be between 0 and 100')
+
+    return _sliding_quantile(
+        img,
+        _window_offsets(h, n, edges=edges),
+        _window_offsets(w, m, edges=edges),
+        window,
+        np.true_divide(q, 100),
+    )
@@ -0,0 +1,384 @@
+from contextlib import contextmanager
+
+import numpy as np
+
+from .utils import validate_array
+from .colorspace import COLOR_SPACES, _RGB_to_CMYK, convert
+from .filters import integral_image
+from .imageops import _channel_axis, open_image, save_image
+
+
+class Image:
+    '''
+    Image array together with its layout & colour space, caching products
+    derived from it.
+
+    The image array is validated once, when the image is created. Derived
+    products, such as conversions to other colour spaces, channel views and
+    integral images, are computed on first use and kept until the image is
+    mutated through ``__setitem__`` or ``mutate``.
+
+    Parameters
+    ----------
+    data : array-like
+        3D image array.
+
+    space : str, optional
+        Name of colour space of image array, in
+        ``openchroma.colorspace.COLOR_SPACES``.
+
+    layout : str, optional
+        Layout of image array, ``'HWC'`` for interleaved (height, width,
+        channel) or ``'CHW'`` for planar (channel, height, width) layout.
+
+    copy : bool, optional
+        Indicates whether or not to copy image array. If not, the image array
+        is shared, and mutating it directly does not invalidate derived
+        products.
+    '''
+
+    __slots__ = ('_data', '_space', '_layout', '_version', '_cache')
+
+    def __init__(self, data, space='RGB', layout='HWC', copy=False):
+        channel_axis = _channel_axis(layout)
+        if space not in COLOR_SPACES:
+            message = '`space` must be one of ' + ', '.join(COLOR_SPACES)
+            raise ValueError(message)
+
+        # check if input is array-like, 3-dimensional & channel axis holds
+        # channels of colour space
+        data = validate_array(
+            data,
+            dim=3,
+            axis_sizes={channel_axis: len(COLOR_SPACES[space])},
+            var_name='data',
+        )
+
+        self._data = np.array(data, copy=True) if copy else data
+        self._space = space
+        self._layout = layout
+        self._version = 0
+        self._cache = {}
+
+    @classmethod
+    def open(cls, path, dtype=np.float64, layout='HWC'):
+        '''
+        Open image from given path.
+
+        Parameters
+        ----------
+        path : str, ``pathlib.Path`` object or file object
+            Path to image file.
+
+        dtype : type, optional
+            Data type of image array. If ``None``, the decoded data type is
+            kept.
+
+        layout : str, optional
+            Layout of image array.
+
+        Returns
+        -------
+        image : ``Image`` object
+            Image in RGB space.
+        '''
+
+        return cls(open_image(path, dtype=dtype, layout=layout), layout=layout)
+
+    @property
+    def data(self):
+        '''
+        Read-only view of image array.
+        '''
+
+        return self._readonly(self._data)
+
+    @property
+    def space(self):
+        '''
+        Name of colour space of image array.
+        '''
+
+        return self._space
+
+    @property
+    def layout(self):
+        '''
+        Layout of image array.
+        '''
+
+        return self._layout
+
+    @property
+    def dtype(self):
+        '''
+        Data type of image array.
+        '''
+
+        return self._data.dtype
+
+    @property
+    def shape(self):
+        '''
+        Shape of image array.
+        '''
+
+        return self._data.shape
+
+    @property
+    def version(self):
+        '''
+        Number of times image was mutated.
+        '''
+
+        return self._version
+
+    def __repr__(self):
+        return (
+            f'Image(shape={self.shape}, dtype={self.dtype}, '
+            f'space={self._space!r}, layout={self._layout!r})'
+        )
+
+    def __array__(self, dtype=None, copy=None):
+        if copy:
+            return np.array(self._data, dtype=dtype)
+
+        return np.asarray(self.data, dtype=dtype)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._invalidate()
+
+    @contextmanager
+    def mutate(self):
+        '''
+        Mutate image array in place, invalidating derived products afterwards.
+
+        Yields
+        ------
+        data : numpy.ndarray
+            Writable image array.
+        '''
+
+        try:
+            yield self._data
+        finally:
+            self._invalidate()
+
+    def _invalidate(self):
+        '''
+        Drop derived products after mutation.
+        '''
+
+        self._cache.clear()
+        self._version += 1
+
+    @staticmethod
+    def _readonly(arr):
+        '''
+        Get read-only view of array.
+
+        Parameters
+        ----------
+        arr : numpy.ndarray
+            Array to view.
+
+        Returns
+        -------
+        view : numpy.ndarray
+            Read-only view of array.
+        '''
+
+        view = arr.view()
+        view.flags.writeable = False
+
+        return view
+
+    def _cached(self, key, compute):
+        '''
+        Get derived product, computing it if it is not cached.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of derived product.
+
+        compute : callable function
+            Function computing derived product.
+
+        Returns
+        -------
+        product : object
+            Derived product.
+        '''
+
+        if key not in self._cache:
+            self._cache[key] = compute()
+
+        return self._cache[key]
+
+    def _interleaved(self):
+        '''
+        Get image array in interleaved layout.
+
+        Returns
+        -------
+        data : numpy.ndarray
+            Read-only 3D image array in interleaved layout.
+        '''
+
+        if self._layout == 'HWC':
+            return self.data
+
+        return self._cached(
+            ('layout', 'HWC'),
+            lambda: self._readonly(
+                np.ascontiguousarray(np.moveaxis(self._data, 0, -1))
+            ),
+        )
+
+    def channels(self):
+        '''
+        Get views of channels of image array.
+
+        Returns
+        -------
+        channels : tuple
+            Read-only 2D view of each channel.
+        '''
+
+        def compute():
+            planes = np.moveaxis(self._data, _channel_axis(self._layout), 0)
+            return tuple(self._readonly(plane) for plane in planes)
+
+        return self._cached(('channels',), compute)
+
+    def convert(self, space, precision=2, dtype=np.float64):
+        '''
+        Convert image to colour space.
+
+        Parameters
+        ----------
+        space : str
+            Name of colour space to convert to, in
+            ``openchroma.colorspace.COLOR_SPACES``.
+
+        precision : int, optional
+            Number of decimal places to round values to.
+
+        dtype : type, optional
+            Floating point data type of converted image array, as in
+            ``openchroma.colorspace.convert``.
+
+        Returns
+        -------
+        image : ``Image`` object
+            Image in given colour space, in the same layout. Converted images
+            are cached, and must not be mutated.
+        '''
+
+        def compute():
+            data = self._interleaved()
+            if self._space == 'RGB' and space == 'CMYK':
+                converted = _RGB_to_CMYK(
+                    data, precision=precision, dtype=dtype
+                )
+            else:
+                converted = convert(
+                    data,
+                    self._space,
+                    space,
+                    precision,
+                    dtype=dtype,
+                )
+
+            if self._layout == 'CHW':
+                converted = np.ascontiguousarray(np.moveaxis(converted, -1, 0))
+
+            return Image(
+                self._readonly(converted),
+                space=space,
+                layout=self._layout,
+            )
+
+        return self._cached(
+            ('space', space, precision, np.dtype(dtype)),
+            compute,
+        )
+
+    def to_CMYK(self, precision=2, dtype=np.float64):
+        '''
+        Convert image to CMYK space.
+
+        Parameters
+        ----------
+        precision : int, optional
+            Number of decimal places to round values to.
+
+        dtype : type, optional
+            Floating point data type of converted image array.
+
+        Returns
+        -------
+        image : ``Image`` object
+            Image in CMYK space.
+        '''
+
+        return self.convert('CMYK', precision=precision, dtype=dtype)
+
+    def integral_image(self, channel=None):
+        '''
+        Get integral image (summed-area table) of image.
+
+        Parameters
+        ----------
+        channel : int, optional
+            Index of channel. If not given, values of all channels are summed
+            together.
+
+        Returns
+        -------
+        sat : numpy.ndarray
+            Read-only 2D array of shape ``(h + 1, w + 1)``.
+        '''
+
+        def compute():
+            if channel is None:
+                data = self._interleaved()
+            else:
+                data = self.channels()[channel]
+
+            return self._readonly(integral_image(data))
+
+        return self._cached(('integral_image', channel), compute)
+
+    def save(self, path, format=None):
+        '''
+        Save image at given path, converting it to RGB space if needed.
+
+        Parameters
+        ----------
+        path : str, ``pathlib.Path`` object or file object
+            Path to file.
+
+        format : str, optional
+            Image file format.
+        '''
+
+        image = self if self._space == 'RGB' else self.convert('RGB')
+        save_image(image._data, path, format=format, layout=self._layout)
+
+    def copy(self):
+        '''
+        Copy image, without its derived products.
+
+        Returns
+        -------
+        image : ``Image`` object
+            Image holding copy of image array.
+        '''
+
+        return Image(self._data, self._space, self._layout, copy=True)
@@ -2,15 +2,166 @@ import numpy as np
 from PIL import Image
 
 from .utils import (
+    is_trusted,
     require_array_like,
     require_dim,
-    require_axis_size,
     require_shape,
+    validate_array,
+    validate_out,
 )
-from .constants import RGB_SHAPE
+from .constants import RGB_SHAPE, RGB_RANGE, RGB16_RANGE
+from .filters import (
+    _check_steps,
+    _integral_image,
+    _window_count,
+    _window_offsets,
+    _window_span,
+    _sliding_windows,
+)
+from .parallel import _parallel_sliding_window
+from .profiling import profiled, record_path
+
+# number of values truncated & rounded at once when converting to 8-bit
+CAST_BLOCK_SIZE = 2**15
+
+# channel axis of interleaved (height, width, channel) & planar (channel,
+# height, width) image layouts
+_CHANNEL_AXES = {'HWC': -1, 'CHW': 0}
+
+# outputs of batched crops
+_CROP_MODES = ('views', 'stack', 'sum', 'mean')
+
+# Pillow modes of 16-bit grayscale images
+_16BIT_MODES = ('I;16', 'I;16L', 'I;16B', 'I;16N', 'I')
+
+
+def _channel_axis(layout):
+    '''
+    Get channel axis of image layout.
+
+    Parameters
+    ----------
+    layout : str
+        Image layout, ``'HWC'`` for interleaved or ``'CHW'`` for planar image
+        arrays.
+
+    Returns
+    -------
+    axis : int
+        Channel axis of image arrays.
+    '''
+
+    if layout not in _CHANNEL_AXES:
+        message = '`layout` must be one of ' + ', '.join(_CHANNEL_AXES)
+        raise ValueError(message)
+
+    return _CHANNEL_AXES[layout]
+
+
+def _image_pixels(img, layout='HWC'):
+    '''
+    Count pixels of image array.
+
+    Parameters
+    ----------
+    img : array-like
+        3D image array.
+
+    layout : str, optional
+        Layout of image array.
+
+    Returns
+    -------
+    pixels : int
+        Number of pixels of image array.
+    '''
+
+    shape = np.shape(img)
+
+    return int(np.prod(shape)) // shape[_channel_axis(layout)]
+
+
+def _input_pixels(result, img, layout='HWC', **kwargs):
+    return _image_pixels(img, layout)
+
+
+def _output_pixels(result, layout='HWC', **kwargs):
+    return _image_pixels(result, layout)
+
+
+def _plane_pixels(result, **kwargs):
+    return int(np.prod(np.shape(result)[:2]))
+
+
+def _window_pixels(result, **kwargs):
+    # count pixels of a single output of several operations
+    if isinstance(result, dict):
+        result = next(iter(result.values()))
+    elif isinstance(result, tuple):
+        result = result[0]
+
+    return _plane_pixels(result)
+
+
+def _crop_pixels(result, img, **kwargs):
+    # count pixels of each crop, or of the integral image of pooled crops
+    if isinstance(result, list):
+        return sum(_plane_pixels(crop) for crop in result)
+
+    if result.ndim == 1:
+        return _plane_pixels(img)
+
+    return int(np.prod(result.shape[:3]))
+
+
+def to_planar(img):
+    '''
+    Convert interleaved image array into planar image array.
+
+    Parameters
+    ----------
+    img : array-like
+        3D image array in interleaved (height, width, channel) layout.
+
+    Returns
+    -------
+    planar_img : numpy.ndarray
+        3D image array in planar (channel, height, width) layout, with each
+        channel contiguous. Views of planar image arrays, such as those
+        returned by ``to_interleaved``, are converted without copying.
+    '''
+
+    # check if input is array-like & 3-dimensional
+    img = validate_array(img, dim=3, var_name='img')
+
+    return np.ascontiguousarray(np.moveaxis(img, -1, 0))
+
+
+def to_interleaved(img):
+    '''
+    Convert planar image array into interleaved image array.
 
+    Parameters
+    ----------
+    img : array-like
+        3D image array in planar (channel, height, width) layout.
 
-def open_image(path):
+    Returns
+    -------
+    interleaved_img : numpy.ndarray
+        Contiguous 3D image array in interleaved (height, width, channel)
+        layout. Views of interleaved image arrays, such as those returned by
+        ``to_planar``, are converted without copying.
+    '''
+
+    # check if input is array-like & 3-dimensional
+    img = validate_array(img, dim=3, var_name='img')
+
+    return np.ascontiguousarray(np.moveaxis(img, 0, -1))
+
+
+@profiled(pixels=_output_pixels)
+def open_image(path, dtype=np.float64, layout='HWC'):
     '''
     Open image from given path.
 
@@ -19,53 +170,242 @@ def open_image(path):
     path : str, ``pathlib.Path`` object or file object
         Path to image file.
 
+    dtype : type, optional
+        Data type of image array. If ``None``, the decoded data type is kept,
+        which is ``numpy.uint8``, or ``numpy.uint16`` for 16-bit grayscale
+        images such as 16-bit PNG or TIFF files. 8-bit values are held exactly
+        by ``numpy.float32`` and ``numpy.float16``, which take a half and a
+        quarter of the memory of ``numpy.float64``.
+
+    layout : str, optional
+        Layout of image array, ``'HWC'`` for interleaved (height, width,
+        channel) or ``'CHW'`` for planar (channel, height, width) layout.
+
     Returns
     -------
     img : numpy.ndarray
         3D image array in RGB space.
     '''
 
+    channel_axis = _channel_axis(layout)
+
     # open image file
     im = Image.open(path)
-    # convert image into array
-    img = np.array(im.convert('RGB'), dtype=np.float64)
+    record_path('mode:' + im.mode)
+
+    # keep 16-bit values of 16-bit images in native mode
+    if dtype is None and im.mode in _16BIT_MODES:
+        gray = np.asarray(im)
+        if gray.dtype != np.uint16:
+            gray = np.clip(gray, *RGB16_RANGE).astype(np.uint16)
+
+        return np.repeat(
+            np.expand_dims(gray, channel_axis),
+            RGB_SHAPE[-1],
+            axis=channel_axis,
+        )
+
+    # convert image to RGB space, unless it already is
+    if im.mode != 'RGB':
+        im = im.convert('RGB')
+
+    # view decoded pixels as array, copying them only once into a writable
+    # array of given data type & layout
+    img = np.asarray(im)
+    if channel_axis == 0:
+        return np.ascontiguousarray(np.moveaxis(img, -1, 0), dtype=dtype)
+
+    img = np.array(img, dtype=dtype)
 
     return img
 
 
-def save_image(img, path):
+def _clip_round_cast(img, out):
+    '''
+    Truncate values of floating point image array between 0 and 255 & round
+    them into 8-bit image array, in blocks of rows.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        Floating point image array.
+
+    out : numpy.ndarray
+        Image array of data type ``numpy.uint8`` to store results in.
+
+    Returns
+    -------
+    out : numpy.ndarray
+        Image array of data type ``numpy.uint8``.
+    '''
+
+    # keep scratch block in cache
+    row_size = max(img[:1].size, 1)
+    block_rows = max(CAST_BLOCK_SIZE // row_size, 1)
+    scratch = np.empty((block_rows,) + img.shape[1:], dtype=np.float64)
+
+    for top in range(0, img.shape[0], block_rows):
+        block = img[top : top + block_rows]
+        tmp = scratch[: block.shape[0]]
+        np.clip(block, *RGB_RANGE, out=tmp)
+        np.rint(tmp, out=out[top : top + block_rows], casting='unsafe')
+
+    return out
+
+
+def _to_uint8(img):
+    '''
+    Convert image array into 8-bit image array.
+
+    Parameters
+    ----------
+    img : array-like
+        Image array. 16-bit arrays are reduced to their upper 8 bits, other
+        arrays are truncated between 0 and 255, and floating point arrays are
+        rounded.
+
+    Returns
+    -------
+    img_uint8 : numpy.ndarray
+        Image array of data type ``numpy.uint8``. 8-bit arrays are returned
+        as is.
+    '''
+
+    img = np.asarray(img)
+    if img.dtype == np.uint8:
+        record_path('uint8')
+        return img
+
+    if img.dtype == np.uint16:
+        record_path('uint16_shift')
+        return (img >> 8).astype(np.uint8)
+
+    if img.dtype.kind in 'iu':
+        record_path('integer_clip')
+        return np.clip(img, *RGB_RANGE).astype(np.uint8)
+
+    record_path('clip_round_cast')
+    out = np.empty(img.shape, dtype=np.uint8)
+
+    return _clip_round_cast(img, out)
+
+
+@profiled(pixels=_input_pixels)
+def save_image(img, path, format=None, layout='HWC'):
     '''
     Save image at given path.
 
     Parameters
     ----------
     img : array-like
-        3D image array in RGB space.
+        3D image array in RGB space. Values are truncated between 0 and 255
+        and rounded, and arrays of data type ``numpy.uint16`` are saved with
+        8 bits per channel.
 
     path : str, ``pathlib.Path`` object or file object
         Path to file.
+
+    format : str, optional
+        Image file format. If not given, it is determined from the file
+        extension of ``path``.
+
+    layout : str, optional
+        Layout of image array, ``'HWC'`` for interleaved (height, width,
+        channel) or ``'CHW'`` for planar (channel, height, width) layout.
     '''
 
-    # check if input is array-like
-    require_array_like(img, var_name='img')
-    # check if last axis is 3-dimensional
-    require_axis_size(img, RGB_SHAPE[-1], axis=-1, var_name='img')
+    channel_axis = _channel_axis(layout)
 
-    # create image from array
-    im = Image.fromarray(np.array(img, dtype=np.uint8), 'RGB')
+    # check if input is array-like & channel axis is 3-dimensional
+    img = validate_array(
+        img,
+        axis_sizes={channel_axis: RGB_SHAPE[-1]},
+        var_name='img',
+    )
+
+    # create image from contiguous, interleaved 8-bit buffer
+    img = np.ascontiguousarray(np.moveaxis(_to_uint8(img), channel_axis, -1))
+    h, w = img.shape[:2]
+    im = Image.frombuffer('RGB', (w, h), img, 'raw', 'RGB', 0, 1)
     # save image
-    im.save(path)
+    im.save(path, format=format)
+
+
+def _stacked_view(channels, axis):
+    '''
+    Stack channel arrays without copying, if they are equally spaced views
+    into the same buffer.
+
+    Parameters
+    ----------
+    channels : tuple
+        Channel arrays.
 
+    axis : int
+        Axis of stacked array along which channels are stacked.
 
-def split_channels(img):
+    Returns
+    -------
+    stacked : numpy.ndarray or None
+        View of channels stacked along axis, or ``None`` if channels cannot be
+        stacked without copying.
+    '''
+
+    first = channels[0]
+    if not all(isinstance(c, np.ndarray) for c in channels):
+        return None
+
+    if any(
+        c.shape != first.shape
+        or c.strides != first.strides
+        or c.dtype != first.dtype
+        for c in channels
+    ):
+        return None
+
+    # find buffers underlying channels
+    bases = []
+    for c in channels:
+        while isinstance(c.base, np.ndarray):
+            c = c.base
+        bases.append(c if c.base is None else c.base)
+
+    if any(base is not bases[0] for base in bases):
+        return None
+
+    # check if channels are equally spaced in buffer
+    addresses = [c.__array_interface__['data'][0] for c in channels]
+    step = addresses[1] - addresses[0]
+    if step == 0 or any(
+        b - a != step for a, b in zip(addresses[:-1], addresses[1:])
+    ):
+        return None
+
+    stacked = np.lib.stride_tricks.as_strided(
+        first,
+        shape=(len(channels),) + first.shape,
+        strides=(step,) + first.strides,
+        writeable=all(c.flags.writeable for c in channels),
+    )
+
+    return np.moveaxis(stacked, 0, axis)
+
+
+@profiled(pixels=_input_pixels)
+def split_channels(img, layout='HWC'):
     '''
-    Split image array into RGB channel arrays.
+    Split image array into RGB channel arrays, without copying.
 
     Parameters
     ----------
     img : array-like
         3D image array in RGB space.
 
+    layout : str, optional
+        Layout of image array, ``'HWC'`` for interleaved (height, width,
+        channel) or ``'CHW'`` for planar (channel, height, width) layout.
+        Channels of planar image arrays are contiguous.
+
     Returns
     -------
     r : numpy.ndarray
@@ -78,26 +418,30 @@ def split_channels(img):
         2D blue channel array.
     '''
 
-    # check if input is array-like
-    require_array_like(img, var_name='img')
-    # check if last axis is 3-dimensional
-    require_axis_size(img, RGB_SHAPE[-1], axis=-1, var_name='img')
-
-    # unpack image array into channel arrays
-    r, g, b = np.transpose(img)
-    r, g, b = (
-        np.transpose(r),
-        np.transpose(g),
-        np.transpose(b),
+    channel_axis = _channel_axis(layout)
+
+    # check if input is array-like & channel axis is 3-dimensional
+    img = validate_array(
+        img,
+        axis_sizes={channel_axis: RGB_SHAPE[-1]},
+        var_name='img',
     )
 
+    # unpack views of channels
+    r, g, b = np.moveaxis(img, channel_axis, 0)
+
     return r, g, b
 
 
-def combine_channels(r, g, b):
+@profiled(pixels=_output_pixels)
+def combine_channels(r, g, b, layout='HWC'):
     '''
     Combine RGB channel arrays into image array.
 
+    Channel arrays split from the same image array by ``split_channels``, or
+    otherwise equally spaced in the same buffer, are combined without
+    copying.
+
     Parameters
     ----------
     r : array-like
@@ -109,12 +453,18 @@ def combine_channels(r, g, b):
     b : array-like
         2D blue channel array.
 
+    layout : str, optional
+        Layout of image array, ``'HWC'`` for interleaved (height, width,
+        channel) or ``'CHW'`` for planar (channel, height, width) layout.
+
     Returns
     -------
     img : numpy.ndarray
         3D image array in RGB space.
     '''
 
+    channel_axis = _channel_axis(layout)
+
     # check if inputs are array-like
     require_array_like(r, var_name='r')
     require_array_like(g, var_name='g')
@@ -124,12 +474,20 @@ def combine_channels(r, g, b):
     require_dim(g, 2)
     require_dim(b, 2)
 
+    # view channel arrays as image array, if they share a buffer
+    img = _stacked_view((r, g, b), channel_axis)
+    if img is not None:
+        record_path('view')
+        return img
+
     # pack channel arrays into image array
-    img = np.stack((r, g, b), axis=-1)
+    record_path('copy')
+    img = np.stack((r, g, b), axis=channel_axis)
 
     return img
 
 
+@profiled(pixels=_plane_pixels)
 def crop_image(img, top_left, bottom_right=None, height_width=None):
     '''
     Crop image by given coordinates and lengths.
@@ -157,10 +515,9 @@ def crop_image(img, top_left, bottom_right=None, height_width=None):
     '''
 
     # check if inputs are array-like
-    require_array_like(img, var_name='img')
+    img = validate_array(img, var_name='img')
     # check if top left coordinates are array-like and of shape (2,)
-    require_array_like(top_left, var_name='top_left')
-    require_shape(top_left, (2,))
+    top_left = validate_array(top_left, shape=(2,), var_name='top_left')
 
     top = top_left[0]
     left = top_left[1]
@@ -172,10 +529,12 @@ def crop_image(img, top_left, bottom_right=None, height_width=None):
             message += 'must be specified'
             raise ValueError(message)
 
-        # check if height & width are array-like
-        require_array_like(height_width, var_name='height_width')
-        # check if height & width are of shape (2,)
-        require_shape(height_width, (2,))
+        # check if height & width are array-like and of shape (2,)
+        height_width = validate_array(
+            height_width,
+            shape=(2,),
+            var_name='height_width',
+        )
 
         height = height_width[0]
         width = height_width[1]
@@ -189,10 +548,12 @@ def crop_image(img, top_left, bottom_right=None, height_width=None):
             message += 'can be specified'
             raise ValueError(message)
 
-        # check if bottom right coordinates are array-like
-        require_array_like(bottom_right, var_name='bottom_right')
-        # check if bottom left coordinates are of shape (2,)
-        require_shape(bottom_right, (2,))
+        # check if bottom right coordinates are array-like and of shape (2,)
+        bottom_right = validate_array(
+            bottom_right,
+            shape=(2,),
+            var_name='bottom_right',
+        )
 
         bottom = bottom_right[0] + 1
         right = bottom_right[1] + 1
@@ -202,10 +563,314 @@ def crop_image(img, top_left, bottom_right=None, height_width=None):
     return cropped_img
 
 
-def sliding_window(img, window, op=np.mean, dtype=object, edges=False):
+def _box_bounds(boxes, shape, corners):
+    '''
+    Validate boxes & clip them to the bounds of the image.
+
+    Parameters
+    ----------
+    boxes : array-like
+        2D array of boxes, one per row.
+
+    shape : tuple
+        Height & width of image.
+
+    corners : bool
+        Indicates whether boxes hold bottom right points rather than heights
+        & widths.
+
+    Returns
+    -------
+    bounds : tuple
+        Top, bottom, left & right arrays of clipped boxes, with bottoms &
+        rights past the last row & column of each box.
+    '''
+
+    # check if boxes are array-like, 2-dimensional & hold 4 integers each
+    boxes = validate_array(boxes, dim=2, axis_sizes={1: 4}, var_name='boxes')
+    if not is_trusted():
+        if boxes.size > 0 and not np.issubdtype(boxes.dtype, np.integer):
+            raise TypeError('`boxes` must hold integers')
+
+        if np.any(boxes < 0):
+            raise ValueError('`boxes` must not hold negative values')
+
+    h, w = shape
+    top, left, bottom, right = boxes.astype(np.intp, copy=False).T
+    if corners:
+        bottom = bottom + 1
+        right = right + 1
+    else:
+        bottom = top + bottom
+        right = left + right
+
+    # clip boxes to image, leaving boxes past its edges or inverted boxes
+    # empty
+    top = np.minimum(top, h)
+    left = np.minimum(left, w)
+    bottom = np.clip(bottom, top, h)
+    right = np.clip(right, left, w)
+
+    return top, bottom, left, right
+
+
+def _stack_crops(img, bounds, fill_value):
+    '''
+    Gather crops of image into an array padded to the largest crop.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    bounds : tuple
+        Top, bottom, left & right arrays of clipped boxes.
+
+    fill_value : scalar
+        Value of padding.
+
+    Returns
+    -------
+    stacked : numpy.ndarray
+        Array of crops, stacked along its first axis.
+    '''
+
+    h, w = img.shape[:2]
+    top, bottom, left, right = bounds
+    height = int(np.max(bottom - top, initial=0))
+    width = int(np.max(right - left, initial=0))
+
+    # gather rows & columns of all crops at once, repeating the last row &
+    # column of the image past its edges, then pad crops
+    rows = top[:, np.newaxis] + np.arange(height)
+    cols = left[:, np.newaxis] + np.arange(width)
+    stacked = img[
+        np.minimum(rows, h - 1)[:, :, np.newaxis],
+        np.minimum(cols, w - 1)[:, np.newaxis, :],
+    ]
+
+    outside = (rows >= bottom[:, np.newaxis])[:, :, np.newaxis] | (
+        cols >= right[:, np.newaxis]
+    )[:, np.newaxis, :]
+    stacked[outside] = fill_value
+
+    return stacked
+
+
+def _pool_crops(img, bounds, mode, acc_dtype=None):
+    '''
+    Compute sum or mean of each crop from a single integral image.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    bounds : tuple
+        Top, bottom, left & right arrays of clipped boxes.
+
+    mode : str
+        Statistic of crops, either ``'sum'`` or ``'mean'``.
+
+    acc_dtype : type, optional
+        Data type of integral image.
+
+    Returns
+    -------
+    pooled : numpy.ndarray
+        1D array of statistic of each crop.
+    '''
+
+    top, bottom, left, right = bounds
+    sat = _integral_image(img, acc_dtype=acc_dtype)
+    sums = sat[bottom, right] - sat[top, right]
+    sums -= sat[bottom, left] - sat[top, left]
+    if mode == 'sum':
+        return sums
+
+    # divide each sum by its clipped area, leaving means of empty crops
+    # undefined
+    counts = (bottom - top) * (right - left) * _window_count(img)
+    means = np.full(sums.shape, np.nan)
+    np.divide(sums, counts, out=means, where=counts > 0)
+
+    return means
+
+
+@profiled(pixels=_crop_pixels)
+def crop_images(
+    img,
+    boxes,
+    corners=False,
+    mode='views',
+    fill_value=0,
+    acc_dtype=None,
+):
+    '''
+    Crop image by a batch of boxes at once.
+
+    Boxes are validated & clipped to the image together, rather than one
+    call of ``crop_image`` per box, and stacked crops & pooled statistics
+    are computed for all boxes without a Python loop over boxes.
+
+    Parameters
+    ----------
+    img : array-like
+        2D (or higher) image array.
+
+    boxes : array-like
+        Integer array of shape ``(N, 4)``, holding the top & left coordinates
+        of each box followed by its height & width. Boxes reaching past the
+        bottom or right edges of the image are clipped to it.
+
+    corners : bool, optional
+        Indicates whether boxes hold the coordinates of their bottom right
+        points, as ``bottom_right`` of ``crop_image``, instead of their
+        heights & widths.
+
+    mode : str, optional
+        Output of crops, in ``'views'`` for a list of views of the image,
+        ``'stack'`` for an array of crops padded to the largest crop,
+        ``'sum'`` for the sum of each crop or ``'mean'`` for the mean of each
+        crop. Sums & means are computed from a single integral image, with
+        values of axes beyond the first two summed together, as in
+        ``openchroma.filters.sliding_sum``.
+
+    fill_value : scalar, optional
+        Value padding crops in ``'stack'`` mode.
+
+    acc_dtype : type, optional
+        Data type of integral image in ``'sum'`` & ``'mean'`` modes, as in
+        ``openchroma.filters.integral_image``.
+
+    Returns
+    -------
+    cropped_imgs : list or numpy.ndarray
+        List of 2D (or higher) cropped image arrays in ``'views'`` mode, array
+        of shape ``(N, height, width, ...)`` in ``'stack'`` mode, where
+        ``height`` & ``width`` are the largest height & width of clipped
+        crops, or 1D array of sums or means in ``'sum'`` & ``'mean'`` modes.
+        Means of empty crops are ``NaN``.
+    '''
+
+    # check if image is array-like & at least 2-dimensional
+    require_array_like(img, var_name='img')
+    img = np.asarray(img)
+    if img.ndim < 2:
+        raise ValueError('`img` must be at least 2-dimensional')
+
+    if mode not in _CROP_MODES:
+        message = '`mode` must be one of ' + ', '.join(_CROP_MODES)
+        raise ValueError(message)
+
+    bounds = _box_bounds(boxes, img.shape[:2], corners)
+
+    record_path(mode)
+    if mode == 'stack':
+        return _stack_crops(img, bounds, fill_value)
+
+    if mode != 'views':
+        return _pool_crops(img, bounds, mode, acc_dtype=acc_dtype)
+
+    return [
+        img[top:bottom, left:right]
+        for top, bottom, left, right in zip(*(b.tolist() for b in bounds))
+    ]
+
+
+def _window_outputs(op, out, shape, dtype):
+    '''
+    Collect operations of sliding window and create or validate their output
+    arrays.
+
+    Parameters
+    ----------
+    op : callable function, tuple, list or dict
+        Operation, or operations, to perform on each window.
+
+    out : numpy.ndarray, tuple, list, dict or None
+        Array, or arrays, to store results in, matching ``op``.
+
+    shape : tuple
+        Shape of output arrays.
+
+    dtype : type
+        Data type of created output arrays.
+
+    Returns
+    -------
+    ops : list
+        Each operation.
+
+    outs : list
+        Output array of each operation.
+    '''
+
+    if isinstance(op, dict):
+        ops = list(op.values())
+    elif isinstance(op, (tuple, list)):
+        ops = list(op)
+    else:
+        ops = [op]
+
+    if len(ops) == 0:
+        raise ValueError('`op` must hold at least one operation')
+
+    # create output arrays of zeros, unless provided by caller
+    if out is None:
+        return ops, [np.zeros(shape, dtype=dtype) for _ in ops]
+
+    if not isinstance(op, (dict, tuple, list)):
+        return ops, [validate_out(out, shape)]
+
+    if isinstance(op, dict):
+        matches = isinstance(out, dict) and set(out) == set(op)
+        keys = list(op)
+    else:
+        matches = isinstance(out, (tuple, list)) and len(out) == len(op)
+        keys = range(len(op))
+
+    if not matches:
+        raise ValueError('`out` must hold an array for each operation')
+
+    return ops, [
+        validate_out(out[key], shape, var_name=f'out[{key!r}]') for key in keys
+    ]
+
+
+@profiled(pixels=_window_pixels)
+def sliding_window(
+    img,
+    window,
+    op=np.mean,
+    dtype=object,
+    edges=False,
+    vectorized=None,
+    workers=None,
+    acc_dtype=None,
+    out=None,
+    stride=1,
+    dilation=1,
+):
     '''
     Perform operation on sliding window over image.
 
+    ``np.mean``, ``np.sum``, ``np.var`` and ``np.std`` are computed from
+    integral images of values & their squares in constant time per window,
+    ``np.max`` and ``np.min`` from separable running maximums & minimums,
+    and ``np.median`` & percentiles of 8-bit images from running histograms.
+    Integral images would carry NaN & infinite values into later windows,
+    so images holding them are reduced in batches of windows instead.
+    Other reductions accepting an ``axis`` argument are called on batches of
+    windows taken from a zero-copy windowed view of the image. Remaining
+    operations are called on each window.
+
+    Several operations can be performed in a single call, by passing them as
+    a tuple, list or dict. Validation, window offsets, worker processes and
+    shared memory are then set up once for all of them, and sums & means are
+    computed from the same integral images, as are variances & standard
+    deviations.
+
     Parameters
     ----------
     img : array-like
@@ -214,64 +879,134 @@ def sliding_window(img, window, op=np.mean, dtype=object, edges=False):
     window : array-like
         2-element array indicating shape of window.
 
-    op : callable function, optional
-        Operation to perform on each window.
+    op : callable function, tuple, list or dict, optional
+        Operation to perform on each window, or tuple or list of operations,
+        or dict of operations by name.
 
     dtype : type
-        Data type of output array
+        Data type of output arrays.
 
     edges : bool
         Indicates whether or not to cover edges of image using smaller window.
 
+    vectorized : bool, optional
+        Indicates whether or not ``op`` accepts an ``axis`` argument and can
+        reduce batches of windows at once. If not given, this is only assumed
+        for known NumPy reductions, such as ``np.std``, ``np.ptp`` or
+        ``functools.partial(np.percentile, q=90)``.
+
+    workers : int, optional
+        Number of worker processes to split output rows between. The image is
+        shared with workers through shared memory, and the output is
+        identical to that of a serial run. Unless worker processes are
+        forked, ``op`` must be picklable. By default, no worker processes are
+        used.
+
+    acc_dtype : type, optional
+        Data type of integral images used for ``np.mean``, ``np.sum``,
+        ``np.var`` and ``np.std``, as in ``openchroma.filters.sliding_var``.
+        ``numpy.int32`` is exact for 8-bit images up to 44000 values wide
+        (counting channels) with windows up to 63 rows tall, while
+        ``numpy.float32`` trades an absolute error of about ``2**-24`` times
+        the sum of ``SUM_BLOCK_ROWS + n - 1`` image rows for lower memory
+        traffic. Ignored by other operations.
+
+    out : numpy.ndarray, tuple, list or dict, optional
+        Array to store results in, instead of allocating a new array, of the
+        shape of the output image array. Its data type takes the place of
+        ``dtype``. For several operations, it must hold an array for each
+        operation, in a tuple or list of the same length or a dict of the
+        same names as ``op``.
+
+    stride : int or array-like, optional
+        Step between consecutive windows along rows & columns, as an integer
+        or 2-element array. Only windows at these steps are computed. Sums,
+        means, maximums & minimums of windows that do not overlap, such as
+        in block pooling with a stride equal to the window shape, are
+        reduced directly in a single pass over the pixels they cover.
+
+    dilation : int or array-like, optional
+        Spacing between rows & columns of window, as an integer or 2-element
+        array. A window of shape ``(n, m)`` then spans
+        ``(n', m') = ((n - 1) * d + 1, (m - 1) * e + 1)`` pixels for a
+        dilation of ``(d, e)``, but only holds ``n * m`` pixels per channel.
+        Dilated windows are computed as undilated windows over every
+        ``d``-th row & ``e``-th column of the image, so dedicated kernels
+        are used for them too. When ``edges`` is set, ``d`` & ``e`` must not
+        exceed the height & width of the image, so that each window holds
+        at least one pixel.
+
     Returns
     -------
-    output_img : numpy.ndarray
-        Output image array after sliding window operation. If ``edges`` is
-        ``True``, its shape is ``(h + n - 1, w + m - 1)``, otherwise its shape
-        is ``(h - n + 1, w - n + 1)``.
+    output_img : numpy.ndarray, tuple or dict
+        Output image array after sliding window operation, which is ``out``
+        if given. For several operations, a tuple of output image arrays in
+        the order of ``op``, or a dict of output image arrays by name if
+        ``op`` is a dict. For a stride of ``(s, t)``, its shape is
+        ``((h - n') // s + 1, (w - m') // t + 1)`` if ``edges`` is not set,
+        and ``((h + n' - 2) // s + 1, (w + m' - 2) // t + 1)`` if ``edges``
+        is set, where ``(n', m')`` is the span of the window, which is
+        ``(n, m)`` unless it is dilated. With the default stride, these are
+        ``(h - n' + 1, w - m' + 1)`` & ``(h + n' - 1, w + m' - 1)``. The
+        window of output pixel ``(i, j)`` starts at image pixel
+        ``(i * s, j * t)`` if ``edges`` is not set, and at
+        ``(i * s - n' + 1, j * t - m' + 1)`` if it is set. If ``edges`` is
+        not set, spans larger than the image leave no rows or columns of
+        output, so that the output is empty.
     '''
 
-    h, w, *_ = np.shape(img)
+    img = np.asarray(img)
+    h, w = img.shape[:2]
     n, m = window
-
-    # set up iteration ranges
-    if edges:
-        top_left_range = (
-            (-n + 1, h),
-            (-m + 1, w),
+    stride = _check_steps(stride, 'stride')
+    dilation = _check_steps(dilation, 'dilation')
+
+    if edges and ((n > 1 and dilation[0] > h) or (m > 1 and dilation[1] > w)):
+        message = '`dilation` must not be larger than `img` '
+        message += 'when `edges` is set'
+        raise ValueError(message)
+
+    if workers is not None and workers < 1:
+        raise ValueError('`workers` must be a positive integer')
+
+    # set up window offsets
+    rows = _window_offsets(h, n, edges, stride[0], dilation[0])
+    cols = _window_offsets(w, m, edges, stride[1], dilation[1])
+
+    ops, outs = _window_outputs(op, out, (len(rows), len(cols)), dtype)
+
+    # split output rows between worker processes
+    if workers is not None and workers > 1 and len(rows) > 0:
+        record_path('parallel')
+        _parallel_sliding_window(
+            img,
+            rows,
+            cols,
+            window,
+            ops,
+            outs,
+            workers,
+            vectorized=vectorized,
+            acc_dtype=acc_dtype,
+            dilation=dilation,
         )
     else:
-        top_left_range = (
-            (0, h - n + 1),
-            (0, w - m + 1),
+        _sliding_windows(
+            img,
+            rows,
+            cols,
+            window,
+            ops,
+            outs,
+            vectorized=vectorized,
+            acc_dtype=acc_dtype,
+            dilation=dilation,
         )
 
-    # set up output array shape
-    output_shape = (
-        top_left_range[0][1] - top_left_range[0][0],
-        top_left_range[1][1] - top_left_range[1][0],
-    )
-    # create output array of zeros
-    output_img = np.zeros(output_shape, dtype=dtype)
-
-    # perform operation on image and store in output array
-    p = 0
-    for i in range(*top_left_range[0]):
-        q = 0
-        for j in range(*top_left_range[1]):
-            window_range = (
-                (max(i, 0), min(i + n, h)),
-                (max(j, 0), min(j + m, w)),
-            )
-
-            output_img[p][q] = op(
-                img[
-                    window_range[0][0] : window_range[0][1],
-                    window_range[1][0] : window_range[1][1],
-                ]
-            )
-            q += 1
-
-        p += 1
-
-    return output_img
+    if isinstance(op, dict):
+        return dict(zip(op, outs))
+
+    if isinstance(op, (tuple, list)):
+        return tuple(outs)
+
+    return outs[0]
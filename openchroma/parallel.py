@@ -0,0 +1,419 @@
+import contextvars
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .filters import (
+    SUM_BLOCK_ROWS,
+    _MOMENTS,
+    _clip_windows,
+    _get_kernel,
+    _sliding_windows,
+    _sum_dtype,
+    _sums_finite,
+    _window_span,
+)
+from .utils import _release_scratch_buffers
+
+# state of sliding window shared with each worker process
+_worker_state = None
+
+# thread pools shared by all calls, by number of threads
+_thread_pools = {}
+_thread_pools_lock = threading.Lock()
+# marks threads of thread pools
+_pool_thread = threading.local()
+# identifiers of threads of thread pools
+_pool_threads = set()
+
+
+def _mark_pool_thread():
+    '''
+    Mark current thread as thread of thread pool.
+    '''
+
+    _pool_thread.active = True
+    with _thread_pools_lock:
+        _pool_threads.add(threading.get_ident())
+
+
+def _get_thread_pool(workers):
+    '''
+    Get thread pool shared by all calls, creating it if needed.
+
+    Parameters
+    ----------
+    workers : int
+        Number of threads.
+
+    Returns
+    -------
+    executor : ``concurrent.futures.ThreadPoolExecutor`` object
+        Executor with given number of threads.
+    '''
+
+    with _thread_pools_lock:
+        if workers not in _thread_pools:
+            _thread_pools[workers] = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix='openchroma-worker',
+                initializer=_mark_pool_thread,
+            )
+
+        return _thread_pools[workers]
+
+
+def _thread_map(func, items, workers=None):
+    '''
+    Call function on each item, in thread pool shared by all calls. NumPy
+    releases the GIL within loops over arrays, so that threads working on
+    separate chunks of arrays run in parallel. Each item is processed in a
+    copy of the context of the calling thread, so that code paths recorded
+    by threads count towards the instrumented call in progress.
+
+    Parameters
+    ----------
+    func : callable function
+        Function taking a single item.
+
+    items : list
+        Items to call function on.
+
+    workers : int, optional
+        Number of threads. By default, items are processed in the calling
+        thread, as they are when called from a thread of a thread pool, so
+        that threads never wait on their own pool.
+    '''
+
+    if (
+        workers is None
+        or workers < 2
+        or len(items) < 2
+        or getattr(_pool_thread, 'active', False)
+    ):
+        for item in items:
+            func(item)
+
+        return
+
+    executor = _get_thread_pool(workers)
+    futures = [
+        executor.submit(contextvars.copy_context().run, func, item)
+        for item in items
+    ]
+
+    # let all items finish before raising any exception, then release
+    # scratch buffers of pool threads, which would otherwise be kept while
+    # threads are idle
+    wait(futures)
+    with _thread_pools_lock:
+        threads = set(_pool_threads)
+
+    _release_scratch_buffers(threads)
+    for future in futures:
+        future.result()
+
+
+def _share_array(arr):
+    '''
+    Copy array into new shared memory block.
+
+    Parameters
+    ----------
+    arr : numpy.ndarray
+        Array to be shared.
+
+    Returns
+    -------
+    shm : ``multiprocessing.shared_memory.SharedMemory`` object
+        Shared memory block holding copy of array.
+    '''
+
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+
+    return shm
+
+
+def _attach_array(spec):
+    '''
+    Attach to array shared by ``_share_array``.
+
+    Parameters
+    ----------
+    spec : tuple or numpy.ndarray
+        Name, shape & data type of shared array, or array itself if it could
+        not be shared.
+
+    Returns
+    -------
+    shm : ``multiprocessing.shared_memory.SharedMemory`` object or None
+        Shared memory block holding array.
+
+    arr : numpy.ndarray
+        Array backed by shared memory block.
+    '''
+
+    if isinstance(spec, np.ndarray):
+        return None, spec
+
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    return shm, arr
+
+
+def _init_worker(state):
+    '''
+    Attach worker process to shared image & output arrays.
+
+    Parameters
+    ----------
+    state : dict
+        Shared array specifications & sliding window parameters.
+    '''
+
+    global _worker_state
+
+    img_shm, img = _attach_array(state['img'])
+    shms = [img_shm]
+    outs = []
+    for spec in state['outs']:
+        out_shm, out = (None, None)
+        if spec is not None:
+            out_shm, out = _attach_array(spec)
+
+        shms.append(out_shm)
+        outs.append(out)
+
+    # keep shared memory blocks open for as long as worker lives
+    _worker_state = dict(state, img=img, outs=outs, shms=tuple(shms))
+
+
+def _run_tile(first, last):
+    '''
+    Perform sliding window operation on tile of output rows in worker
+    process.
+
+    Parameters
+    ----------
+    first : int
+        Index of first output row of tile.
+
+    last : int
+        Index past last output row of tile.
+
+    Returns
+    -------
+    tiles : list
+        Output rows of tile of each operation, or ``None`` if they were
+        written to shared output array.
+    '''
+
+    state = _worker_state
+    img = state['img']
+    rows = state['rows'][first:last]
+    span = _window_span(state['window'][0], state['dilation'][0])
+
+    # cut tile out of image, with halo of rows covered by its windows
+    start, stop = _clip_windows(rows, span, img.shape[0])
+    top = start[0]
+    tile_img = img[top : stop[-1]]
+    tile_rows = range(rows.start - top, rows.stop - top, rows.step)
+
+    shape = (len(rows), len(state['cols']))
+    outs = [
+        np.zeros(shape, dtype=dtype) if out is None else out[first:last]
+        for out, dtype in zip(state['outs'], state['dtypes'])
+    ]
+
+    _sliding_windows(
+        tile_img,
+        tile_rows,
+        state['cols'],
+        state['window'],
+        state['ops'],
+        outs,
+        vectorized=state['vectorized'],
+        acc_dtype=state['acc_dtype'],
+        dilation=state['dilation'],
+        finite=state['finite'],
+        sum_dtype=state['sum_dtype'],
+    )
+
+    return [
+        out if shared is None else None
+        for out, shared in zip(outs, state['outs'])
+    ]
+
+
+def _tile_bounds(count, workers, period=None):
+    '''
+    Split output rows into tiles for worker processes.
+
+    Parameters
+    ----------
+    count : int
+        Number of output rows.
+
+    workers : int
+        Number of worker processes.
+
+    period : int, optional
+        Number of output rows after which phases of dilated windows repeat.
+        If given, tiles are aligned to blocks of ``SUM_BLOCK_ROWS`` rows of
+        each phase, so that integral images are computed over the same
+        blocks as in a serial run.
+
+    Returns
+    -------
+    bounds : list
+        First & past-last output row of each tile.
+    '''
+
+    # aim for two tiles per worker to balance load
+    tile_rows = -(-count // (2 * workers))
+    if period is not None:
+        block_rows = SUM_BLOCK_ROWS * period
+        tile_rows = -(-tile_rows // block_rows) * block_rows
+
+    return [
+        (first, min(first + tile_rows, count))
+        for first in range(0, count, tile_rows)
+    ]
+
+
+def _parallel_sliding_window(
+    img,
+    rows,
+    cols,
+    window,
+    ops,
+    outs,
+    workers,
+    vectorized=None,
+    acc_dtype=None,
+    dilation=(1, 1),
+):
+    '''
+    Perform sliding window operations on tiles of output rows in a pool of
+    worker processes.
+
+    The image is copied once into shared memory, and each worker reads its
+    tile together with a halo of the image rows its windows extend over.
+    Where the output data type allows it, workers write directly into
+    shared output arrays, otherwise tiles are sent back and stitched
+    together.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        2D (or higher) image array.
+
+    rows : range
+        Offsets of window rows.
+
+    cols : range
+        Offsets of window columns.
+
+    window : array-like
+        2-element array indicating shape of window.
+
+    ops : list
+        Operations to perform on each window. Unless worker processes are
+        forked, they must be picklable.
+
+    outs : list
+        2D array to store results of each operation in.
+
+    workers : int
+        Number of worker processes.
+
+    vectorized : bool, optional
+        Indicates whether or not operations accept an ``axis`` argument.
+
+    acc_dtype : type, optional
+        Data type of integral images of kernels computing sums & means.
+
+    dilation : tuple, optional
+        Spacing between rows & columns of window.
+
+    Returns
+    -------
+    outs : list
+        2D array of results of each operation.
+    '''
+
+    shms = []
+    out_shms = [None] * len(outs)
+    state = {
+        'rows': rows,
+        'cols': cols,
+        'window': tuple(window),
+        'ops': list(ops),
+        'vectorized': vectorized,
+        'acc_dtype': acc_dtype,
+        'dilation': tuple(dilation),
+        'finite': None,
+        'sum_dtype': None,
+        'dtypes': [out.dtype for out in outs],
+        'img': img,
+        'outs': [None] * len(outs),
+    }
+
+    try:
+        # share image & output arrays unless they hold Python objects
+        if not img.dtype.hasobject:
+            shm = _share_array(img)
+            shms.append(shm)
+            state['img'] = (shm.name, img.shape, img.dtype)
+
+        for i, out in enumerate(outs):
+            if not out.dtype.hasobject:
+                out_shms[i] = _share_array(out)
+                shms.append(out_shms[i])
+                state['outs'][i] = (out_shms[i].name, out.shape, out.dtype)
+
+        # align tiles to blocks only for kernels summing blocks of rows, and
+        # decide how these kernels sum the whole image, so that all tiles
+        # take the same path
+        period = None
+        names = [_MOMENTS[k] for k in map(_get_kernel, ops) if k in _MOMENTS]
+        if names:
+            period = dilation[0] // math.gcd(rows.step, dilation[0])
+            state['finite'] = _sums_finite(img)
+            state['sum_dtype'] = _sum_dtype(img, names, acc_dtype)
+
+        bounds = _tile_bounds(len(rows), workers, period=period)
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(bounds)),
+            initializer=_init_worker,
+            initargs=(state,),
+        ) as executor:
+            futures = [
+                (first, last, executor.submit(_run_tile, first, last))
+                for first, last in bounds
+            ]
+
+            # stitch tiles together
+            for first, last, future in futures:
+                for out, tile in zip(outs, future.result()):
+                    if tile is not None:
+                        out[first:last] = tile
+
+        # copy results out of shared output arrays
+        for out, out_shm in zip(outs, out_shms):
+            if out_shm is not None:
+                out[...] = np.ndarray(
+                    out.shape, dtype=out.dtype, buffer=out_shm.buf
+                )
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+    return outs
@@ -0,0 +1,317 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections import Counter, namedtuple
+
+import numpy as np
+
+# measurements of a single call of an instrumented function, whose nbytes
+# only counts bytes of returned arrays that are not views of arguments, and
+# not bytes of inputs, temporaries or arrays written into through out=
+CallRecord = namedtuple(
+    'CallRecord',
+    ['function', 'seconds', 'pixels', 'nbytes', 'paths'],
+)
+
+# registered callbacks, replaced rather than mutated so that they can be
+# iterated without locking
+_callbacks = ()
+_callbacks_lock = threading.Lock()
+
+# indicates whether any callback is registered, which is the only check made
+# by instrumented functions while profiling is disabled
+_enabled = False
+
+# code paths taken by innermost instrumented call of current context
+_current_paths = contextvars.ContextVar('openchroma_paths', default=None)
+
+
+def add_callback(callback):
+    '''
+    Register callback receiving measurements of each call of instrumented
+    functions, enabling profiling.
+
+    Parameters
+    ----------
+    callback : callable function
+        Function taking a ``CallRecord`` object. It is called in the thread
+        the instrumented function was called in, right after the call
+        returns.
+    '''
+
+    global _callbacks, _enabled
+
+    with _callbacks_lock:
+        _callbacks = _callbacks + (callback,)
+        _enabled = True
+
+
+def remove_callback(callback):
+    '''
+    Unregister callback, disabling profiling if no callbacks remain.
+
+    Parameters
+    ----------
+    callback : callable function
+        Function registered with ``add_callback``.
+    '''
+
+    global _callbacks, _enabled
+
+    with _callbacks_lock:
+        callbacks = list(_callbacks)
+        if callback not in callbacks:
+            raise ValueError('`callback` is not registered')
+
+        callbacks.remove(callback)
+        _callbacks = tuple(callbacks)
+        _enabled = len(_callbacks) > 0
+
+
+def is_enabled():
+    '''
+    Check if profiling is enabled.
+
+    Returns
+    -------
+    enabled : bool
+        Indicates whether or not any callback is registered.
+    '''
+
+    return _enabled
+
+
+def record_path(path):
+    '''
+    Record code path taken by innermost instrumented call in progress. Does
+    nothing while profiling is disabled.
+
+    Parameters
+    ----------
+    path : str
+        Name of code path, such as the name of a kernel.
+    '''
+
+    if not _enabled:
+        return
+
+    paths = _current_paths.get()
+    if paths is not None:
+        paths.append(path)
+
+
+def _allocated_bytes(result, inputs):
+    '''
+    Count bytes of arrays returned by call that do not share memory with its
+    inputs.
+
+    Parameters
+    ----------
+    result : object
+        Return value of call. Arrays within tuples, lists & dicts are counted
+        too.
+
+    inputs : iterable
+        Arguments of call.
+
+    Returns
+    -------
+    nbytes : int
+        Number of bytes of returned arrays that are not views of inputs.
+    '''
+
+    arrays = result if isinstance(result, (tuple, list)) else (result,)
+    if isinstance(result, dict):
+        arrays = result.values()
+    inputs = [arg for arg in inputs if isinstance(arg, np.ndarray)]
+
+    nbytes = 0
+    for arr in arrays:
+        if isinstance(arr, np.ndarray) and not any(
+            np.may_share_memory(arr, arg) for arg in inputs
+        ):
+            nbytes += arr.nbytes
+
+    return nbytes
+
+
+def profiled(pixels):
+    '''
+    Instrument function, so that each call is measured while profiling is
+    enabled.
+
+    While profiling is disabled, the instrumented function only checks a
+    single flag before calling the function.
+
+    Parameters
+    ----------
+    pixels : callable function
+        Function computing the number of pixels processed by a call, taking
+        its return value followed by its arguments as keyword arguments.
+
+    Returns
+    -------
+    decorator : callable function
+        Decorator instrumenting function.
+    '''
+
+    def decorator(func):
+        name = '%s.%s' % (func.__module__, func.__qualname__)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            paths = []
+            token = _current_paths.set(paths)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                _current_paths.reset(token)
+
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            record = CallRecord(
+                function=name,
+                seconds=seconds,
+                pixels=int(pixels(result, **arguments.arguments)),
+                nbytes=_allocated_bytes(result, arguments.arguments.values()),
+                paths=tuple(paths),
+            )
+            for callback in _callbacks:
+                callback(record)
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class FunctionStats:
+    '''
+    Measurements of calls of instrumented function, aggregated by
+    ``Profile``. Allocated bytes only cover returned arrays that are not
+    views of arguments, so that inputs & temporaries are not counted.
+    '''
+
+    __slots__ = ('calls', 'seconds', 'pixels', 'nbytes', 'paths')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.pixels = 0
+        self.nbytes = 0
+        self.paths = Counter()
+
+    def add(self, record):
+        '''
+        Add measurements of call.
+
+        Parameters
+        ----------
+        record : ``CallRecord`` object
+            Measurements of call.
+        '''
+
+        self.calls += 1
+        self.seconds += record.seconds
+        self.pixels += record.pixels
+        self.nbytes += record.nbytes
+        self.paths.update(record.paths)
+
+    @property
+    def megapixels_per_second(self):
+        '''
+        Number of megapixels processed per second of calls.
+        '''
+
+        if self.seconds == 0:
+            return 0.0
+
+        return self.pixels / 1e6 / self.seconds
+
+
+class Profile:
+    '''
+    Context manager aggregating measurements of instrumented calls made in
+    any thread while it is active.
+
+    Attributes
+    ----------
+    stats : dict
+        ``FunctionStats`` object of each instrumented function called, by
+        qualified name of function.
+    '''
+
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        add_callback(self.add)
+
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_callback(self.add)
+
+    def add(self, record):
+        '''
+        Add measurements of call.
+
+        Parameters
+        ----------
+        record : ``CallRecord`` object
+            Measurements of call.
+        '''
+
+        with self._lock:
+            if record.function not in self.stats:
+                self.stats[record.function] = FunctionStats()
+
+            self.stats[record.function].add(record)
+
+    def report(self):
+        '''
+        Summarize aggregated measurements, slowest functions first.
+
+        Returns
+        -------
+        report : str
+            Table of calls, total time, throughput, memory allocated for
+            outputs & code paths of each function.
+        '''
+
+        lines = [
+            '%-40s %6s %10s %10s %10s  %s'
+            % ('function', 'calls', 'time (s)', 'MP/s', 'alloc (MB)', 'paths')
+        ]
+        by_time = sorted(
+            self.stats.items(),
+            key=lambda item: item[1].seconds,
+            reverse=True,
+        )
+        for name, stats in by_time:
+            paths = ', '.join(
+                '%s x%d' % item for item in sorted(stats.paths.items())
+            )
+            lines.append(
+                '%-40s %6d %10.4f %10.2f %10.2f  %s'
+                % (
+                    name,
+                    stats.calls,
+                    stats.seconds,
+                    stats.megapixels_per_second,
+                    stats.nbytes / 2**20,
+                    paths,
+                )
+            )
+
+        return '\n'.join(lines)
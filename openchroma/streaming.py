@@ -0,0 +1,386 @@
+import os
+import struct
+
+import numpy as np
+from PIL import Image
+
+from .utils import validate_array
+from .constants import RGB_SHAPE, CMYK_SHAPE, CMYK_RANGE
+from .colorspace import _RGB_to_CMYK
+
+# target number of bytes of CMYK values converted at once
+STRIP_SIZE = 2**25
+
+# TIFF field types & their struct formats
+_TIFF_SHORT = 3
+_TIFF_LONG = 4
+_TIFF_RATIONAL = 5
+_TIFF_LONG8 = 16
+_TIFF_FORMATS = {
+    _TIFF_SHORT: 'H',
+    _TIFF_LONG: 'I',
+    _TIFF_RATIONAL: 'I',
+    _TIFF_LONG8: 'Q',
+}
+
+# largest file offset of classic TIFF files
+_TIFF_MAX_OFFSET = 2**32 - 1
+
+
+def _open_pillow_source(path):
+    '''
+    Open image file with Pillow, mapping pixel data into memory if it is
+    stored uncompressed.
+
+    Parameters
+    ----------
+    path : str
+        Path to image file.
+
+    Returns
+    -------
+    rgb : numpy.ndarray
+        3D image array of data type ``numpy.uint8`` in RGB space.
+    '''
+
+    with Image.open(path) as im:
+        width, height = im.size
+        if im.mode == 'RGB' and len(im.tile) == 1:
+            codec, extents, offset, args = im.tile[0][:4]
+            if isinstance(args, str):
+                args = (args, 0, 1)
+
+            rawmode, stride, orientation = args[:3]
+            if (
+                codec == 'raw'
+                and tuple(extents) == (0, 0, width, height)
+                and rawmode == 'RGB'
+                and stride in (0, width * RGB_SHAPE[-1])
+                and orientation == 1
+            ):
+                return np.memmap(
+                    path,
+                    dtype=np.uint8,
+                    mode='r',
+                    offset=offset,
+                    shape=(height, width) + RGB_SHAPE,
+                )
+
+        # compressed images can only be decoded as a whole
+        return np.asarray(im.convert('RGB'))
+
+
+def _open_source(src, shape=None, dtype=np.uint8):
+    '''
+    Open RGB image file as array whose rows are only read from disk when
+    accessed.
+
+    Parameters
+    ----------
+    src : str or ``pathlib.Path`` object
+        Path to image file.
+
+    shape : array-like, optional
+        Height & width of raw image files.
+
+    dtype : type, optional
+        Data type of raw image files.
+
+    Returns
+    -------
+    rgb : numpy.ndarray
+        3D image array in RGB space.
+    '''
+
+    path = os.fspath(src)
+    if os.path.splitext(path)[1].lower() == '.npy':
+        return np.load(path, mmap_mode='r')
+
+    if shape is not None:
+        return np.memmap(
+            path,
+            dtype=dtype,
+            mode='r',
+            shape=tuple(shape) + RGB_SHAPE,
+        )
+
+    return _open_pillow_source(path)
+
+
+def _convert_strips(rgb, strip_height, precision=2, bit_depth=8):
+    '''
+    Convert image array from RGB space to CMYK space in horizontal strips.
+
+    Parameters
+    ----------
+    rgb : numpy.ndarray
+        3D image array in RGB space.
+
+    strip_height : int
+        Number of rows per strip.
+
+    precision : int, optional
+        Number of decimal places to round values to.
+
+    bit_depth : int, optional
+        Number of bits of RGB values, either 8 or 16.
+
+    Yields
+    ------
+    cmyk : numpy.ndarray
+        3D strip array in CMYK space.
+    '''
+
+    for top in range(0, rgb.shape[0], strip_height):
+        yield _RGB_to_CMYK(
+            rgb[top : top + strip_height],
+            precision=precision,
+            bit_depth=bit_depth,
+        )
+
+
+def _tiff_ifd(entries, ifd_offset, bigtiff=False):
+    '''
+    Encode TIFF image file directory.
+
+    Parameters
+    ----------
+    entries : list
+        Tag, field type & values of each field. Rational values are given as
+        numerator & denominator pairs.
+
+    ifd_offset : int
+        File offset where the directory is written.
+
+    bigtiff : bool, optional
+        Indicates whether or not to encode the directory in BigTIFF format.
+
+    Returns
+    -------
+    ifd : bytes
+        Encoded directory, followed by values that do not fit into their
+        fields.
+    '''
+
+    count_format, offset_format = ('Q', 'Q') if bigtiff else ('I', 'I')
+    field_size = struct.calcsize(offset_format)
+    head_format = '<Q' if bigtiff else '<H'
+    ifd_size = struct.calcsize(head_format)
+    ifd_size += len(entries) * (4 + 2 * field_size) + field_size
+
+    ifd = bytearray(struct.pack(head_format, len(entries)))
+    values_data = bytearray()
+    for tag, field_type, values in sorted(entries):
+        data = struct.pack(
+            '<%d%s' % (len(values), _TIFF_FORMATS[field_type]),
+            *values,
+        )
+        count = len(values)
+        if field_type == _TIFF_RATIONAL:
+            count //= 2
+
+        # store values in field if they fit, otherwise after directory
+        if len(data) <= field_size:
+            field = data.ljust(field_size, b'\0')
+        else:
+            offset = ifd_offset + ifd_size + len(values_data)
+            field = struct.pack('<' + offset_format, offset)
+            # values of all field types span an even number of bytes, which
+            # keeps them word-aligned
+            values_data += data
+
+        ifd += struct.pack('<HH' + count_format, tag, field_type, count)
+        ifd += field
+
+    # offset of next directory
+    ifd += bytes(field_size)
+
+    return bytes(ifd + values_data)
+
+
+def _write_tiff(f, strips, shape, strip_height):
+    '''
+    Write strips of CMYK values into uncompressed 8-bit CMYK TIFF file.
+
+    Parameters
+    ----------
+    f : file object
+        Binary file to write to.
+
+    strips : iterable
+        3D strip arrays in CMYK space, of ``strip_height`` rows each, except
+        for the last one.
+
+    shape : tuple
+        Height & width of image.
+
+    strip_height : int
+        Number of rows per strip.
+    '''
+
+    height, width = shape
+    strip_count = -(-height // strip_height)
+    size = height * width * CMYK_SHAPE[-1]
+
+    # switch to BigTIFF if offsets may not fit into 32 bits
+    bigtiff = size + 16 * strip_count + 1024 > _TIFF_MAX_OFFSET
+    if bigtiff:
+        header_format = '<2sHHHQ'
+        header_values = (b'II', 43, 8, 0)
+        offset_type = _TIFF_LONG8
+    else:
+        header_format = '<2sHI'
+        header_values = (b'II', 42)
+        offset_type = _TIFF_LONG
+
+    # reserve header until offset of directory is known
+    f.write(bytes(struct.calcsize(header_format)))
+
+    offsets = []
+    byte_counts = []
+    for strip in strips:
+        # scale percentages to 8-bit ink values
+        np.multiply(strip, 255 / CMYK_RANGE[1], out=strip)
+        np.round(strip, out=strip)
+        data = strip.astype(np.uint8)
+
+        offsets.append(f.tell())
+        byte_counts.append(data.nbytes)
+        f.write(data.data)
+
+    ifd_offset = f.tell()
+    entries = [
+        (256, _TIFF_LONG, (width,)),
+        (257, _TIFF_LONG, (height,)),
+        (258, _TIFF_SHORT, (8,) * CMYK_SHAPE[-1]),
+        # no compression
+        (259, _TIFF_SHORT, (1,)),
+        # separated photometric interpretation
+        (262, _TIFF_SHORT, (5,)),
+        (273, offset_type, tuple(offsets)),
+        (277, _TIFF_SHORT, (CMYK_SHAPE[-1],)),
+        (278, _TIFF_LONG, (strip_height,)),
+        (279, offset_type, tuple(byte_counts)),
+        (282, _TIFF_RATIONAL, (72, 1)),
+        (283, _TIFF_RATIONAL, (72, 1)),
+        # chunky planar configuration
+        (284, _TIFF_SHORT, (1,)),
+        # resolution in inches
+        (296, _TIFF_SHORT, (2,)),
+        # CMYK ink set
+        (332, _TIFF_SHORT, (1,)),
+    ]
+    f.write(_tiff_ifd(entries, ifd_offset, bigtiff=bigtiff))
+
+    f.seek(0)
+    f.write(struct.pack(header_format, *header_values, ifd_offset))
+
+
+def _write_npy_header(f, shape):
+    '''
+    Write header of ``.npy`` file holding ``numpy.float64`` values.
+
+    Parameters
+    ----------
+    f : file object
+        Binary file to write to.
+
+    shape : tuple
+        Shape of array.
+    '''
+
+    header = {
+        'descr': np.lib.format.dtype_to_descr(np.dtype(np.float64)),
+        'fortran_order': False,
+        'shape': shape,
+    }
+    np.lib.format.write_array_header_1_0(f, header)
+
+
+def stream_RGB_to_CMYK(
+    src,
+    dst,
+    precision=2,
+    strip_height=None,
+    shape=None,
+    dtype=np.uint8,
+    bit_depth=8,
+):
+    '''
+    Convert image file from RGB space to CMYK space, one horizontal strip at
+    a time.
+
+    Only the strip being converted is held in memory, so that images larger
+    than memory can be converted. ``.npy`` files, raw files and images stored
+    uncompressed, such as PPM or uncompressed TIFF files, are mapped into
+    memory and read strip by strip. Other image files are decoded by Pillow
+    as a whole, with 8 bits per channel.
+
+    Parameters
+    ----------
+    src : str or ``pathlib.Path`` object
+        Path to image file in RGB space. Files with extension ``.npy`` hold 3D
+        image arrays. Files are read as raw image arrays if ``shape`` is
+        given.
+
+    dst : str or ``pathlib.Path`` object
+        Path to output file. Files with extension ``.tif`` or ``.tiff`` are
+        written as uncompressed 8-bit CMYK TIFF files, in BigTIFF format if
+        larger than 4 GB. Files with extension ``.npy`` hold 3D arrays of
+        CMYK values of data type ``numpy.float64``. Other files are written
+        as raw arrays of such values, in native byte order.
+
+    precision : int, optional
+        Number of decimal places to round values to.
+
+    strip_height : int, optional
+        Number of rows converted at once. By default, strips hold about
+        ``STRIP_SIZE`` bytes of CMYK values.
+
+    shape : array-like, optional
+        Height & width of raw source file.
+
+    dtype : type, optional
+        Data type of raw source file.
+
+    bit_depth : int, optional
+        Number of bits of RGB values, 8 for values between 0 and 255, or 16
+        for values between 0 and 65535, as in ``RGB_to_CMYK``.
+    '''
+
+    # check if image is 3-dimensional & last axis is 3-dimensional
+    rgb = validate_array(
+        _open_source(src, shape=shape, dtype=dtype),
+        dim=3,
+        axis_sizes={-1: RGB_SHAPE[-1]},
+        var_name='src',
+    )
+
+    height, width = rgb.shape[:2]
+    if strip_height is None:
+        row_size = width * CMYK_SHAPE[-1] * np.dtype(np.float64).itemsize
+        strip_height = max(1, STRIP_SIZE // max(row_size, 1))
+    elif strip_height < 1:
+        raise ValueError('`strip_height` must be a positive integer')
+
+    if bit_depth not in (8, 16):
+        raise ValueError('`bit_depth` must be 8 or 16')
+
+    strips = _convert_strips(
+        rgb,
+        strip_height,
+        precision=precision,
+        bit_depth=bit_depth,
+    )
+    extension = os.path.splitext(os.fspath(dst))[1].lower()
+
+    with open(dst, 'wb') as f:
+        if extension in ('.tif', '.tiff'):
+            _write_tiff(f, strips, (height, width), strip_height)
+            return
+
+        if extension == '.npy':
+            _write_npy_header(f, (height, width) + CMYK_SHAPE)
+
+        for strip in strips:
+            f.write(strip.data)
@@ -1,5 +1,102 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 import numpy as np
 
+# largest number of bytes of scratch buffer kept per thread & temporary
+SCRATCH_BUFFER_SIZE = 2**28
+# largest number of bytes of scratch buffers kept by all threads together
+SCRATCH_TOTAL_SIZE = 2**28
+
+# indicates whether or not checks are skipped in all threads
+_trusted_global = False
+# indicates whether or not checks are skipped in current context
+_trusted_context = ContextVar('openchroma_trusted', default=False)
+
+# scratch buffers of all threads, by thread & name of temporary, from least
+# to most recently used
+_scratch_buffers = OrderedDict()
+_scratch_size = 0
+_scratch_lock = threading.Lock()
+
+
+def set_trusted(trusted):
+    '''
+    Turn trusted mode on or off globally. In trusted mode, inputs are assumed
+    to be valid and checks are skipped.
+
+    Parameters
+    ----------
+    trusted : bool
+        Indicates whether or not to skip checks.
+    '''
+
+    global _trusted_global
+
+    _trusted_global = bool(trusted)
+
+
+@contextmanager
+def trusted(trusted=True):
+    '''
+    Turn trusted mode on or off within context, such as in a hot loop over
+    inputs known to be valid. The mode only applies to the current thread or
+    asyncio task.
+
+    Parameters
+    ----------
+    trusted : bool, optional
+        Indicates whether or not to skip checks.
+    '''
+
+    token = _trusted_context.set(bool(trusted))
+    try:
+        yield
+    finally:
+        _trusted_context.reset(token)
+
+
+def is_trusted():
+    '''
+    Check if trusted mode is on.
+
+    Returns
+    -------
+    trusted : bool
+        Indicates whether or not checks are skipped.
+    '''
+
+    return _trusted_global or _trusted_context.get()
+
+
+def _shape(arr):
+    '''
+    Get shape of array-like object, without converting arrays.
+
+    Parameters
+    ----------
+    arr : any
+        Array-like object.
+
+    Returns
+    -------
+    shape : tuple
+        Shape of object.
+    '''
+
+    if isinstance(arr, np.ndarray):
+        return arr.shape
+
+    # flat sequences of scalars, such as coordinates
+    if isinstance(arr, (list, tuple)) and not any(
+        isinstance(x, (list, tuple, np.ndarray)) for x in arr
+    ):
+        return (len(arr),)
+
+    return np.shape(arr)
+
 
 def is_array_like(arr):
     '''
@@ -35,7 +132,7 @@ def require_array_like(arr, var_name='Array', exception=TypeError):
         Exception to raise if test fails.
     '''
 
-    if not is_array_like(arr):
+    if not is_trusted() and not is_array_like(arr):
         message = f'`{var_name}` must be an array-like object'
         raise exception(message)
 
@@ -57,11 +154,10 @@ def is_shape(arr, shape):
         Indicates whether given array is of desired shape.
     '''
 
-    arr_shape = np.shape(arr)
     if np.isscalar(shape):
         shape = (shape,)
 
-    shapes_equal = np.array_equal(arr_shape, shape)
+    shapes_equal = _shape(arr) == tuple(shape)
 
     return shapes_equal
 
@@ -82,7 +178,7 @@ def require_shape(arr, shape, var_name='Array', exception=ValueError):
         Exception to raise if test fails.
     '''
 
-    if not is_shape(arr, shape):
+    if not is_trusted() and not is_shape(arr, shape):
         message = f'`{var_name}` must be of shape {shape}'
         raise exception(message)
 
@@ -104,8 +200,7 @@ def is_dim(arr, dim):
         Indicates whether given array is of desired dimension.
     '''
 
-    arr_shape = np.shape(arr)
-    dim_equal = len(arr_shape) == dim
+    dim_equal = len(_shape(arr)) == dim
 
     return dim_equal
 
@@ -126,7 +221,7 @@ def require_dim(arr, dim, var_name='Array', exception=ValueError):
         Exception to raise if test fails.
     '''
 
-    if not is_dim(arr, dim):
+    if not is_trusted() and not is_dim(arr, dim):
         message = f'`{var_name}` must be {dim}-dimensional'
         raise exception(message)
 
@@ -150,8 +245,7 @@ def is_axis_size(arr, size, axis=0):
         Indicates whether given axis of array is of desired size.
     '''
 
-    arr_shape = np.shape(arr)
-    size_equal = arr_shape[axis] == size
+    size_equal = _shape(arr)[axis] == size
 
     return size_equal
 
@@ -180,6 +274,188 @@ def require_axis_size(
         Exception to raise if test fails.
     '''
 
-    if not is_axis_size(arr, size, axis=axis):
+    if not is_trusted() and not is_axis_size(arr, size, axis=axis):
         message = f'`{var_name}` must be of size {size} at axis {axis}'
         raise exception(message)
+
+
+def validate_array(
+    arr,
+    shape=None,
+    dim=None,
+    axis_sizes=None,
+    var_name='Array',
+):
+    '''
+    Check array-like object in a single pass, converting it into an array
+    once. In trusted mode, the object is only converted.
+
+    Parameters
+    ----------
+    arr : any
+        Object to be tested.
+    shape : array-like, optional
+        Desired shape.
+    dim : int, optional
+        Desired dimension.
+    axis_sizes : dict, optional
+        Desired size of axes, keyed by axis.
+    var_name : str, optional
+        Name of the variable to be tested, used to construct exception message.
+
+    Returns
+    -------
+    arr : numpy.ndarray
+        Object converted into array.
+    '''
+
+    if is_trusted():
+        return np.asarray(arr)
+
+    if not is_array_like(arr):
+        message = f'`{var_name}` must be an array-like object'
+        raise TypeError(message)
+
+    arr = np.asarray(arr)
+    if shape is not None and not is_shape(arr, shape):
+        message = f'`{var_name}` must be of shape {shape}'
+        raise ValueError(message)
+
+    if dim is not None and arr.ndim != dim:
+        message = f'`{var_name}` must be {dim}-dimensional'
+        raise ValueError(message)
+
+    for axis, size in (axis_sizes or {}).items():
+        if not -arr.ndim <= axis < arr.ndim or arr.shape[axis] != size:
+            message = f'`{var_name}` must be of size {size} at axis {axis}'
+            raise ValueError(message)
+
+    return arr
+
+
+def validate_out(out, shape, dtype=None, var_name='out'):
+    '''
+    Check output array provided by caller. In trusted mode, checks are
+    skipped.
+
+    Parameters
+    ----------
+    out : any
+        Object to be tested.
+    shape : array-like
+        Desired shape.
+    dtype : type, optional
+        Desired data type.
+    var_name : str, optional
+        Name of the variable to be tested, used to construct exception message.
+
+    Returns
+    -------
+    out : numpy.ndarray
+        Output array.
+    '''
+
+    if is_trusted():
+        return out
+
+    if not isinstance(out, np.ndarray):
+        message = f'`{var_name}` must be a numpy.ndarray'
+        raise TypeError(message)
+
+    if out.shape != tuple(shape):
+        message = f'`{var_name}` must be of shape {tuple(shape)}'
+        raise ValueError(message)
+
+    if dtype is not None and out.dtype != dtype:
+        message = f'`{var_name}` must be of data type {np.dtype(dtype)}'
+        raise ValueError(message)
+
+    if not out.flags.writeable:
+        message = f'`{var_name}` must be writable'
+        raise ValueError(message)
+
+    return out
+
+
+def _scratch_array(name, shape, dtype):
+    '''
+    Get uninitialized array backed by scratch buffer of current thread.
+
+    Each temporary has its own buffer, grown to the largest size requested
+    and reused across calls, so that repeated calls on inputs of the same
+    size do not allocate temporaries. Temporaries larger than
+    ``SCRATCH_BUFFER_SIZE`` bytes are allocated on each call, and least
+    recently used buffers of any thread are released once all buffers
+    together exceed ``SCRATCH_TOTAL_SIZE`` bytes. Arrays keep their buffer
+    alive, so that released buffers stay valid while in use.
+
+    Parameters
+    ----------
+    name : str
+        Name of temporary. The array is only valid until the same name is
+        requested again in the same thread, and must not be returned to
+        callers.
+    shape : tuple
+        Shape of array.
+    dtype : type
+        Data type of array.
+
+    Returns
+    -------
+    arr : numpy.ndarray
+        Array backed by scratch buffer.
+    '''
+
+    global _scratch_size
+
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+    if nbytes > SCRATCH_BUFFER_SIZE:
+        return np.empty(shape, dtype=dtype)
+
+    key = (threading.get_ident(), name)
+    with _scratch_lock:
+        buffer = _scratch_buffers.pop(key, None)
+        if buffer is not None:
+            _scratch_size -= buffer.size
+
+        if buffer is None or buffer.size < nbytes:
+            buffer = np.empty(nbytes, dtype=np.uint8)
+
+        # release least recently used buffers to make room
+        while (
+            _scratch_buffers
+            and _scratch_size + buffer.size > SCRATCH_TOTAL_SIZE
+        ):
+            _, released = _scratch_buffers.popitem(last=False)
+            _scratch_size -= released.size
+
+        _scratch_buffers[key] = buffer
+        _scratch_size += buffer.size
+
+    return buffer[:nbytes].view(dtype).reshape(shape)
+
+
+def _release_scratch_buffers(threads):
+    '''
+    Release scratch buffers of temporaries kept by given threads.
+
+    Parameters
+    ----------
+    threads : collection
+        Identifiers of threads, as returned by ``threading.get_ident``.
+    '''
+
+    global _scratch_size
+
+    with _scratch_lock:
+        for key in [key for key in _scratch_buffers if key[0] in threads]:
+            _scratch_size -= _scratch_buffers.pop(key).size
+
+
+def clear_scratch_buffers():
+    '''
+    Release scratch buffers of temporaries kept by current thread.
+    '''
+
+    _release_scratch_buffers({threading.get_ident()})
@@ -0,0 +1,168 @@
+import asyncio
+import io
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from openchroma import aio, imageops
+from openchroma.imageops import open_image
+
+
+def generate_random_image(height, width):
+    img = np.random.randint(0, 256, (height, width, 3))
+
+    return img.astype(np.uint8)
+
+
+def encode_image(img):
+    f = io.BytesIO()
+    imageops.save_image(img, f, format='PNG')
+
+    return f.getvalue()
+
+
+class AsyncReader:
+    def __init__(self, data):
+        self.data = data
+
+    async def read(self):
+        await asyncio.sleep(0)
+        return self.data
+
+
+class AsyncWriter:
+    def __init__(self):
+        self.data = b''
+
+    async def write(self, data):
+        await asyncio.sleep(0)
+        self.data += data
+
+
+class DrainingWriter:
+    def __init__(self):
+        self.data = b''
+        self.drained = False
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        await asyncio.sleep(0)
+        self.drained = True
+
+
+async def iterate_chunks(data, size):
+    for i in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[i : i + size]
+
+
+def stream_reader(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+
+    return reader
+
+
+open_image_parameters = [
+    lambda data, path: path,
+    lambda data, path: str(path),
+    lambda data, path: data,
+    lambda data, path: bytearray(data),
+    lambda data, path: io.BytesIO(data),
+    lambda data, path: AsyncReader(data),
+    lambda data, path: stream_reader(data),
+    lambda data, path: iterate_chunks(data, 100),
+]
+
+
+@pytest.mark.parametrize('make_source', open_image_parameters)
+def test_open_image(tmp_path, make_source):
+    img = generate_random_image(20, 30)
+    data = encode_image(img)
+    (tmp_path / 'img.png').write_bytes(data)
+
+    async def main():
+        src = make_source(data, tmp_path / 'img.png')
+        return await aio.open_image(src, dtype=None)
+
+    assert np.array_equal(asyncio.run(main()), img)
+
+
+def test_image_layout(tmp_path):
+    img = generate_random_image(20, 30)
+    planar = np.moveaxis(img, -1, 0)
+
+    async def main():
+        await aio.save_image(planar, tmp_path / 'img.png', layout='CHW')
+        data = await aio.save_image(planar, format='PNG', layout='CHW')
+        opened = await aio.open_image(data, dtype=None, layout='CHW')
+        return data, opened
+
+    data, opened = asyncio.run(main())
+
+    assert data == encode_image(img)
+    assert np.array_equal(open_image(tmp_path / 'img.png', dtype=None), img)
+    assert np.array_equal(opened, planar)
+
+    with pytest.raises(ValueError):
+        asyncio.run(aio.open_image(data, layout='WHC'))
+
+
+def test_save_image(tmp_path):
+    img = generate_random_image(20, 30)
+    writer = AsyncWriter()
+    draining_writer = DrainingWriter()
+
+    async def main():
+        await aio.save_image(img, tmp_path / 'img.png')
+        await aio.save_image(img, writer, format='PNG')
+        await aio.save_image(img, draining_writer, format='PNG')
+        return await aio.save_image(img, format='PNG')
+
+    data = asyncio.run(main())
+
+    assert np.array_equal(open_image(tmp_path / 'img.png', dtype=None), img)
+    assert np.array_equal(open_image(io.BytesIO(data), dtype=None), img)
+    assert np.array_equal(open_image(io.BytesIO(writer.data), dtype=None), img)
+    assert draining_writer.drained
+    assert draining_writer.data == writer.data
+
+    with pytest.raises(ValueError):
+        asyncio.run(aio.save_image(img, writer))
+
+
+def test_max_concurrency(monkeypatch):
+    data = encode_image(generate_random_image(10, 10))
+    lock = threading.Lock()
+    active = [0, 0]
+    open_image = imageops.open_image
+
+    def tracked_open_image(*args, **kwargs):
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+
+        return open_image(*args, **kwargs)
+
+    monkeypatch.setattr(imageops, 'open_image', tracked_open_image)
+    aio.set_max_concurrency(3)
+
+    async def main():
+        return await asyncio.gather(*(aio.open_image(data) for _ in range(20)))
+
+    try:
+        assert len(asyncio.run(main())) == 20
+        assert active[1] <= 3
+    finally:
+        aio.set_max_concurrency(aio.MAX_CONCURRENCY)
+
+    with pytest.raises(ValueError):
+        aio.set_max_concurrency(0)
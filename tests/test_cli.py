@@ -0,0 +1,198 @@
+import os
+import runpy
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from openchroma.cli import main, run_batch
+from openchroma.colorspace import RGB_to_CMYK
+from openchroma.imageops import open_image, sliding_window
+
+
+def generate_random_image(height, width):
+    img = np.random.randint(0, 256, (height, width, 3))
+
+    return img.astype(np.uint8)
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    src = tmp_path / 'src'
+    (src / 'nested').mkdir(parents=True)
+    Image.fromarray(generate_random_image(20, 30)).save(src / 'a.png')
+    Image.fromarray(generate_random_image(25, 15)).save(
+        src / 'nested' / 'b.png'
+    )
+
+    return src
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_main_convert(tmp_path, source_dir, workers, capsys):
+    out = tmp_path / 'out'
+    argv = ['convert', str(source_dir), '-o', str(out), '--format', 'npy']
+    argv += ['-j', str(workers)]
+
+    assert main(argv) == 0
+    assert '2 processed, 0 skipped, 0 failed' in capsys.readouterr().err
+
+    for name in ('a', os.path.join('nested', 'b')):
+        img = np.asarray(Image.open(source_dir / (name + '.png')))
+        cmyk = np.load(out / (name + '.npy'))
+        assert np.array_equal(cmyk, RGB_to_CMYK(img))
+
+    # skip outputs that are up to date
+    assert main(argv) == 0
+    assert '0 processed, 2 skipped, 0 failed' in capsys.readouterr().err
+
+    assert main(argv + ['--force']) == 0
+    assert '2 processed, 0 skipped, 0 failed' in capsys.readouterr().err
+
+
+def test_main_filter(tmp_path, source_dir, capsys):
+    out = tmp_path / 'out'
+    pattern = str(source_dir / '**' / '*.png')
+    argv = ['filter', pattern, '-o', str(out), '-w', '3', '5', '--op', 'max']
+
+    assert main(argv + ['-j', '1']) == 0
+    assert '2 processed' in capsys.readouterr().err
+
+    img = open_image(source_dir / 'a.png')
+    filtered = open_image(out / 'a.png')
+    assert filtered.shape == (18, 26, 3)
+    for i in range(3):
+        expected = sliding_window(img[..., i], (3, 5), np.max, np.float64)
+        assert np.array_equal(filtered[..., i], expected)
+
+
+def test_main_paths(tmp_path, source_dir, capsys):
+    Image.fromarray(generate_random_image(10, 10)).save(
+        source_dir / 'nested' / 'a.png'
+    )
+    out = tmp_path / 'out'
+    pattern = str(source_dir / '**' / '*.png')
+
+    # paths are kept relative to leading directories without wildcards
+    assert main(['convert', pattern, '-o', str(out), '-j', '1']) == 0
+    assert '3 processed' in capsys.readouterr().err
+    for name in ('a.tif', 'nested/a.tif', 'nested/b.tif'):
+        assert (out / name).exists()
+
+    # files of the same name cannot be written to the same output file
+    sources = [str(source_dir / 'a.png'), str(source_dir / 'nested' / 'a.png')]
+    assert main(['convert', *sources, '-o', str(out), '--force']) == 1
+    assert 'both map to' in capsys.readouterr().err
+
+
+def test_main_filter_16_bit(tmp_path, capsys):
+    src = tmp_path / 'gray16.png'
+    gray = (np.arange(600).reshape(20, 30) * 100).astype(np.uint16)
+    Image.fromarray(gray).save(src)
+    out = tmp_path / 'out'
+    argv = ['filter', str(src), '-o', str(out), '-w', '3', '5', '-j', '1']
+
+    assert main(argv) == 0
+    assert '1 processed' in capsys.readouterr().err
+
+    filtered = open_image(out / 'gray16.png', dtype=None)
+    expected = np.round(sliding_window(gray, (3, 5), np.mean, np.float64))
+    for i in range(3):
+        assert np.array_equal(
+            filtered[..., i], expected.astype(np.uint16) >> 8
+        )
+
+
+def test_main_filter_npy(tmp_path, capsys):
+    src = tmp_path / 'img.npy'
+    img = generate_random_image(20, 30).astype(np.float64)
+    np.save(src, img)
+    out = tmp_path / 'out'
+    argv = ['filter', str(src), '-o', str(out), '-w', '3', '5', '-j', '1']
+
+    assert main(argv) == 0
+    assert '1 processed, 0 skipped, 0 failed' in capsys.readouterr().err
+
+    filtered = np.load(out / 'img.npy')
+    assert filtered.shape == (18, 26, 3)
+    for i in range(3):
+        expected = sliding_window(img[..., i], (3, 5), np.mean, np.float64)
+        assert np.array_equal(filtered[..., i], np.round(expected))
+
+    assert main(argv + ['--format', 'png']) == 0
+    assert np.array_equal(open_image(out / 'img.png'), filtered)
+
+
+def test_main_failure(tmp_path, source_dir, capsys):
+    (source_dir / 'broken.png').write_bytes(b'not an image')
+    out = tmp_path / 'out'
+
+    assert main(['convert', str(source_dir), '-o', str(out), '-j', '2']) == 1
+
+    err = capsys.readouterr().err
+    assert 'broken.png failed' in err
+    assert '2 processed, 0 skipped, 1 failed' in err
+    assert (out / 'a.tif').exists()
+    assert (out / 'nested' / 'b.tif').exists()
+
+    # run failing job in calling process
+    argv = ['convert', str(source_dir / 'broken.png'), '-o', str(out)]
+    assert main(argv + ['-j', '1']) == 1
+    assert '0 processed, 0 skipped, 1 failed' in capsys.readouterr().err
+
+    assert main(['convert', str(tmp_path / 'missing'), '-o', str(out)]) == 1
+
+    with pytest.raises(ValueError):
+        run_batch(print, [], workers=0)
+
+
+def write_partial(src, dst):
+    with open(dst, 'wb') as f:
+        f.write(b'partial')
+
+    raise RuntimeError('interrupted')
+
+
+def test_run_batch_partial(tmp_path, source_dir, capsys):
+    src = str(source_dir / 'a.png')
+    dst = str(tmp_path / 'out' / 'a.png')
+
+    # failed jobs leave no output file behind
+    assert run_batch(write_partial, [(src, dst)], workers=1) == [src]
+    assert 'RuntimeError: interrupted' in capsys.readouterr().err
+    assert os.listdir(tmp_path / 'out') == []
+
+    def fail(src, dst):
+        raise ValueError('failed')
+
+    assert run_batch(fail, [(src, dst)], workers=1) == [src]
+    assert os.listdir(tmp_path / 'out') == []
+
+
+def exit_process(src, dst):
+    os._exit(1)
+
+
+def test_run_batch_broken_pool(tmp_path, source_dir, capsys):
+    jobs = [
+        (str(source_dir / name), str(tmp_path / 'out' / name))
+        for name in ('a.png', 'nested/b.png')
+    ]
+
+    # jobs of dead worker processes are reported as failed
+    failed = run_batch(exit_process, jobs, workers=2)
+    assert sorted(failed) == sorted(src for src, _ in jobs)
+    err = capsys.readouterr().err
+    assert 'BrokenProcessPool' in err
+    assert '0 processed, 0 skipped, 2 failed' in err
+
+
+def test_main_module(tmp_path, monkeypatch):
+    argv = ['openchroma', 'convert', str(tmp_path / 'missing'), '-o', '.']
+    monkeypatch.setattr(sys, 'argv', argv)
+
+    with pytest.raises(SystemExit) as e:
+        runpy.run_module('openchroma', run_name='__main__')
+
+    assert e.value.code == 1
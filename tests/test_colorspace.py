@@ -2,7 +2,16 @@ import numpy as np
 import numpy.testing as npt
 import pytest
 
-from openchroma.colorspace import RGB_to_CMYK, CMYK_to_RGB
+from openchroma import colorspace
+from openchroma.colorspace import (
+    RGB_to_CMYK,
+    CMYK_to_RGB,
+    clear_color_cache,
+    convert,
+    conversion_path,
+    register_color_space,
+    register_conversion,
+)
 
 RGB_to_CMYK_parameters = [
     [
@@ -13,6 +22,14 @@ RGB_to_CMYK_parameters = [
         np.array([13.0, 31.0, 52.0], dtype=np.float64),
         np.array([75.0, 40.0, 0.0, 80.0], dtype=np.float64),
     ],
+    [
+        np.array([0.0, 0.0, 0.0], dtype=np.float64),
+        np.array([0.0, 0.0, 0.0, 100.0], dtype=np.float64),
+    ],
+    [
+        np.array([-40, 300, 255], dtype=np.int64),
+        np.array([100.0, 0.0, 0.0, 0.0], dtype=np.float64),
+    ],
     [
         np.array(
             [
@@ -72,6 +89,206 @@ def test_RGB_to_CMYK(rgb, cmyk_expected):
     npt.assert_almost_equal(cmyk_expected, cmyk_computed)
 
 
+def test_RGB_to_CMYK_16_bit():
+    rgb = np.random.randint(0, 256, size=(5, 7, 3))
+    cmyk = RGB_to_CMYK(rgb.astype(np.uint8))
+    rgb16 = (rgb * 257).astype(np.uint16)
+
+    npt.assert_array_equal(cmyk, RGB_to_CMYK(rgb))
+    npt.assert_allclose(cmyk, RGB_to_CMYK(rgb16, bit_depth=16))
+    npt.assert_allclose(
+        cmyk,
+        RGB_to_CMYK(rgb16.astype(np.float64), bit_depth=16),
+    )
+
+    # 16-bit values are only scaled when asked for, and are otherwise
+    # truncated to 8 bits like values of any other data type
+    npt.assert_array_equal(
+        RGB_to_CMYK(rgb16),
+        RGB_to_CMYK(np.clip(rgb16, 0, 255).astype(np.float64)),
+    )
+    npt.assert_array_equal(
+        RGB_to_CMYK(rgb.astype(np.uint16)),
+        cmyk,
+    )
+
+    with pytest.raises(ValueError):
+        RGB_to_CMYK(rgb, bit_depth=12)
+
+
+def test_RGB_to_CMYK_leading_shape():
+    rgb = np.random.randint(0, 256, size=(2, 5, 7, 3))
+    cmyk = RGB_to_CMYK(rgb)
+
+    assert cmyk.shape == (2, 5, 7, 4)
+    for i in range(2):
+        npt.assert_array_equal(cmyk[i], RGB_to_CMYK(rgb[i]))
+
+
+@pytest.mark.parametrize('size', [(40, 40), (300, 400)])
+@pytest.mark.parametrize('precision', [0, 2, 3])
+def test_RGB_to_CMYK_color_cache(size, precision):
+    palette = np.random.randint(0, 256, size=(500, 3), dtype=np.uint8)
+    rgb = palette[np.random.randint(0, 500, size=size)]
+
+    # convert with empty & filled cache
+    clear_color_cache()
+    for _ in range(2):
+        npt.assert_array_equal(
+            RGB_to_CMYK(rgb, precision=precision),
+            RGB_to_CMYK(rgb, precision=precision, cache=False),
+        )
+
+    rgb = np.random.randint(0, 256, size=size + (3,), dtype=np.uint8)
+    npt.assert_array_equal(
+        RGB_to_CMYK(rgb, precision=precision),
+        RGB_to_CMYK(rgb, precision=precision, cache=False),
+    )
+
+
+@pytest.mark.parametrize(
+    'dtype, cmyk_atol, rgb_atol',
+    [
+        # rounding error of single precision values adds one unit in the
+        # last place of the largest value
+        (
+            np.float32,
+            1e-2 + np.spacing(np.float32(100)),
+            1e-2 + np.spacing(np.float32(255)),
+        ),
+        (np.float16, 0.042, 0.073),
+    ],
+)
+def test_RGB_to_CMYK_CMYK_to_RGB_dtype(dtype, cmyk_atol, rgb_atol):
+    rgb = np.random.randint(0, 256, size=(30, 40, 3), dtype=np.uint8)
+
+    clear_color_cache()
+    cmyk = RGB_to_CMYK(rgb, dtype=dtype)
+    assert cmyk.dtype == dtype
+    npt.assert_allclose(cmyk, RGB_to_CMYK(rgb), rtol=0, atol=cmyk_atol)
+    npt.assert_array_equal(cmyk, RGB_to_CMYK(rgb, dtype=dtype))
+    npt.assert_array_equal(cmyk, RGB_to_CMYK(rgb, cache=False, dtype=dtype))
+
+    cmyk = np.random.rand(30, 40, 4).astype(np.float32) * 100
+    converted = CMYK_to_RGB(cmyk, dtype=dtype)
+    assert converted.dtype == dtype
+    npt.assert_allclose(converted, CMYK_to_RGB(cmyk), rtol=0, atol=rgb_atol)
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32, np.float16])
+@pytest.mark.parametrize('cache', [False, True])
+@pytest.mark.parametrize('contiguous', [False, True])
+def test_RGB_to_CMYK_CMYK_to_RGB_out(dtype, cache, contiguous):
+    palette = np.random.randint(0, 256, size=(500, 3), dtype=np.uint8)
+    images = [
+        palette[np.random.randint(0, 500, size=(40, 50))],
+        np.random.randint(0, 256, size=(40, 50, 3), dtype=np.uint8),
+        np.random.rand(40, 50, 3) * 300 - 20,
+    ]
+
+    for rgb in images:
+        cmyk = RGB_to_CMYK(rgb, cache=cache, dtype=dtype)
+
+        # repeat conversions into the same array, reusing scratch buffers
+        out = np.full((50, 40, 4), np.nan, dtype=dtype).transpose(1, 0, 2)
+        if contiguous:
+            out = np.ascontiguousarray(out)
+        for _ in range(2):
+            converted = RGB_to_CMYK(rgb, cache=cache, dtype=dtype, out=out)
+            assert converted is out
+            npt.assert_array_equal(out, cmyk)
+
+        rgb = CMYK_to_RGB(cmyk, dtype=dtype)
+        out = np.full((40, 50, 3), np.nan, dtype=dtype)
+        assert CMYK_to_RGB(cmyk, dtype=dtype, out=out) is out
+        npt.assert_array_equal(out, rgb)
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float16])
+@pytest.mark.parametrize('cache', [False, True])
+def test_RGB_to_CMYK_CMYK_to_RGB_workers(monkeypatch, dtype, cache):
+    # split small images into many chunks, including a partial chunk
+    monkeypatch.setattr(colorspace, 'CONVERT_CHUNK_SIZE', 120)
+    palette = np.random.randint(0, 256, size=(500, 3), dtype=np.uint8)
+    images = [
+        palette[np.random.randint(0, 500, size=(41, 50))],
+        np.random.randint(0, 256, size=(41, 50, 3), dtype=np.uint8),
+        np.random.randint(0, 65536, size=(41, 50, 3), dtype=np.uint16),
+        np.random.rand(41, 50, 3) * 300 - 20,
+    ]
+
+    for rgb in images:
+        clear_color_cache()
+        cmyk = RGB_to_CMYK(rgb, cache=cache, dtype=dtype)
+        for workers in [1, 3]:
+            npt.assert_array_equal(
+                RGB_to_CMYK(rgb, cache=cache, dtype=dtype, workers=workers),
+                cmyk,
+            )
+
+        out = np.full((50, 41, 4), np.nan, dtype=dtype).transpose(1, 0, 2)
+        RGB_to_CMYK(rgb, cache=cache, dtype=dtype, out=out, workers=3)
+        npt.assert_array_equal(out, cmyk)
+
+        rgb = CMYK_to_RGB(cmyk, dtype=dtype)
+        npt.assert_array_equal(CMYK_to_RGB(cmyk, dtype=dtype, workers=3), rgb)
+
+        out = np.full((50, 41, 3), np.nan, dtype=dtype).transpose(1, 0, 2)
+        CMYK_to_RGB(cmyk, dtype=dtype, out=out, workers=3)
+        npt.assert_array_equal(out, rgb)
+
+
+def test_RGB_to_CMYK_CMYK_to_RGB_workers_error():
+    with pytest.raises(ValueError):
+        RGB_to_CMYK(np.zeros((4, 5, 3)), workers=0)
+
+    with pytest.raises(ValueError):
+        CMYK_to_RGB(np.zeros((4, 5, 4)), workers=-1)
+
+
+def test_RGB_to_CMYK_CMYK_to_RGB_out_error():
+    rgb = np.zeros((4, 5, 3))
+    with pytest.raises(ValueError):
+        RGB_to_CMYK(rgb, out=np.zeros((4, 5, 3)))
+
+    with pytest.raises(ValueError):
+        RGB_to_CMYK(rgb, out=np.zeros((4, 5, 4), dtype=np.float32))
+
+    with pytest.raises(TypeError):
+        RGB_to_CMYK(rgb, out=np.zeros((4, 5, 4)).tolist())
+
+    with pytest.raises(ValueError):
+        CMYK_to_RGB(np.zeros((4, 5, 4)), out=np.zeros((4, 5, 4)))
+
+    with pytest.raises(ValueError):
+        CMYK_to_RGB(np.zeros((4, 5, 4)), out=np.zeros((4, 5, 3), dtype=int))
+
+
+def test_RGB_to_CMYK_color_cache_eviction(monkeypatch):
+    monkeypatch.setattr(colorspace, 'COLOR_CACHE_SIZE', 300)
+    clear_color_cache()
+
+    palette = np.random.permutation(1 << 24)[:1000].astype(np.uint32)
+    palette = colorspace._unpack_colors(palette)
+    for i in range(0, 1000, 200):
+        rgb = np.repeat(palette[i : i + 200], 10, axis=0).reshape(50, 40, 3)
+        npt.assert_array_equal(RGB_to_CMYK(rgb), RGB_to_CMYK(rgb, cache=False))
+
+        keys, values, used = colorspace._color_caches[2, np.dtype(np.float64)]
+        assert keys.size == min(i + 200, 300)
+        assert np.all(np.diff(keys.astype(np.int64)) > 0)
+        npt.assert_array_equal(
+            values,
+            RGB_to_CMYK(colorspace._unpack_colors(keys), cache=False),
+        )
+
+    # least recently used colours are evicted
+    assert np.all(np.isin(colorspace._pack_colors(palette[800:]), keys))
+
+    clear_color_cache()
+    assert colorspace._color_caches == {}
+
+
 CMYK_to_RGB_parameters = [
     [
         np.array([89.0, 37.0, 79.0, 33.0], dtype=np.float64),
@@ -81,6 +298,10 @@ CMYK_to_RGB_parameters = [
         np.array([84.0, 23.0, 0.0, 89.0], dtype=np.float64),
         np.array([4.0, 22.0, 28.0], dtype=np.float64),
     ],
+    [
+        np.array([-10, 120, 50, 0], dtype=np.int64),
+        np.array([255.0, 0.0, 128.0], dtype=np.float64),
+    ],
     [
         np.array(
             [
@@ -138,3 +359,146 @@ CMYK_to_RGB_parameters = [
 def test_CMYK_to_RGB(cmyk, rgb_expected):
     rgb_computed = CMYK_to_RGB(cmyk, precision=0)
     npt.assert_almost_equal(rgb_expected, rgb_computed)
+
+
+convert_parameters = [
+    ['RGB', 'HSV', [255, 0, 0], [0.0, 100.0, 100.0]],
+    ['RGB', 'HSV', [0, 128, 255], [209.88, 100.0, 100.0]],
+    ['RGB', 'HSV', [100, 100, 100], [0.0, 0.0, 39.22]],
+    ['HSV', 'RGB', [120, 50, 100], [127.5, 255.0, 127.5]],
+    ['RGB', 'YCbCr', [255, 255, 255], [255.0, 128.0, 128.0]],
+    ['RGB', 'YCbCr', [255, 0, 0], [76.24, 84.97, 255.0]],
+    ['RGB', 'GRAY', [10, 200, 30], [123.81]],
+    ['GRAY', 'RGB', [80], [80.0, 80.0, 80.0]],
+    ['YCbCr', 'GRAY', [90, 0, 255], [90.0]],
+    ['RGB', 'LAB', [255, 255, 255], [100.0, 0.0, 0.0]],
+    ['RGB', 'LAB', [255, 0, 0], [53.24, 80.09, 67.2]],
+    ['LAB', 'RGB', [53.24, 80.09, 67.2], [254.99, 0.02, 0.01]],
+    ['CMYK', 'LAB', [0, 0, 0, 100], [0.0, 0.0, 0.0]],
+    ['GRAY', 'CMYK', [51], [0.0, 0.0, 0.0, 80.0]],
+]
+
+
+@pytest.mark.parametrize('src, dst, img, expected', convert_parameters)
+def test_convert(src, dst, img, expected):
+    npt.assert_allclose(convert(np.array(img), src, dst), expected)
+
+
+@pytest.mark.parametrize('space', ['CMYK', 'HSV', 'YCbCr', 'LAB'])
+def test_convert_round_trip(monkeypatch, space):
+    monkeypatch.setattr(colorspace, 'CONVERT_BLOCK_SIZE', 100)
+    rgb = np.random.randint(0, 256, size=(31, 17, 3))
+
+    converted = convert(rgb, 'RGB', space, precision=8)
+    assert converted.shape == (31, 17, len(colorspace.COLOR_SPACES[space]))
+    npt.assert_allclose(
+        convert(converted, space, 'RGB', precision=8),
+        rgb,
+        atol=1e-3,
+    )
+
+
+def test_convert_RGB_to_CMYK(monkeypatch):
+    monkeypatch.setattr(colorspace, 'CONVERT_BLOCK_SIZE', 64)
+    rgb = np.random.rand(20, 30, 3) * 300 - 20
+
+    npt.assert_array_equal(convert(rgb, 'RGB', 'CMYK'), RGB_to_CMYK(rgb))
+
+    cmyk = np.random.rand(20, 30, 4) * 100
+    npt.assert_array_equal(convert(cmyk, 'CMYK', 'RGB'), CMYK_to_RGB(cmyk))
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float16])
+@pytest.mark.parametrize('space', ['CMYK', 'HSV', 'YCbCr', 'GRAY', 'LAB'])
+def test_convert_dtype(monkeypatch, dtype, space):
+    monkeypatch.setattr(colorspace, 'CONVERT_BLOCK_SIZE', 100)
+    rgb = np.random.randint(0, 256, size=(31, 17, 3)).astype(dtype)
+
+    converted = convert(rgb, 'RGB', space, precision=8, dtype=dtype)
+    expected = convert(rgb, 'RGB', space, precision=8)
+    assert converted.dtype == dtype
+
+    # kernels compute in data type of their input
+    kernel = colorspace._CONVERSIONS['RGB', space]
+    assert kernel(rgb[:2].astype(np.float32)).dtype == np.float32
+
+    # errors are bounded by machine epsilon relative to the largest value of
+    # colour space
+    scale = np.abs(np.array(colorspace.COLOR_SPACES[space])).max()
+    npt.assert_allclose(
+        converted,
+        expected,
+        atol=8 * np.finfo(dtype).eps * scale,
+    )
+
+
+def test_convert_dtype_error():
+    rgb = np.zeros((2, 3))
+    for dtype in (np.uint8, np.int64, np.complex128):
+        with pytest.raises(ValueError):
+            convert(rgb, 'RGB', 'HSV', dtype=dtype)
+
+        with pytest.raises(ValueError):
+            RGB_to_CMYK(rgb, dtype=dtype)
+
+        with pytest.raises(ValueError):
+            CMYK_to_RGB(np.zeros((2, 4)), dtype=dtype)
+
+
+@pytest.mark.parametrize('contiguous', [False, True])
+def test_convert_out(monkeypatch, contiguous):
+    monkeypatch.setattr(colorspace, 'CONVERT_BLOCK_SIZE', 100)
+    rgb = np.random.randint(0, 256, size=(31, 17, 3))
+
+    out = np.full((17, 31, 3), np.nan, dtype=np.float32).transpose(1, 0, 2)
+    if contiguous:
+        out = np.ascontiguousarray(out)
+
+    assert convert(rgb, 'RGB', 'LAB', dtype=np.float32, out=out) is out
+    npt.assert_array_equal(
+        out,
+        convert(rgb, 'RGB', 'LAB', dtype=np.float32),
+    )
+
+    with pytest.raises(ValueError):
+        convert(rgb, 'RGB', 'LAB', out=out)
+
+    with pytest.raises(ValueError):
+        convert(rgb, 'RGB', 'GRAY', dtype=np.float32, out=out)
+
+
+def test_conversion_path(monkeypatch):
+    assert conversion_path('CMYK', 'LAB') == ['CMYK', 'RGB', 'LAB']
+    assert conversion_path('YCbCr', 'GRAY') == ['YCbCr', 'GRAY']
+    assert conversion_path('HSV', 'HSV') == ['HSV']
+
+    monkeypatch.setattr(
+        colorspace, 'COLOR_SPACES', dict(colorspace.COLOR_SPACES)
+    )
+    monkeypatch.setattr(
+        colorspace, '_CONVERSIONS', dict(colorspace._CONVERSIONS)
+    )
+    register_color_space('INVERTED', [(0, 255)] * 3)
+
+    with pytest.raises(ValueError):
+        conversion_path('INVERTED', 'CMYK')
+
+    register_conversion('RGB', 'INVERTED', lambda rgb: 255 - rgb)
+    register_conversion('INVERTED', 'RGB', lambda rgb: 255 - rgb)
+
+    assert conversion_path('INVERTED', 'CMYK') == ['INVERTED', 'RGB', 'CMYK']
+    npt.assert_array_equal(
+        convert(np.array([255, 255, 255]), 'INVERTED', 'CMYK'),
+        [0, 0, 0, 100],
+    )
+
+
+def test_convert_error():
+    with pytest.raises(ValueError):
+        convert(np.zeros((2, 3)), 'RGB', 'XYZ')
+
+    with pytest.raises(ValueError):
+        convert(np.zeros((2, 4)), 'RGB', 'CMYK')
+
+    with pytest.raises(ValueError):
+        register_color_space('BAD', [(0, 1, 2)])
@@ -0,0 +1,515 @@
+import functools
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from openchroma.filters import (
+    integral_image,
+    sliding_sum,
+    sliding_mean,
+    sliding_var,
+    sliding_std,
+    sliding_reduce,
+    sliding_max,
+    sliding_min,
+    sliding_median,
+    sliding_percentile,
+)
+from openchroma.filters import (
+    _as_slice,
+    _batched_reduce,
+    _sliding_extreme,
+    _sliding_rank,
+    _sliding_reduce,
+    _sum_dtype,
+)
+from openchroma.imageops import sliding_window
+
+
+def generate_random_image(height, width, *channels):
+    img = np.around(np.random.rand(height, width, *channels) * 255)
+
+    return img
+
+
+def reference_sliding_window(img, window, op, edges):
+    # wrap operation so sliding_window falls back to calling it on each window
+    return sliding_window(
+        img,
+        window,
+        op=lambda x: op(x),
+        dtype=np.float64,
+        edges=edges,
+    )
+
+
+def test_integral_image():
+    img = np.arange(12).reshape(3, 4)
+    sat = integral_image(img)
+
+    assert sat.shape == (4, 5)
+    for i in range(4):
+        for j in range(5):
+            assert sat[i][j] == np.sum(img[:i, :j])
+
+
+sliding_sum_mean_parameters = [
+    [generate_random_image(9, 7), (2, 3), False],
+    [generate_random_image(9, 7), (2, 3), True],
+    [generate_random_image(12, 10, 3), (5, 4), False],
+    [generate_random_image(12, 10, 3), (5, 4), True],
+    [generate_random_image(6, 8), (6, 8), True],
+    [np.random.randint(0, 256, (11, 13, 3), dtype=np.uint8), (3, 3), True],
+    [np.random.rand(15, 9), (4, 2), True],
+    [np.random.rand(300, 9), (20, 2), True],
+    [np.random.randint(0, 256, (11, 13), dtype=np.uint64), (3, 3), True],
+]
+
+
+@pytest.mark.parametrize('img, window, edges', sliding_sum_mean_parameters)
+def test_sliding_sum(img, window, edges):
+    npt.assert_allclose(
+        sliding_sum(img, window, edges=edges),
+        reference_sliding_window(img, window, np.sum, edges),
+    )
+    npt.assert_allclose(
+        sliding_window(img, window, op=np.sum, dtype=np.float64, edges=edges),
+        reference_sliding_window(img, window, np.sum, edges),
+    )
+
+
+@pytest.mark.parametrize('img, window, edges', sliding_sum_mean_parameters)
+def test_sliding_mean(img, window, edges):
+    npt.assert_allclose(
+        sliding_mean(img, window, edges=edges),
+        reference_sliding_window(img, window, np.mean, edges),
+    )
+    npt.assert_allclose(
+        sliding_window(img, window, dtype=np.float64, edges=edges),
+        reference_sliding_window(img, window, np.mean, edges),
+    )
+
+
+@pytest.mark.parametrize('edges', [False, True])
+def test_sliding_sum_mean_acc_dtype(edges):
+    img = np.random.randint(0, 256, (300, 20, 3), dtype=np.uint8)
+
+    sums = sliding_sum(img, (5, 4), edges=edges, acc_dtype=np.int32)
+    assert sums.dtype == np.int32
+    npt.assert_array_equal(sums, sliding_sum(img, (5, 4), edges=edges))
+
+    means = sliding_mean(img, (5, 4), edges=edges, acc_dtype=np.float32)
+    npt.assert_allclose(
+        means,
+        sliding_mean(img, (5, 4), edges=edges),
+        atol=1e-3,
+    )
+    npt.assert_array_equal(
+        sliding_window(
+            img,
+            (5, 4),
+            dtype=np.float64,
+            edges=edges,
+            acc_dtype=np.float32,
+        ),
+        means,
+    )
+
+    # accumulator is only used by integral images
+    npt.assert_array_equal(
+        sliding_window(img, (5, 4), op=np.max, edges=edges, acc_dtype=np.int8),
+        sliding_max(img, (5, 4), edges=edges),
+    )
+
+
+def test_acc_dtype_error():
+    img = np.random.randint(0, 256, (300, 20), dtype=np.uint8)
+    npt.assert_array_equal(
+        integral_image(img.astype(bool), acc_dtype=np.uint16),
+        integral_image(img.astype(bool)),
+    )
+    npt.assert_array_equal(
+        integral_image(img[:10, :10], acc_dtype=np.uint16),
+        integral_image(img[:10, :10]),
+    )
+
+    with pytest.raises(ValueError):
+        integral_image(img, acc_dtype=np.uint16)
+
+    with pytest.raises(ValueError):
+        integral_image(img[:10, :10].astype(np.int8), acc_dtype=np.uint16)
+
+    with pytest.raises(ValueError):
+        integral_image(img, acc_dtype=np.complex64)
+
+    with pytest.raises(ValueError):
+        sliding_sum(img.astype(np.float32), (3, 3), acc_dtype=np.int64)
+
+
+sliding_var_std_parameters = [
+    [generate_random_image(9, 7), (2, 3), False],
+    [generate_random_image(9, 7), (2, 3), True],
+    [generate_random_image(12, 10, 3), (5, 4), True],
+    [generate_random_image(300, 9), (20, 2), True],
+    [np.random.randint(0, 256, (11, 13, 3), dtype=np.uint8), (3, 3), True],
+    [np.random.randint(0, 2**16, (300, 9), dtype=np.uint16), (7, 4), True],
+    [np.random.randint(-50, 50, (11, 13), dtype=np.int16), (4, 6), False],
+    [np.random.randint(0, 256, (11, 13), dtype=np.int32), (3, 3), True],
+    [np.random.randint(0, 256, (11, 13), dtype=np.uint64), (3, 3), True],
+    [generate_random_image(10, 10) > 200, (4, 3), True],
+    [np.random.rand(15, 9).astype(np.float32), (4, 2), True],
+]
+
+
+@pytest.mark.parametrize('img, window, edges', sliding_var_std_parameters)
+def test_sliding_var(img, window, edges):
+    # windows of a single value only have zero variance up to rounding, and
+    # NumPy reduces float32 windows in single precision
+    npt.assert_allclose(
+        sliding_var(img, window, edges=edges),
+        reference_sliding_window(img, window, np.var, edges),
+        rtol=1e-6,
+        atol=1e-9,
+    )
+    npt.assert_allclose(
+        sliding_window(img, window, op=np.var, dtype=np.float64, edges=edges),
+        reference_sliding_window(img, window, np.var, edges),
+        rtol=1e-6,
+        atol=1e-9,
+    )
+
+
+@pytest.mark.parametrize('img, window, edges', sliding_var_std_parameters)
+def test_sliding_std(img, window, edges):
+    npt.assert_allclose(
+        sliding_std(img, window, edges=edges),
+        reference_sliding_window(img, window, np.std, edges),
+        atol=1e-4,
+    )
+
+
+def generate_nonfinite_image(*values):
+    img = generate_random_image(20, 30)
+    for i, value in enumerate(values):
+        img[3 + 7 * i, 5 + 11 * i] = value
+
+    return img
+
+
+nonfinite_parameters = [
+    [generate_nonfinite_image(np.nan), (3, 3), False],
+    [generate_nonfinite_image(np.inf), (2, 2), True],
+    [generate_nonfinite_image(-np.inf), (4, 5), True],
+    [generate_nonfinite_image(np.inf, -np.inf, np.nan), (9, 13), False],
+]
+
+
+@pytest.mark.parametrize('img, window, edges', nonfinite_parameters)
+def test_sliding_sum_mean_nonfinite(img, window, edges):
+    ops = (np.sum, np.mean, lambda x: np.sum(x), lambda x: np.mean(x))
+
+    # NaN & infinite values only reach windows covering them
+    with np.errstate(invalid='ignore'):
+        sums = reference_sliding_window(img, window, np.sum, edges)
+        means = reference_sliding_window(img, window, np.mean, edges)
+        npt.assert_array_equal(sliding_sum(img, window, edges=edges), sums)
+        npt.assert_array_equal(sliding_mean(img, window, edges=edges), means)
+
+        for kwargs in ({'dilation': 2}, {'workers': 2}):
+            outputs = sliding_window(
+                img, window, ops, np.float64, edges, **kwargs
+            )
+            npt.assert_array_equal(outputs[0], outputs[2])
+            npt.assert_array_equal(outputs[1], outputs[3])
+
+    assert np.isfinite(sums).any()
+    assert not np.isfinite(sums).all()
+
+
+@pytest.mark.parametrize('img, window, edges', nonfinite_parameters)
+def test_sliding_var_std_nonfinite(img, window, edges):
+    # NaN & infinite values only reach windows covering them
+    with np.errstate(invalid='ignore'):
+        variances = reference_sliding_window(img, window, np.var, edges)
+        npt.assert_allclose(
+            sliding_var(img, window, edges=edges), variances, rtol=1e-12
+        )
+        npt.assert_allclose(
+            sliding_std(img, window, edges=edges),
+            reference_sliding_window(img, window, np.std, edges),
+            rtol=1e-12,
+        )
+
+        # windows of a single value have zero variance
+        npt.assert_array_equal(
+            sliding_var(img, (1, 1)), np.where(np.isfinite(img), 0, np.nan)
+        )
+
+    assert np.isfinite(variances).any()
+    assert not np.isfinite(variances).all()
+
+
+def test_sliding_var_std_exact():
+    # variances of integers are exact up to a single rounding
+    img = np.random.randint(0, 2**16, (300, 40), dtype=np.uint16)
+    img[:20, :20] = 1234
+    variances = sliding_var(img, (5, 4), edges=True)
+    npt.assert_allclose(
+        variances,
+        reference_sliding_window(img, (5, 4), np.var, True),
+        rtol=1e-12,
+    )
+    npt.assert_array_equal(variances[4:16, 3:16], 0)
+    npt.assert_array_equal(sliding_std(img, (5, 4), edges=True)[4:16, 3:16], 0)
+
+    # floating point integers are summed as integers
+    img = img.astype(np.float64) // 2 - 100
+    variances = sliding_var(img, (5, 4), edges=True)
+    npt.assert_allclose(
+        variances,
+        reference_sliding_window(img, (5, 4), np.var, True),
+        rtol=1e-12,
+    )
+    npt.assert_array_equal(variances[4:16, 3:16], 0)
+    npt.assert_array_equal(sliding_std(img, (5, 4), edges=True)[4:16, 3:16], 0)
+
+    for value in (0.1, 1e6 + 1 / 3):
+        img = np.full((300, 40), value)
+        npt.assert_array_equal(sliding_var(img, (5, 4), edges=True), 0)
+        npt.assert_array_equal(sliding_std(img, (5, 4), edges=True), 0)
+
+
+def test_sum_dtype():
+    img = np.array([[-3.0, 0.0], [255.0, 7.0]])
+
+    assert _sum_dtype(img, ['mean', 'var']) == np.int16
+    assert _sum_dtype(img, ['std'], acc_dtype=np.float64) == np.float64
+    assert _sum_dtype(img, ['sum', 'mean']) == np.float64
+
+    for img in (
+        np.array([[1.0, 2.5]]),
+        np.array([[1.0, np.nan]]),
+        np.array([[1.0, 1e30]]),
+        np.zeros((0, 3)),
+        np.arange(6).reshape(2, 3),
+    ):
+        assert _sum_dtype(img, ['var']) == img.dtype
+
+
+def test_sliding_var_std_precision():
+    # values far from zero are shifted before squaring
+    img = 1e6 + np.random.rand(600, 40)
+    npt.assert_allclose(
+        sliding_var(img, (7, 5), edges=True),
+        reference_sliding_window(img, (7, 5), np.var, True),
+        rtol=1e-6,
+        atol=1e-12,
+    )
+    npt.assert_allclose(
+        sliding_var(img, (7, 5), edges=True, acc_dtype=np.float32),
+        reference_sliding_window(img, (7, 5), np.var, True),
+        rtol=1e-2,
+        atol=1e-4,
+    )
+
+
+sliding_reduce_parameters = [
+    [generate_random_image(9, 7), (2, 3), np.std, False],
+    [generate_random_image(9, 7), (2, 3), np.std, True],
+    [generate_random_image(12, 10, 3), (5, 4), np.ptp, True],
+    [generate_random_image(6, 8), (6, 8), np.median, True],
+    [
+        generate_random_image(11, 13, 3),
+        (3, 4),
+        functools.partial(np.percentile, q=90),
+        True,
+    ],
+    [generate_random_image(10, 10) > 200, (4, 3), np.any, True],
+    [generate_random_image(10, 10) > 200, (4, 3), np.any, False],
+    [
+        generate_random_image(9, 7),
+        (2, 3),
+        functools.partial(np.mean, axis=None),
+        True,
+    ],
+    [
+        generate_random_image(9, 7),
+        (2, 3),
+        functools.partial(np.std, ddof=1),
+        False,
+    ],
+]
+
+
+@pytest.mark.parametrize('img, window, op, edges', sliding_reduce_parameters)
+def test_sliding_reduce(img, window, op, edges):
+    output_img = reference_sliding_window(img, window, op, edges)
+
+    npt.assert_allclose(
+        sliding_reduce(img, window, op, edges=edges),
+        output_img,
+    )
+    npt.assert_allclose(
+        sliding_reduce(img, window, op, edges=edges, chunk_size=1),
+        output_img,
+    )
+    # standard deviations of windows of a single value are only zero up to
+    # the square root of rounding errors of integral images
+    npt.assert_allclose(
+        sliding_window(img, window, op=op, dtype=np.float64, edges=edges),
+        output_img,
+        atol=1e-5,
+    )
+
+
+sliding_max_min_parameters = [
+    [generate_random_image(9, 7), (2, 3), False],
+    [generate_random_image(9, 7), (2, 3), True],
+    [generate_random_image(12, 10, 3), (5, 4), True],
+    [generate_random_image(6, 8), (6, 8), True],
+    [generate_random_image(20, 17), (7, 1), True],
+    [np.random.randint(0, 256, (11, 13, 3), dtype=np.uint8), (3, 3), True],
+    [np.random.randint(-50, 50, (11, 13), dtype=np.int16), (4, 6), False],
+    [generate_random_image(10, 10) > 200, (4, 3), True],
+]
+
+
+@pytest.mark.parametrize('img, window, edges', sliding_max_min_parameters)
+def test_sliding_max(img, window, edges):
+    output_img = sliding_max(img, window, edges=edges)
+
+    assert output_img.dtype == img.dtype
+    npt.assert_array_equal(
+        output_img,
+        reference_sliding_window(img, window, np.max, edges),
+    )
+
+
+@pytest.mark.parametrize('img, window, edges', sliding_max_min_parameters)
+def test_sliding_min(img, window, edges):
+    output_img = sliding_min(img, window, edges=edges)
+
+    assert output_img.dtype == img.dtype
+    npt.assert_array_equal(
+        output_img,
+        reference_sliding_window(img, window, np.min, edges),
+    )
+
+
+sliding_median_percentile_parameters = [
+    [np.random.randint(0, 256, (9, 7), dtype=np.uint8), (2, 3), False],
+    [np.random.randint(0, 256, (12, 10, 3), dtype=np.uint8), (5, 4), True],
+    [np.random.randint(0, 256, (6, 8), dtype=np.uint8), (6, 8), True],
+    [np.random.randint(0, 256, (30, 25), dtype=np.uint8), (9, 7), False],
+    [np.random.randint(0, 256, (30, 25), dtype=np.uint8), (9, 7), True],
+    [
+        np.random.choice([0, 15, 16, 255], (20, 20)).astype(np.uint8),
+        (8, 8),
+        True,
+    ],
+    [generate_random_image(12, 10, 3), (5, 4), True],
+]
+
+
+@pytest.mark.parametrize(
+    'img, window, edges',
+    sliding_median_percentile_parameters,
+)
+def test_sliding_median(img, window, edges):
+    output_img = reference_sliding_window(img, window, np.median, edges)
+
+    npt.assert_array_equal(
+        sliding_median(img, window, edges=edges), output_img
+    )
+    npt.assert_array_equal(
+        sliding_window(img, window, op=np.median, dtype=float, edges=edges),
+        output_img,
+    )
+
+
+@pytest.mark.parametrize(
+    'img, window, edges',
+    sliding_median_percentile_parameters,
+)
+@pytest.mark.parametrize('q', [0, 12.5, 50, 90, 100])
+def test_sliding_percentile(img, window, edges, q):
+    op = functools.partial(np.percentile, q=q)
+    output_img = reference_sliding_window(img, window, op, edges)
+
+    npt.assert_array_equal(
+        sliding_percentile(img, window, q, edges=edges),
+        output_img,
+    )
+    npt.assert_array_equal(
+        sliding_window(img, window, op=op, dtype=float, edges=edges),
+        output_img,
+    )
+
+
+def test_sliding_percentile_error():
+    with pytest.raises(ValueError):
+        sliding_percentile(generate_random_image(10, 10), (3, 3), 101)
+
+
+@pytest.mark.parametrize(
+    'op',
+    [
+        np.nanmedian,
+        functools.partial(np.nanpercentile, q=90),
+        functools.partial(np.nanquantile, q=0.25),
+    ],
+)
+def test_sliding_window_nan(op):
+    img = generate_random_image(12, 10)
+    img[1::2, 1::3] = np.nan
+
+    npt.assert_array_equal(
+        sliding_window(img, (3, 4), op=op, dtype=float, edges=True),
+        reference_sliding_window(img, (3, 4), op, True),
+    )
+
+
+class UnhashableOp:
+    __hash__ = None
+
+    def __call__(self, x):
+        return np.max(x) - np.min(x)
+
+
+def test_sliding_window_unhashable_op():
+    img = generate_random_image(9, 7)
+    output_img = sliding_window(img, (2, 3), op=UnhashableOp(), edges=True)
+
+    npt.assert_array_equal(
+        output_img, sliding_reduce(img, (2, 3), np.ptp, edges=True)
+    )
+
+
+def test_sliding_max_min_object():
+    img = generate_random_image(9, 7).astype(object)
+
+    npt.assert_array_equal(
+        sliding_max(img, (2, 3), edges=True),
+        reference_sliding_window(img, (2, 3), np.max, True),
+    )
+
+
+def test_empty_windows():
+    img = generate_random_image(9, 7)
+    out = np.zeros((0, 5))
+
+    assert _as_slice(range(0)) == slice(0, 0)
+    assert (
+        _batched_reduce(img, range(0), range(5), (2, 3), np.max, out) is None
+    )
+    assert _sliding_reduce(img, range(0), range(5), (2, 3), np.max).shape == (
+        0,
+        5,
+    )
+    assert _sliding_extreme(
+        img, range(0), range(5), (2, 3), np.maximum
+    ).shape == (0, 5)
+    assert _sliding_rank(
+        img.astype(np.uint8), range(0), range(5), (2, 3), None
+    ).shape == (0, 5)
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+from openchroma.colorspace import RGB_to_CMYK, convert
+from openchroma.filters import integral_image
+from openchroma.image import Image
+from openchroma.imageops import open_image, to_planar
+
+
+def generate_random_image(height, width):
+    img = np.around(np.random.rand(height, width, 3) * 255)
+
+    return img
+
+
+@pytest.mark.parametrize('layout', ['HWC', 'CHW'])
+def test_image_cache(layout):
+    img = generate_random_image(20, 30)
+    data = to_planar(img) if layout == 'CHW' else img
+    image = Image(data, layout=layout, copy=True)
+
+    cmyk = image.to_CMYK()
+    assert cmyk is image.to_CMYK()
+    assert cmyk.space == 'CMYK'
+    assert cmyk.layout == layout
+    assert np.array_equal(
+        cmyk.convert('RGB').data,
+        image.convert('CMYK').convert('RGB').data,
+    )
+
+    expected = RGB_to_CMYK(img)
+    if layout == 'CHW':
+        expected = to_planar(expected)
+    assert np.array_equal(cmyk.data, expected)
+
+    lab = image.convert('LAB', precision=4)
+    assert lab is image.convert('LAB', precision=4)
+
+    expected = convert(img, 'RGB', 'LAB', precision=4)
+    if layout == 'CHW':
+        expected = to_planar(expected)
+    assert np.array_equal(lab.data, expected)
+
+    lab32 = image.convert('LAB', precision=4, dtype=np.float32)
+    assert lab32 is image.convert('LAB', precision=4, dtype='float32')
+    assert lab32 is not lab
+    assert lab32.dtype == np.float32
+    assert image.to_CMYK(dtype=np.float16).dtype == np.float16
+
+    r, g, b = image.channels()
+    assert r is image.channels()[0]
+    assert np.array_equal(g, img[..., 1])
+    assert np.array_equal(image.integral_image(), integral_image(img))
+    assert np.array_equal(
+        image.integral_image(channel=2),
+        integral_image(img[..., 2]),
+    )
+
+    with pytest.raises(ValueError):
+        r[0, 0] = 1
+
+    with pytest.raises(ValueError):
+        cmyk[0, 0, 0] = 1
+
+
+def test_image_mutation():
+    img = generate_random_image(20, 30)
+    image = Image(img)
+    cmyk = image.to_CMYK()
+    sat = image.integral_image()
+
+    image[0, 0] = [0, 0, 0]
+    assert image.version == 1
+    assert np.array_equal(image.to_CMYK()[0, 0], [0, 0, 0, 100])
+    assert image.to_CMYK() is not cmyk
+
+    with image.mutate() as data:
+        data[1:] = 255
+
+    assert image.version == 2
+    assert np.array_equal(image.integral_image(), integral_image(data))
+    assert not np.array_equal(image.integral_image(), sat)
+
+    image_copy = image.copy()
+    image_copy[0, 0] = [1, 2, 3]
+    assert not np.array_equal(image_copy.data, image.data)
+
+    with pytest.raises(ValueError):
+        image.data[0, 0] = 1
+
+
+def test_image_array():
+    img = generate_random_image(20, 30)
+    image = Image(img)
+
+    assert image.shape == (20, 30, 3)
+    assert np.shares_memory(np.asarray(image), img)
+
+    copied = image.__array__(copy=True)
+    assert not np.shares_memory(copied, img)
+    assert copied.flags.writeable
+    assert np.array_equal(copied, img)
+
+
+def test_image_open_save(tmp_path):
+    image = Image.open('docs/img/popcat.png', dtype=None)
+
+    assert image.dtype == np.uint8
+    assert np.array_equal(image, open_image('docs/img/popcat.png', None))
+
+    image.to_CMYK().save(tmp_path / 'img.png')
+    assert np.array_equal(
+        open_image(tmp_path / 'img.png'),
+        np.round(image.to_CMYK().convert('RGB').data),
+    )
+
+
+def test_image_error():
+    with pytest.raises(ValueError):
+        Image(np.zeros((5, 5, 4)))
+
+    with pytest.raises(ValueError):
+        Image(np.zeros((5, 5, 3)), space='XYZ')
+
+    with pytest.raises(ValueError):
+        Image(np.zeros((5, 5)))
+
+    with pytest.raises(ValueError):
+        Image(np.zeros((5, 5, 3)), layout='WHC')
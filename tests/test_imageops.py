@@ -1,5 +1,8 @@
+import functools
+
 import numpy as np
 import pytest
+from PIL import Image
 
 from openchroma.imageops import (
     open_image,
@@ -7,8 +10,12 @@ from openchroma.imageops import (
     split_channels,
     combine_channels,
     crop_image,
+    crop_images,
     sliding_window,
+    to_planar,
+    to_interleaved,
 )
+from openchroma.utils import trusted
 
 
 def generate_random_image(height, width):
@@ -22,6 +29,70 @@ def test_open_image_save_image():
     save_image(img, 'docs/img/popcat2.png')
 
 
+def test_open_image_native_dtype(tmp_path):
+    img = open_image('docs/img/popcat.png', dtype=None)
+
+    assert img.dtype == np.uint8
+    assert np.array_equal(img, open_image('docs/img/popcat.png'))
+
+    gray = (np.arange(600).reshape(20, 30) * 100).astype(np.uint16)
+    Image.fromarray(gray).save(tmp_path / 'gray16.png')
+    img = open_image(tmp_path / 'gray16.png', dtype=None)
+
+    assert img.dtype == np.uint16
+    assert img.shape == (20, 30, 3)
+    for i in range(3):
+        assert np.array_equal(img[:, :, i], gray)
+
+    save_image(img, tmp_path / 'gray8.png')
+    img = open_image(tmp_path / 'gray8.png', dtype=None)
+
+    assert img.dtype == np.uint8
+    assert np.array_equal(img[:, :, 0], gray >> 8)
+
+    # 32-bit images are clipped to 16-bit values
+    gray = np.arange(600, dtype=np.int32).reshape(20, 30) * 200 - 10000
+    Image.fromarray(gray).save(tmp_path / 'gray32.tif')
+    img = open_image(tmp_path / 'gray32.tif', dtype=None)
+
+    assert img.dtype == np.uint16
+    assert np.array_equal(img[:, :, 0], np.clip(gray, 0, 65535))
+
+    # 8-bit images are saved as they are
+    img = open_image('docs/img/popcat.png', dtype=None)
+    save_image(img, tmp_path / 'popcat.png')
+
+    assert np.array_equal(open_image(tmp_path / 'popcat.png', dtype=None), img)
+
+
+def test_save_image_clip_round(tmp_path):
+    img = np.array([[[-5.0, 254.6, 100.4], [300.0, 0.5, 1.5]]])
+    save_image(img, tmp_path / 'img.png')
+
+    expected = np.array([[[0, 255, 100], [255, 0, 2]]], dtype=np.uint8)
+    assert np.array_equal(open_image(tmp_path / 'img.png', None), expected)
+
+    img = np.random.randint(0, 256, (30, 40, 3)).astype(np.uint8)
+    save_image(img[::2, ::3], tmp_path / 'img.png')
+    saved = open_image(tmp_path / 'img.png', None)
+
+    assert np.array_equal(saved, img[::2, ::3])
+    assert saved.flags.writeable
+
+    shifted = img.astype(np.int64) * 2 - 100
+    save_image(shifted, tmp_path / 'img.png')
+    saved = open_image(tmp_path / 'img.png', None)
+
+    assert np.array_equal(saved, np.clip(shifted, 0, 255))
+
+    Image.fromarray(img[..., 0]).save(tmp_path / 'gray.png')
+    saved = open_image(tmp_path / 'gray.png')
+
+    assert saved.dtype == np.float64
+    for i in range(3):
+        assert np.array_equal(saved[..., i], img[..., 0])
+
+
 def test_split_channels_combine_channels():
     img = generate_random_image(100, 100)
     img_shape = np.shape(img)
@@ -45,6 +116,74 @@ def test_split_channels_combine_channels():
     assert np.array_equal(img, img_combined)
 
 
+def test_split_channels_combine_channels_views():
+    img = generate_random_image(30, 40)
+
+    r, g, b = split_channels(img)
+    img_combined = combine_channels(r, g, b)
+
+    assert np.shares_memory(r, img)
+    assert np.shares_memory(img_combined, img)
+    assert np.array_equal(img, img_combined)
+
+    img_combined = combine_channels(r.copy(), g, b)
+
+    assert not np.shares_memory(img_combined, img)
+    assert np.array_equal(img, img_combined)
+
+    img_combined = combine_channels(b, g, r)
+
+    assert np.shares_memory(img_combined, img)
+    assert np.array_equal(img[..., ::-1], img_combined)
+
+    img_combined = combine_channels(r, b, g)
+
+    assert not np.shares_memory(img_combined, img)
+    assert np.array_equal(img[..., [0, 2, 1]], img_combined)
+
+    img_combined = combine_channels(r.tolist(), g.tolist(), b.tolist())
+
+    assert np.array_equal(img, img_combined)
+
+
+def test_planar_layout(tmp_path):
+    img = generate_random_image(30, 40)
+    planar_img = to_planar(img)
+
+    assert planar_img.shape == (3, 30, 40)
+    assert planar_img.flags.c_contiguous
+    assert np.shares_memory(
+        to_planar(np.moveaxis(planar_img, 0, -1)),
+        planar_img,
+    )
+    assert np.array_equal(to_interleaved(planar_img), img)
+
+    r, g, b = split_channels(planar_img, layout='CHW')
+
+    for i, channel in enumerate((r, g, b)):
+        assert channel.flags.c_contiguous
+        assert np.array_equal(channel, img[..., i])
+
+    img_combined = combine_channels(r, g, b, layout='CHW')
+
+    assert np.shares_memory(img_combined, planar_img)
+    assert np.array_equal(img_combined, planar_img)
+
+    img_combined = combine_channels(r, g.copy(), b, layout='CHW')
+
+    assert img_combined.flags.c_contiguous
+    assert np.array_equal(img_combined, planar_img)
+
+    save_image(planar_img, tmp_path / 'img.png', layout='CHW')
+    planar_img = open_image(tmp_path / 'img.png', layout='CHW')
+
+    assert planar_img.flags.c_contiguous
+    assert np.array_equal(planar_img, to_planar(img))
+
+    with pytest.raises(ValueError):
+        split_channels(img, layout='WHC')
+
+
 sliding_window_parameters = [
     [
         np.array(
@@ -112,6 +251,338 @@ def test_sliding_window(img, window, op, dtype, edges, output_img):
     assert np.array_equal(output_img, output_img_computed)
 
 
+def generate_mixed_image(height, width):
+    # floating point integers, followed by rows of other values
+    img = generate_random_image(height, width)[..., 0]
+    img[height * 2 // 3 :] += 0.5
+
+    return img
+
+
+sliding_window_workers_parameters = [
+    [generate_random_image(300, 40), np.mean, np.float64],
+    [generate_mixed_image(600, 50), np.var, np.float64],
+    [generate_random_image(300, 40), np.std, np.float64],
+    [generate_random_image(300, 40).astype(np.uint8), np.median, np.float64],
+    [generate_random_image(300, 40), np.max, np.float64],
+    [
+        generate_random_image(300, 20),
+        functools.partial(np.percentile, q=25),
+        object,
+    ],
+    [generate_random_image(300, 20), lambda x: np.sum(x) % 7, np.float64],
+]
+
+
+@pytest.mark.parametrize('edges', [False, True])
+@pytest.mark.parametrize(
+    'img, op, dtype',
+    sliding_window_workers_parameters,
+)
+def test_sliding_window_workers(img, op, dtype, edges):
+    output_img = sliding_window(img, (7, 5), op=op, dtype=dtype, edges=edges)
+    output_img_computed = sliding_window(
+        img,
+        (7, 5),
+        op=op,
+        dtype=dtype,
+        edges=edges,
+        workers=3,
+    )
+
+    assert output_img_computed.dtype == output_img.dtype
+    assert np.array_equal(output_img, output_img_computed)
+
+
+@pytest.mark.parametrize('edges', [False, True])
+@pytest.mark.parametrize(
+    'img, op, dtype',
+    sliding_window_workers_parameters,
+)
+def test_sliding_window_out(img, op, dtype, edges):
+    output_img = sliding_window(img, (7, 5), op=op, dtype=dtype, edges=edges)
+
+    # every result is written, regardless of previous contents
+    out = np.full(output_img.shape, 99, dtype=dtype)
+    output_img_computed = sliding_window(
+        img,
+        (7, 5),
+        op=op,
+        edges=edges,
+        out=out,
+    )
+
+    assert output_img_computed is out
+    assert np.array_equal(output_img, out)
+
+
+def test_sliding_window_out_workers():
+    img = generate_random_image(300, 40)
+    out = np.full((294, 36), np.nan)
+
+    sliding_window(img, (7, 5), op=np.std, workers=2, out=out)
+    assert np.array_equal(
+        out,
+        sliding_window(img, (7, 5), op=np.std, dtype=np.float64),
+    )
+
+
+def dilated_sliding_window(img, window, op, edges, stride, dilation):
+    # compute each window separately, gathering its pixels inside the image
+    h, w = img.shape[:2]
+    spans = [(k - 1) * d + 1 for k, d in zip(window, dilation)]
+    offsets = [
+        range(-span + 1 if edges else 0, length - (0 if edges else span - 1))
+        for length, span in zip((h, w), spans)
+    ]
+
+    rows, cols = [o[::s] for o, s in zip(offsets, stride)]
+    output_img = np.zeros((len(rows), len(cols)))
+    for p, i in enumerate(rows):
+        for q, j in enumerate(cols):
+            positions = [
+                [x for x in range(o, o + span, d) if 0 <= x < length]
+                for o, span, d, length in zip((i, j), spans, dilation, (h, w))
+            ]
+            output_img[p][q] = op(img[np.ix_(*positions)])
+
+    return output_img
+
+
+sliding_window_stride_dilation_parameters = [
+    [generate_random_image(23, 19), np.mean],
+    [generate_random_image(23, 19)[..., 0], np.mean],
+    [generate_random_image(23, 19).astype(np.uint8), np.sum],
+    [generate_random_image(23, 19), np.max],
+    [generate_random_image(23, 19)[..., 0].astype(np.uint8), np.min],
+    [generate_random_image(23, 19).astype(np.uint8), np.median],
+    [generate_random_image(23, 19), np.std],
+    [generate_random_image(23, 19).astype(np.uint8), np.var],
+    [generate_random_image(23, 19), lambda x: np.sum(x) % 7],
+]
+
+
+@pytest.mark.parametrize('dilation', [1, (2, 1), (3, 2)])
+@pytest.mark.parametrize('stride', [1, (2, 3), (4, 3), 5])
+@pytest.mark.parametrize('edges', [False, True])
+@pytest.mark.parametrize(
+    'img, op',
+    sliding_window_stride_dilation_parameters,
+)
+def test_sliding_window_stride_dilation(img, op, edges, stride, dilation):
+    output_img_computed = sliding_window(
+        img,
+        (4, 3),
+        op=op,
+        dtype=np.float64,
+        edges=edges,
+        stride=stride,
+        dilation=dilation,
+    )
+    output_img = dilated_sliding_window(
+        img,
+        (4, 3),
+        op,
+        edges,
+        np.broadcast_to(stride, 2),
+        np.broadcast_to(dilation, 2),
+    )
+
+    assert output_img_computed.shape == output_img.shape
+    assert np.allclose(output_img_computed, output_img)
+
+
+@pytest.mark.parametrize('edges', [False, True])
+@pytest.mark.parametrize('stride', [1, (3, 2), (8, 6)])
+@pytest.mark.parametrize('op', [np.mean, np.max, np.std])
+def test_sliding_window_stride_dilation_workers(op, stride, edges):
+    img = generate_random_image(600, 40)
+    output_img = sliding_window(
+        img,
+        (8, 6),
+        op=op,
+        dtype=np.float64,
+        edges=edges,
+        stride=stride,
+        dilation=(2, 3),
+    )
+    output_img_computed = sliding_window(
+        img,
+        (8, 6),
+        op=op,
+        dtype=np.float64,
+        edges=edges,
+        stride=stride,
+        dilation=(2, 3),
+        workers=3,
+    )
+
+    assert np.array_equal(output_img, output_img_computed)
+
+
+def test_sliding_window_stride_acc_dtype():
+    img = generate_random_image(40, 30).astype(np.uint8)
+    output_img = sliding_window(img, (4, 3), op=np.sum, dtype=np.int64)
+
+    assert np.array_equal(
+        sliding_window(
+            img,
+            (4, 3),
+            op=np.sum,
+            dtype=np.int64,
+            acc_dtype=np.int32,
+            stride=(4, 3),
+        ),
+        output_img[::4, ::3],
+    )
+
+
+@pytest.mark.parametrize('workers', [None, 3])
+@pytest.mark.parametrize('dilation', [1, (2, 3)])
+@pytest.mark.parametrize('edges', [False, True])
+@pytest.mark.parametrize('container', [tuple, list, dict])
+def test_sliding_window_multiple_ops(container, edges, dilation, workers):
+    img = generate_random_image(300, 40)
+    ops = [np.mean, np.sum, np.max, np.std, lambda x: np.sum(x) % 7, np.mean]
+    outputs = [
+        sliding_window(
+            img,
+            (7, 5),
+            op=op,
+            dtype=np.float64,
+            edges=edges,
+            dilation=dilation,
+        )
+        for op in ops
+    ]
+
+    if container is dict:
+        op = {str(i): op for i, op in enumerate(ops)}
+    else:
+        op = container(ops)
+
+    outputs_computed = sliding_window(
+        img,
+        (7, 5),
+        op=op,
+        dtype=np.float64,
+        edges=edges,
+        dilation=dilation,
+        workers=workers,
+    )
+
+    if container is dict:
+        assert list(outputs_computed) == list(op)
+        outputs_computed = list(outputs_computed.values())
+    else:
+        assert isinstance(outputs_computed, tuple)
+
+    assert len(outputs_computed) == len(ops)
+    for output_img, output_img_computed in zip(outputs, outputs_computed):
+        assert np.array_equal(output_img, output_img_computed)
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_sliding_window_multiple_ops_out(workers):
+    img = generate_random_image(30, 20).astype(np.uint8)
+    out = {
+        'sum': np.full((26, 18), -1, dtype=np.int64),
+        'mean': np.full((26, 18), np.nan),
+        'median': np.full((26, 18), np.nan, dtype=object),
+    }
+
+    outputs = sliding_window(
+        img,
+        (5, 3),
+        op={'mean': np.mean, 'sum': np.sum, 'median': np.median},
+        out=out,
+        workers=workers,
+    )
+
+    assert outputs == out
+    for name, op in [('sum', np.sum), ('mean', np.mean)]:
+        assert np.array_equal(
+            out[name],
+            sliding_window(img, (5, 3), op=op, dtype=out[name].dtype),
+        )
+
+    out = [np.zeros((26, 18)), np.zeros((26, 18))]
+    outputs = sliding_window(img, (5, 3), op=(np.max, np.min), out=out)
+    assert outputs[0] is out[0] and outputs[1] is out[1]
+    assert np.array_equal(out[1], sliding_window(img, (5, 3), op=np.min))
+
+
+@pytest.mark.parametrize(
+    'window, kwargs, shape',
+    [
+        ((6, 2), {'dtype': np.float64}, (0, 4)),
+        ((3, 2), {'dtype': np.float64, 'dilation': (3, 1)}, (0, 4)),
+        ((7, 7), {'dtype': np.uint8, 'op': np.max}, (0, 0)),
+        ((2, 9), {'dtype': np.float64, 'stride': 2, 'op': np.var}, (2, 0)),
+        ((6, 2), {'dtype': np.float32, 'workers': 2}, (0, 4)),
+    ],
+)
+def test_sliding_window_empty(window, kwargs, shape):
+    # windows larger than image leave empty output, as per-window loops do
+    img = generate_random_image(5, 5)[:, :, 0]
+    output_img = sliding_window(img, window, **kwargs)
+    assert output_img.shape == shape
+    assert output_img.dtype == kwargs['dtype']
+
+
+def test_sliding_window_error():
+    with pytest.raises(ValueError):
+        sliding_window(generate_random_image(5, 5), (2, 2), workers=0)
+
+    with pytest.raises(ValueError):
+        sliding_window(generate_random_image(5, 5), (2, 2), out=np.zeros(4))
+
+    with pytest.raises(TypeError):
+        sliding_window(generate_random_image(5, 5), (2, 2), out=[[0] * 4] * 4)
+
+    with pytest.raises(ValueError):
+        sliding_window(
+            generate_random_image(5, 5),
+            (2, 2),
+            edges=True,
+            dilation=6,
+        )
+
+    with pytest.raises(ValueError):
+        sliding_window(generate_random_image(5, 5), (2, 2), stride=0)
+
+    with pytest.raises(ValueError):
+        sliding_window(generate_random_image(5, 5), (2, 2), stride=1.5)
+
+    with pytest.raises(ValueError):
+        sliding_window(generate_random_image(5, 5), (2, 2), dilation=(1, 2, 3))
+
+    with pytest.raises(ValueError):
+        sliding_window(generate_random_image(5, 5), (2, 2), op=[])
+
+    out = np.zeros((4, 4))
+    with pytest.raises(ValueError):
+        sliding_window(
+            generate_random_image(5, 5), (2, 2), op=[np.sum], out=out
+        )
+
+    with pytest.raises(ValueError):
+        sliding_window(
+            generate_random_image(5, 5),
+            (2, 2),
+            op={'a': np.sum, 'b': np.max},
+            out={'a': out},
+        )
+
+    with pytest.raises(ValueError):
+        sliding_window(
+            generate_random_image(5, 5),
+            (2, 2),
+            op=(np.sum, np.max),
+            out=(out, np.zeros((3, 3))),
+        )
+
+
 crop_image_parameters = [
     [
         np.array(
@@ -219,6 +690,28 @@ def test_crop_image_error():
             height_width=(5, 6),
         )
 
+    img = generate_random_image(100, 100)
+    with pytest.raises(TypeError, match='`img` must be an array-like'):
+        crop_image(None, (1, 2), bottom_right=(3, 4))
+
+    with pytest.raises(TypeError, match='`top_left` must be an array-like'):
+        crop_image(img, 1, bottom_right=(3, 4))
+
+    with pytest.raises(ValueError, match='`top_left` must be of shape'):
+        crop_image(img, (1, 2, 3), bottom_right=(3, 4))
+
+    with pytest.raises(ValueError, match='`bottom_right` must be of shape'):
+        crop_image(img, (1, 2), bottom_right=(3,))
+
+    with pytest.raises(ValueError, match='`height_width` must be of shape'):
+        crop_image(img, (1, 2), height_width=[[3, 4]])
+
+    # arguments are not checked in trusted mode
+    with trusted():
+        cropped_img = crop_image(img, (1, 2, 3), height_width=(3, 4))
+
+    assert cropped_img.shape == (3, 4, 3)
+
 
 @pytest.mark.parametrize(
     'img, top_left, bottom_right, height_width, cropped_img',
@@ -234,6 +727,138 @@ def test_crop_image(img, top_left, bottom_right, height_width, cropped_img):
     assert np.array_equal(cropped_img, cropped_img_computed)
 
 
+crop_images_parameters = [
+    [
+        generate_random_image(40, 30),
+        [[1, 2, 5, 4], [0, 0, 40, 30], [35, 25, 10, 10], [39, 29, 0, 3]],
+        False,
+    ],
+    [
+        generate_random_image(40, 30).astype(np.uint8),
+        np.array([[1, 2, 5, 4], [0, 0, 39, 29], [35, 25, 50, 50]]),
+        True,
+    ],
+    [
+        generate_random_image(20, 25)[..., 0],
+        np.array([[50, 10, 2, 2], [3, 4, 1, 2], [7, 7, 7, 7]]),
+        True,
+    ],
+    [
+        generate_random_image(20, 25)[..., 0] > 100,
+        np.random.randint(0, 30, (100, 4)),
+        False,
+    ],
+    [generate_random_image(20, 25), np.zeros((0, 4), dtype=int), False],
+]
+
+
+@pytest.mark.parametrize('img, boxes, corners', crop_images_parameters)
+def test_crop_images(img, boxes, corners):
+    cropped_imgs = [
+        (
+            crop_image(img, box[:2], bottom_right=box[2:])
+            if corners
+            else crop_image(img, box[:2], height_width=box[2:])
+        )
+        for box in np.asarray(boxes)
+    ]
+
+    views = crop_images(img, boxes, corners=corners)
+    assert len(views) == len(cropped_imgs)
+    for view, cropped_img in zip(views, cropped_imgs):
+        assert view.shape == cropped_img.shape
+        assert np.array_equal(view, cropped_img)
+        assert view.size == 0 or np.shares_memory(view, img)
+
+    stacked = crop_images(img, boxes, corners=corners, mode='stack')
+    assert stacked.shape[0] == len(cropped_imgs)
+    assert stacked.shape[3:] == img.shape[2:]
+    for crop, cropped_img in zip(stacked, cropped_imgs):
+        height, width = cropped_img.shape[:2]
+        assert np.array_equal(crop[:height, :width], cropped_img)
+        assert not np.any(crop[height:]) and not np.any(crop[:, width:])
+
+    sums = crop_images(img, boxes, corners=corners, mode='sum')
+    assert np.array_equal(sums, [np.sum(c) for c in cropped_imgs])
+
+    means = crop_images(img, boxes, corners=corners, mode='mean')
+    assert np.allclose(
+        means,
+        [np.mean(c) if c.size else np.nan for c in cropped_imgs],
+        equal_nan=True,
+    )
+
+
+def test_crop_images_fill_value():
+    img = np.arange(20).reshape(4, 5)
+    stacked = crop_images(
+        img,
+        [[1, 1, 2, 2], [2, 3, 3, 4]],
+        mode='stack',
+        fill_value=-1,
+    )
+
+    assert np.array_equal(
+        stacked,
+        [
+            [[6, 7], [11, 12]],
+            [[13, 14], [18, 19]],
+        ],
+    )
+
+    stacked = crop_images(
+        img,
+        [[0, 0, 1, 1], [2, 3, 3, 4]],
+        mode='stack',
+        fill_value=-1,
+    )
+
+    assert np.array_equal(
+        stacked,
+        [
+            [[0, -1], [-1, -1]],
+            [[13, 14], [18, 19]],
+        ],
+    )
+
+
+def test_crop_images_acc_dtype():
+    img = generate_random_image(40, 30).astype(np.uint8)
+    boxes = np.random.randint(0, 40, (50, 4))
+    sums = crop_images(img, boxes, mode='sum', acc_dtype=np.int32)
+
+    assert sums.dtype == np.int32
+    assert np.array_equal(sums, crop_images(img, boxes, mode='sum'))
+
+
+def test_crop_images_error():
+    img = generate_random_image(20, 20)
+
+    with pytest.raises(TypeError):
+        crop_images(3, [[0, 0, 1, 1]])
+
+    with pytest.raises(ValueError):
+        crop_images(np.arange(5), [[0, 0, 1, 1]])
+
+    with pytest.raises(TypeError):
+        crop_images(img, 3)
+
+    with pytest.raises(ValueError):
+        crop_images(img, [0, 0, 1, 1])
+
+    with pytest.raises(ValueError):
+        crop_images(img, [[0, 0, 1]])
+
+    with pytest.raises(TypeError):
+        crop_images(img, [[0, 0, 1.5, 1]])
+
+    with pytest.raises(ValueError):
+        crop_images(img, [[0, -1, 1, 1]])
+
+    with pytest.raises(ValueError):
+        crop_images(img, [[0, 0, 1, 1]], mode='max')
+
+
 def test_crop_image_sliding_window():
     img_shape = (np.random.randint(20, 1000), np.random.randint(20, 1000))
     window = (
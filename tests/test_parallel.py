@@ -0,0 +1,157 @@
+import functools
+import threading
+
+import numpy as np
+import pytest
+
+from openchroma import parallel, utils
+from openchroma.filters import SUM_BLOCK_ROWS
+from openchroma.parallel import (
+    _thread_map,
+    _share_array,
+    _init_worker,
+    _run_tile,
+    _tile_bounds,
+)
+from openchroma.imageops import sliding_window
+
+
+def test_thread_map():
+    results = [None] * 6
+
+    def store(i):
+        # nested calls run in the calling thread of the thread pool
+        inner = []
+        _thread_map(inner.append, [i, -i], workers=4)
+        results[i] = (threading.current_thread().name, inner)
+
+    _thread_map(store, range(6), workers=4)
+    for i, (name, inner) in enumerate(results):
+        assert name.startswith('openchroma-worker')
+        assert inner == [i, -i]
+
+    _thread_map(store, range(6))
+    assert results[0][0] == threading.current_thread().name
+
+
+def test_thread_map_error():
+    done = []
+
+    def fail(i):
+        if i == 0:
+            raise ValueError('failed')
+
+        done.append(i)
+
+    # exceptions are raised once all items are processed
+    with pytest.raises(ValueError):
+        _thread_map(fail, range(5), workers=2)
+
+    assert sorted(done) == [1, 2, 3, 4]
+
+
+def test_thread_map_scratch():
+    arrays = []
+
+    def fill(i):
+        arrays.append(utils._scratch_array('test', (4, 5), np.float64))
+
+    # scratch buffers of pool threads are released once all items finish
+    _thread_map(fill, range(4), workers=2)
+    assert len(arrays) == 4
+    assert not any(
+        thread in parallel._pool_threads
+        for thread, _ in utils._scratch_buffers
+    )
+
+
+def generate_random_image(height, width):
+    img = np.around(np.random.rand(height, width) * 255)
+
+    return img
+
+
+run_tile_parameters = [
+    [generate_random_image(300, 20), np.mean, np.float64],
+    [
+        generate_random_image(300, 20),
+        functools.partial(np.percentile, q=25),
+        object,
+    ],
+]
+
+
+@pytest.mark.parametrize('img, op, dtype', run_tile_parameters)
+def test_run_tile(monkeypatch, img, op, dtype):
+    # run worker in calling process, so that it is traced
+    monkeypatch.setattr(parallel, '_worker_state', None)
+
+    window = (7, 5)
+    rows = range(img.shape[0] - window[0] + 1)
+    cols = range(img.shape[1] - window[1] + 1)
+    out = np.zeros((len(rows), len(cols)), dtype=dtype)
+    shms = []
+    state = {
+        'rows': rows,
+        'cols': cols,
+        'window': window,
+        'ops': [op],
+        'vectorized': None,
+        'acc_dtype': None,
+        'dilation': (1, 1),
+        'finite': None,
+        'sum_dtype': None,
+        'dtypes': [out.dtype],
+        'img': img,
+        'outs': [None],
+    }
+
+    try:
+        # share arrays as done for worker processes
+        if not out.dtype.hasobject:
+            shms = [_share_array(img), _share_array(out)]
+            state['img'] = (shms[0].name, img.shape, img.dtype)
+            state['outs'] = [(shms[1].name, out.shape, out.dtype)]
+
+        _init_worker(state)
+        for first, last in _tile_bounds(len(rows), 3):
+            (tile,) = _run_tile(first, last)
+            if tile is not None:
+                out[first:last] = tile
+
+        if shms:
+            out[...] = parallel._worker_state['outs'][0]
+            for shm in parallel._worker_state['shms']:
+                shm.close()
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+    expected = sliding_window(img, window, op=op, dtype=dtype)
+    assert np.array_equal(out, expected)
+
+
+@pytest.mark.parametrize('count', [1, 128, 300, 1000])
+@pytest.mark.parametrize('period', [1, 3])
+def test_tile_bounds(count, period):
+    bounds = _tile_bounds(count, 3, period=period)
+
+    # tiles cover all rows, split at blocks of each phase
+    assert bounds[0][0] == 0
+    assert bounds[-1][1] == count
+    for (_, last), (first, _) in zip(bounds, bounds[1:]):
+        assert last == first
+        assert first % (SUM_BLOCK_ROWS * period) == 0
+
+
+@pytest.mark.parametrize('count', [1, 5, 128, 300, 1000])
+def test_tile_bounds_unaligned(count):
+    bounds = _tile_bounds(count, 3)
+
+    # tiles cover all rows, split into two tiles per worker
+    assert len(bounds) == min(count, 6)
+    assert bounds[0][0] == 0
+    assert bounds[-1][1] == count
+    for (_, last), (first, _) in zip(bounds, bounds[1:]):
+        assert last == first
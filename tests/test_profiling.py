@@ -0,0 +1,270 @@
+import io
+import threading
+
+import numpy as np
+import pytest
+
+from openchroma import profiling
+from openchroma.profiling import (
+    Profile,
+    add_callback,
+    remove_callback,
+    is_enabled,
+    record_path,
+)
+from openchroma.parallel import _thread_map
+from openchroma.colorspace import RGB_to_CMYK, CMYK_to_RGB, convert
+from openchroma.imageops import (
+    open_image,
+    save_image,
+    split_channels,
+    combine_channels,
+    crop_image,
+    crop_images,
+    sliding_window,
+)
+
+
+def generate_random_image(height, width):
+    img = np.around(np.random.rand(height, width, 3) * 255)
+
+    return img
+
+
+def encode_image(img):
+    f = io.BytesIO()
+    save_image(img, f, format='PNG')
+
+    return f.getvalue()
+
+
+def test_callback():
+    records = []
+    img = generate_random_image(20, 30)
+
+    assert not is_enabled()
+
+    add_callback(records.append)
+    try:
+        assert is_enabled()
+        cmyk = RGB_to_CMYK(img)
+        r, g, b = split_channels(img)
+    finally:
+        remove_callback(records.append)
+
+    assert not is_enabled()
+    RGB_to_CMYK(img)
+
+    assert [record.function for record in records] == [
+        'openchroma.colorspace.RGB_to_CMYK',
+        'openchroma.imageops.split_channels',
+    ]
+    assert records[0].pixels == 600
+    assert records[0].nbytes == cmyk.nbytes
+    assert records[0].paths == ('whole_array',)
+    assert records[0].seconds > 0
+    assert records[1].pixels == 600
+    assert records[1].nbytes == 0
+
+    with pytest.raises(ValueError):
+        remove_callback(records.append)
+
+
+def test_callback_outputs():
+    records = []
+    img = generate_random_image(20, 30)[..., 0]
+
+    add_callback(records.append)
+    try:
+        outputs = sliding_window(img, (3, 5), {'a': np.mean, 'b': np.max})
+    finally:
+        remove_callback(records.append)
+
+    # every output array is counted
+    assert records[0].nbytes == sum(out.nbytes for out in outputs.values())
+
+
+profile_parameters = [
+    [
+        lambda img: open_image(io.BytesIO(encode_image(img)), layout='CHW'),
+        'openchroma.imageops.open_image',
+        600,
+        ('mode:RGB',),
+    ],
+    [
+        lambda img: save_image(img, io.BytesIO(), format='PNG'),
+        'openchroma.imageops.save_image',
+        600,
+        ('clip_round_cast',),
+    ],
+    [
+        lambda img: combine_channels(*split_channels(img)),
+        'openchroma.imageops.combine_channels',
+        600,
+        ('view',),
+    ],
+    [
+        lambda img: crop_image(img, (2, 3), height_width=(5, 4)),
+        'openchroma.imageops.crop_image',
+        20,
+        (),
+    ],
+    [
+        lambda img: crop_images(img, [[2, 3, 5, 4], [0, 0, 2, 2]]),
+        'openchroma.imageops.crop_images',
+        24,
+        ('views',),
+    ],
+    [
+        lambda img: crop_images(
+            img, [[2, 3, 5, 4], [0, 0, 2, 2]], mode='stack'
+        ),
+        'openchroma.imageops.crop_images',
+        40,
+        ('stack',),
+    ],
+    [
+        lambda img: crop_images(img, [[2, 3, 5, 4]], mode='mean'),
+        'openchroma.imageops.crop_images',
+        600,
+        ('mean',),
+    ],
+    [
+        lambda img: sliding_window(img[..., 0], (3, 5), np.mean, float),
+        'openchroma.imageops.sliding_window',
+        18 * 26,
+        ('sliding_mean',),
+    ],
+    [
+        lambda img: sliding_window(
+            img[..., 0].astype(np.uint8),
+            (7, 7),
+            np.median,
+            float,
+        ),
+        'openchroma.imageops.sliding_window',
+        14 * 24,
+        ('sliding_median', 'sliding_rank'),
+    ],
+    [
+        lambda img: sliding_window(img[..., 0], (3, 5), np.std, float),
+        'openchroma.imageops.sliding_window',
+        18 * 26,
+        ('sliding_std',),
+    ],
+    [
+        lambda img: sliding_window(img[..., 0], (3, 5), np.ptp, float),
+        'openchroma.imageops.sliding_window',
+        18 * 26,
+        ('sliding_reduce',),
+    ],
+    [
+        lambda img: sliding_window(img[..., 0], (3, 5), lambda x: 0, float),
+        'openchroma.imageops.sliding_window',
+        18 * 26,
+        ('per_window',),
+    ],
+    [
+        lambda img: sliding_window(
+            img[..., 0],
+            (3, 5),
+            {'mean': np.mean, 'sum': np.sum, 'max': np.max},
+            float,
+        ),
+        'openchroma.imageops.sliding_window',
+        18 * 26,
+        ('sliding_mean', 'sliding_sum', 'sliding_max'),
+    ],
+    [
+        lambda img: sliding_window(img[..., 0], (3, 5), [np.min], float),
+        'openchroma.imageops.sliding_window',
+        18 * 26,
+        ('sliding_min',),
+    ],
+    [
+        lambda img: RGB_to_CMYK(np.tile(img.astype(np.uint8), (10, 10, 1))),
+        'openchroma.colorspace.RGB_to_CMYK',
+        60000,
+        ('color_cache', 'whole_array'),
+    ],
+    [
+        lambda img: CMYK_to_RGB(RGB_to_CMYK(img)),
+        'openchroma.colorspace.CMYK_to_RGB',
+        600,
+        (),
+    ],
+    [
+        lambda img: convert(img, 'RGB', 'GRAY'),
+        'openchroma.colorspace.convert',
+        600,
+        ('RGB->GRAY',),
+    ],
+]
+
+
+@pytest.mark.parametrize(
+    'call, function, pixels, paths',
+    profile_parameters,
+)
+def test_profile(call, function, pixels, paths):
+    img = generate_random_image(20, 30)
+
+    with Profile() as profile:
+        call(img)
+
+    stats = profile.stats[function]
+
+    assert not is_enabled()
+    assert stats.calls == 1
+    assert stats.pixels == pixels
+    assert stats.seconds > 0
+    assert stats.megapixels_per_second > 0
+    assert tuple(sorted(stats.paths.elements())) == tuple(sorted(paths))
+    assert function in profile.report()
+
+
+def test_profile_threads():
+    img = generate_random_image(20, 30)
+
+    def run():
+        for _ in range(10):
+            RGB_to_CMYK(img)
+
+    with Profile() as profile:
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    stats = profile.stats['openchroma.colorspace.RGB_to_CMYK']
+
+    assert stats.calls == 40
+    assert stats.pixels == 40 * 600
+    assert stats.paths['whole_array'] == 40
+    assert profiling.FunctionStats().megapixels_per_second == 0
+
+
+def test_record_path_threads():
+    @profiling.profiled(pixels=lambda result, items: len(items))
+    def run(items):
+        _thread_map(lambda item: record_path(item), items, workers=2)
+
+    # paths recorded by pool threads count towards the call in progress
+    with Profile() as profile:
+        run(['a', 'b', 'c', 'd'])
+
+    stats = profile.stats[run.__module__ + '.' + run.__qualname__]
+    assert sorted(stats.paths.elements()) == ['a', 'b', 'c', 'd']
+
+
+def test_record_path():
+    # paths recorded outside instrumented calls are dropped
+    record_path('ignored')
+
+    with Profile() as profile:
+        record_path('ignored')
+        crop_image(generate_random_image(5, 5), (0, 0), height_width=(2, 2))
+
+    stats = profile.stats['openchroma.imageops.crop_image']
+    assert not stats.paths
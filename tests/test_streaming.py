@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from openchroma import streaming
+from openchroma.colorspace import RGB_to_CMYK
+from openchroma.streaming import stream_RGB_to_CMYK
+
+
+def generate_random_image(height, width, dtype=np.uint8):
+    img = np.random.randint(0, np.iinfo(dtype).max + 1, (height, width, 3))
+
+    return img.astype(dtype)
+
+
+stream_RGB_to_CMYK_parameters = [
+    ['img.npy', None],
+    ['img.ppm', None],
+    ['img.tif', None],
+    ['img.png', None],
+    ['img.npy', 1],
+    ['img.ppm', 7],
+    ['img.tif', 1000],
+]
+
+
+@pytest.mark.parametrize(
+    'src, strip_height',
+    stream_RGB_to_CMYK_parameters,
+)
+def test_stream_RGB_to_CMYK(tmp_path, src, strip_height):
+    img = generate_random_image(61, 43)
+    if src.endswith('.npy'):
+        np.save(tmp_path / src, img)
+    else:
+        Image.fromarray(img).save(tmp_path / src)
+
+    stream_RGB_to_CMYK(
+        tmp_path / src,
+        tmp_path / 'cmyk.npy',
+        strip_height=strip_height,
+    )
+
+    assert np.array_equal(np.load(tmp_path / 'cmyk.npy'), RGB_to_CMYK(img))
+
+
+@pytest.mark.parametrize('bit_depth', [8, 16])
+def test_stream_RGB_to_CMYK_raw(tmp_path, bit_depth):
+    img = generate_random_image(50, 40, dtype=np.uint16)
+    img.tofile(tmp_path / 'img.raw')
+
+    stream_RGB_to_CMYK(
+        tmp_path / 'img.raw',
+        tmp_path / 'cmyk.raw',
+        strip_height=9,
+        shape=(50, 40),
+        dtype=np.uint16,
+        bit_depth=bit_depth,
+    )
+    cmyk = np.fromfile(tmp_path / 'cmyk.raw').reshape(50, 40, 4)
+
+    assert np.array_equal(cmyk, RGB_to_CMYK(img, bit_depth=bit_depth))
+
+
+@pytest.mark.parametrize('bigtiff', [False, True])
+def test_stream_RGB_to_CMYK_tiff(tmp_path, monkeypatch, bigtiff):
+    if bigtiff:
+        monkeypatch.setattr(streaming, '_TIFF_MAX_OFFSET', 0)
+
+    img = generate_random_image(61, 43)
+    np.save(tmp_path / 'img.npy', img)
+
+    stream_RGB_to_CMYK(
+        tmp_path / 'img.npy',
+        tmp_path / 'cmyk.tif',
+        strip_height=10,
+    )
+
+    with Image.open(tmp_path / 'cmyk.tif') as im:
+        assert im.mode == 'CMYK'
+        cmyk = np.asarray(im)
+
+    expected = np.round(RGB_to_CMYK(img) * 2.55).astype(np.uint8)
+    assert np.array_equal(cmyk, expected)
+
+
+def test_stream_RGB_to_CMYK_error(tmp_path):
+    np.save(tmp_path / 'img.npy', generate_random_image(10, 10))
+
+    with pytest.raises(ValueError):
+        stream_RGB_to_CMYK(
+            tmp_path / 'img.npy',
+            tmp_path / 'cmyk.npy',
+            strip_height=0,
+        )
+
+    with pytest.raises(ValueError):
+        stream_RGB_to_CMYK(
+            tmp_path / 'img.npy',
+            tmp_path / 'cmyk.npy',
+            bit_depth=12,
+        )
+
+    np.save(tmp_path / 'gray.npy', np.zeros((10, 10)))
+
+    with pytest.raises(ValueError):
+        stream_RGB_to_CMYK(tmp_path / 'gray.npy', tmp_path / 'cmyk.npy')
@@ -1,6 +1,9 @@
+import threading
+
 import numpy as np
 import pytest
 
+from openchroma import utils
 from openchroma.utils import (
     is_array_like,
     require_array_like,
@@ -10,6 +13,12 @@ from openchroma.utils import (
     require_dim,
     is_axis_size,
     require_axis_size,
+    validate_array,
+    validate_out,
+    trusted,
+    set_trusted,
+    is_trusted,
+    clear_scratch_buffers,
 )
 
 is_array_like_parameters = [
@@ -86,3 +95,155 @@ def test_is_axis_size(arr, size, axis, result):
     else:
         with pytest.raises(ValueError):
             require_axis_size(arr, size, axis=axis)
+
+
+validate_array_parameters = [
+    [[[1, 2, 3], [4, 5, 6]], {'shape': (2, 3)}, None],
+    [[[1, 2, 3], [4, 5, 6]], {'dim': 2, 'axis_sizes': {-1: 3}}, None],
+    [np.zeros((4, 5, 3)), {'dim': 3, 'axis_sizes': {0: 4, -1: 3}}, None],
+    [np.zeros((4, 5, 3)), {'shape': (4, 5)}, ValueError],
+    [np.zeros((4, 5, 3)), {'dim': 2}, ValueError],
+    [np.zeros((4, 5, 3)), {'axis_sizes': {-1: 4}}, ValueError],
+    [np.zeros(3), {'axis_sizes': {1: 3}}, ValueError],
+    ['squidward', {}, TypeError],
+]
+
+
+@pytest.mark.parametrize(
+    'arr, checks, exception',
+    validate_array_parameters,
+)
+def test_validate_array(arr, checks, exception):
+    if exception is None:
+        validated = validate_array(arr, **checks)
+        assert isinstance(validated, np.ndarray)
+        assert np.array_equal(validated, arr)
+        if isinstance(arr, np.ndarray):
+            assert validated is arr
+    else:
+        with pytest.raises(exception):
+            validate_array(arr, **checks)
+
+        with trusted():
+            validate_array(arr, **checks)
+
+
+validate_out_parameters = [
+    [np.zeros((4, 5)), {'shape': (4, 5)}, None],
+    [np.zeros((4, 5), dtype=np.float32), {'shape': [4, 5]}, None],
+    [np.zeros((4, 5)), {'shape': (4, 5), 'dtype': np.float64}, None],
+    [np.zeros((4, 5)), {'shape': (5, 4)}, ValueError],
+    [np.zeros((4, 5)), {'shape': (4, 5), 'dtype': np.float32}, ValueError],
+    [np.zeros((4, 5))[None].T[..., 0], {'shape': (5, 4)}, None],
+    [np.broadcast_to(0.0, (4, 5)), {'shape': (4, 5)}, ValueError],
+    [[[0] * 5] * 4, {'shape': (4, 5)}, TypeError],
+]
+
+
+@pytest.mark.parametrize('out, checks, exception', validate_out_parameters)
+def test_validate_out(out, checks, exception):
+    if exception is None:
+        assert validate_out(out, **checks) is out
+    else:
+        with pytest.raises(exception):
+            validate_out(out, **checks)
+
+        with trusted():
+            assert validate_out(out, **checks) is out
+
+
+def test_scratch_array(monkeypatch):
+    clear_scratch_buffers()
+
+    arr = utils._scratch_array('test', (4, 5), np.float64)
+    assert arr.shape == (4, 5)
+    assert arr.dtype == np.float64
+
+    # buffers are reused by smaller & same-sized arrays of the same name
+    smaller = utils._scratch_array('test', (3, 2), np.int32)
+    assert smaller.dtype == np.int32
+    assert np.shares_memory(arr, smaller)
+    assert np.shares_memory(arr, utils._scratch_array('test', (4, 5), float))
+    assert not np.shares_memory(
+        arr,
+        utils._scratch_array('other', (4, 5), np.float64),
+    )
+
+    # buffers grow to fit larger arrays
+    larger = utils._scratch_array('test', (40, 5), np.float64)
+    assert not np.shares_memory(arr, larger)
+    assert np.shares_memory(larger, utils._scratch_array('test', (4,), bool))
+
+    # each thread has its own buffers
+    other_thread = []
+    thread = threading.Thread(
+        target=lambda: other_thread.append(
+            utils._scratch_array('test', (40, 5), np.float64)
+        )
+    )
+    thread.start()
+    thread.join()
+    assert not np.shares_memory(larger, other_thread[0])
+
+    # arrays beyond size limit are not kept
+    monkeypatch.setattr(utils, 'SCRATCH_BUFFER_SIZE', 100)
+    huge = utils._scratch_array('test', (13,), np.float64)
+    assert not np.shares_memory(
+        huge, utils._scratch_array('test', (13,), float)
+    )
+
+    clear_scratch_buffers()
+    assert not np.shares_memory(
+        larger, utils._scratch_array('test', (4,), bool)
+    )
+
+
+def test_scratch_array_total(monkeypatch):
+    clear_scratch_buffers()
+    monkeypatch.setattr(utils, 'SCRATCH_TOTAL_SIZE', 100)
+
+    first = utils._scratch_array('first', (5,), np.float64)
+    second = utils._scratch_array('second', (5,), np.float64)
+    assert np.shares_memory(first, utils._scratch_array('first', (5,), float))
+
+    # least recently used buffers are released beyond total size limit
+    third = utils._scratch_array('third', (5,), np.float64)
+    assert np.shares_memory(first, utils._scratch_array('first', (5,), float))
+    assert not np.shares_memory(
+        second, utils._scratch_array('second', (5,), float)
+    )
+    assert not np.shares_memory(
+        third, utils._scratch_array('third', (5,), float)
+    )
+    assert utils._scratch_size <= 100
+
+    clear_scratch_buffers()
+    assert utils._scratch_size == 0
+
+
+def test_trusted():
+    assert not is_trusted()
+
+    with trusted():
+        assert is_trusted()
+        require_array_like(2)
+        require_shape([1, 2], (3,))
+        require_dim(np.zeros(3), 2)
+        require_axis_size(np.zeros(3), 2)
+
+        with trusted(False):
+            assert not is_trusted()
+            with pytest.raises(ValueError):
+                require_dim(np.zeros(3), 2)
+
+    assert not is_trusted()
+
+    set_trusted(True)
+    try:
+        assert is_trusted()
+        require_shape([1, 2], (3,))
+    finally:
+        set_trusted(False)
+
+    with pytest.raises(ValueError):
+        require_shape([1, 2], (3,))